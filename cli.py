@@ -5,12 +5,16 @@ import click
 import typer
 
 from src.cli.embed import handle_embed_command
+from src.cli.report import handle_report_command
 from src.cli.send import handle_send_command
+from src.cli.tune import handle_tune_command
 from src.cli.websocket import handle_websocket_command
+from src.ledger.call_ledger import DEFAULT_LEDGER_PATH
 from src.transcriber.faster_whisper import (
     ComputeType,
     FasterWhisperModelSize,
 )
+from src.transcriber.tuning import DEFAULT_TUNED_CONFIG_PATH
 
 app = typer.Typer(help="Discord Bot CLI")
 
@@ -84,6 +88,76 @@ def websocket(
         int,
         typer.Option("--batch-size", help="バッチサイズ", min=1),
     ] = 8,
+    preload: Annotated[
+        bool,
+        typer.Option(
+            "--preload/--no-preload",
+            help="起動時にモデルを読み込みウォームアップする",
+        ),
+    ] = True,
+    memory_budget_mb: Annotated[
+        int | None,
+        typer.Option("--memory-budget-mb", help="モデルのメモリ予算（MB）", min=1),
+    ] = None,
+    idle_seconds: Annotated[
+        float | None,
+        typer.Option("--idle-seconds", help="未使用モデルを解放するまでの秒数", min=1),
+    ] = None,
+    replicas: Annotated[
+        int,
+        typer.Option("--replicas", help="並列に文字起こしするモデルレプリカ数", min=1),
+    ] = 1,
+    cpu_threads: Annotated[
+        int | None,
+        typer.Option(
+            "--cpu-threads", help="全レプリカで使用するCPUスレッド数の上限", min=1
+        ),
+    ] = None,
+    tuned_config: Annotated[
+        Path | None,
+        typer.Option(
+            "--tuned-config",
+            help="tuneコマンドで保存した設定ファイル。指定した場合はモデル関連の値を上書きする",
+            exists=True,
+        ),
+    ] = None,
+    cache: Annotated[
+        bool,
+        typer.Option("--cache/--no-cache", help="文字起こし結果をキャッシュする"),
+    ] = True,
+    cache_dir: Annotated[
+        Path,
+        typer.Option("--cache-dir", help="文字起こしキャッシュの保存先"),
+    ] = Path("./data/cache/transcription"),
+    cache_max_mb: Annotated[
+        int,
+        typer.Option(
+            "--cache-max-mb", help="文字起こしキャッシュの容量上限（MB）", min=1
+        ),
+    ] = 1024,
+    unix_socket: Annotated[
+        Path | None,
+        typer.Option(
+            "--unix-socket",
+            help="同一ホストのクライアント用に待ち受けるUnixドメインソケットのパス",
+        ),
+    ] = None,
+    shared_roots: Annotated[
+        list[Path] | None,
+        typer.Option(
+            "--shared-root",
+            help="Unixソケット経由でパス指定を受け付けるディレクトリ（複数指定可）",
+        ),
+    ] = None,
+    metrics_port: Annotated[
+        int | None,
+        typer.Option(
+            "--metrics-port",
+            help="Prometheus形式の計測値を公開するHTTPポート番号",
+            min=1,
+            max=65535,
+        ),
+    ] = None,
 ) -> None:
     """WebSocketトランスクライバーサーバーを起動"""
     handle_websocket_command(
@@ -93,8 +167,102 @@ def websocket(
         cast(ComputeType, compute_type),
         beam_size,
         batch_size,
+        preload,
+        memory_budget_mb,
+        idle_seconds,
+        replicas,
+        cpu_threads,
+        tuned_config,
+        cache_dir if cache else None,
+        cache_max_mb,
+        unix_socket,
+        tuple(shared_roots or [Path("./data")]),
+        metrics_port,
+    )
+
+
+@app.command()
+def tune(
+    audio_path: Annotated[
+        Path,
+        typer.Argument(help="計測に使う音声ファイルのパス", exists=True),
+    ],
+    model_size: Annotated[
+        str,
+        typer.Option(
+            "--model-size",
+            help="Whisperモデルサイズ",
+            click_type=click.Choice(get_args(FasterWhisperModelSize)),
+        ),
+    ] = "large-v3",
+    compute_types: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--compute-type",
+            help="計測する計算タイプ（複数指定可、省略時は int8, float16_int8）",
+            click_type=click.Choice(get_args(ComputeType)),
+        ),
+    ] = None,
+    beam_sizes: Annotated[
+        list[int] | None,
+        typer.Option(
+            "--beam-size",
+            help="計測するビームサイズ（複数指定可、省略時は 1, 5）",
+            min=1,
+        ),
+    ] = None,
+    batch_sizes: Annotated[
+        list[int] | None,
+        typer.Option(
+            "--batch-size",
+            help="計測するバッチサイズ（複数指定可、0はBatchedInferencePipelineを使わない、省略時は 0, 8）",
+            min=0,
+        ),
+    ] = None,
+    thread_counts: Annotated[
+        list[int] | None,
+        typer.Option(
+            "--threads",
+            help="計測するCPUスレッド数（複数指定可、省略時は 4, 8）",
+            min=1,
+        ),
+    ] = None,
+    output_path: Annotated[
+        Path,
+        typer.Option("--output", help="最適な設定の保存先"),
+    ] = DEFAULT_TUNED_CONFIG_PATH,
+    max_rss_mb: Annotated[
+        int | None,
+        typer.Option("--max-rss-mb", help="許容するピークRSS（MB）", min=1),
+    ] = None,
+) -> None:
+    """faster-whisperの設定を総当たりで計測し、最適な設定を保存"""
+    handle_tune_command(
+        audio_path,
+        model_size,
+        compute_types or ["int8", "float16_int8"],
+        beam_sizes or [1, 5],
+        batch_sizes or [0, 8],
+        thread_counts or [4, 8],
+        output_path,
+        max_rss_mb,
     )
 
 
+@app.command()
+def report(
+    ledger_path: Annotated[
+        Path,
+        typer.Option("--ledger-path", help="呼び出しを記録したSQLiteファイル"),
+    ] = DEFAULT_LEDGER_PATH,
+    days: Annotated[
+        float | None,
+        typer.Option("--days", help="直近何日分を集計するか（省略時はすべて）", min=0),
+    ] = None,
+) -> None:
+    """LLMと文字起こしの呼び出しを、ギルドと種類ごとに集計して表示"""
+    handle_report_command(ledger_path, days)
+
+
 if __name__ == "__main__":
     app()
@@ -1,8 +1,16 @@
+from pathlib import Path
+
 from dependency_injector import containers, providers
 from dotenv import load_dotenv
 
 from src.bot.enums import PromptKey
+from src.ledger.call_ledger import DEFAULT_LEDGER_PATH, CallLedger
 from src.parameters_repository.tinydb import TinyDBParametersRepository
+from src.summarizer.caching import CachingSummarizer
+from src.summarizer.composite import CompositeSummarizer
+from src.summarizer.gemini import GeminiSummarizer
+from src.summarizer.ledger import LedgerSummarizer
+from src.summarizer.map_reduce import MapReduceSummarizer
 from src.summarizer.openai import OpenAISummarizer
 from src.summarizer.prompt_provider.obsidian import (
     ObsidianSummarizePromptProvider,
@@ -10,11 +18,29 @@ from src.summarizer.prompt_provider.obsidian import (
 from src.summarizer.prompt_provider.structured_markdown import (
     StructuredMarkdownSummarizePromptProvider,
 )
+from src.summarizer.renderer.obsidian import ObsidianNotesRenderer
+from src.summarizer.renderer.structured_markdown import (
+    StructuredMarkdownNotesRenderer,
+)
+from src.summarizer.rolling import RollingSummarizer
+from src.summarizer.structured import StructuredSummarizer
 from src.transcriber.openai import OpenAIWhisperTranscriber
 
 load_dotenv()
 
 
+def _as_bool(value: str | bool) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _mb_as_optional_bytes(value: str | int) -> int | None:
+    return int(value) * 1024**2 or None
+
+
+def _days_as_optional_seconds(value: str | float) -> float | None:
+    return float(value) * 86400 or None
+
+
 class Container(containers.DeclarativeContainer):
     config = providers.Configuration()
 
@@ -27,6 +53,15 @@ class Container(containers.DeclarativeContainer):
             PromptKey.OBSIDIAN: providers.Singleton(ObsidianSummarizePromptProvider),
         },
     )
+    ledger = providers.Singleton(CallLedger, path=config.ledger_path)
+    notes_renderer = providers.Selector(
+        config.summarize_prompt_key,
+        **{
+            PromptKey.DEFAULT: providers.Singleton(StructuredMarkdownNotesRenderer),
+            PromptKey.OBSIDIAN: providers.Singleton(ObsidianNotesRenderer),
+        },
+    )
+    # tune コマンドで保存した設定は、websocket コマンドの --tuned-config で適用する
     # transcriber = providers.Singleton(
     #     FasterWhisperTranscriber,
     #     model_size=config.model_size,
@@ -37,12 +72,64 @@ class Container(containers.DeclarativeContainer):
         OpenAIWhisperTranscriber,
         api_key=config.openai_api_key,
         model="gpt-4o-mini-transcribe",
+        ledger=ledger,
     )
-    summarizer = providers.Singleton(
-        OpenAISummarizer,
-        api_key=config.openai_api_key,
+    openai_summarizer = providers.Singleton(
+        LedgerSummarizer,
+        summarizer=providers.Singleton(
+            OpenAISummarizer,
+            api_key=config.openai_api_key,
+            summarize_prompt_provider=prompt_provider,
+            model=config.openai_model,
+        ),
+        ledger=ledger,
+    )
+    gemini_summarizer = providers.Singleton(
+        LedgerSummarizer,
+        summarizer=providers.Singleton(
+            GeminiSummarizer,
+            api_key=config.google_api_key,
+            summarize_prompt_provider=prompt_provider,
+            model=config.gemini_model,
+        ),
+        ledger=ledger,
+    )
+    llm_summarizer = providers.Singleton(
+        CompositeSummarizer,
+        summarizers=providers.List(openai_summarizer, gemini_summarizer),
+        policy=config.summarizer_policy,
+        fallback_timeout=config.summarizer_fallback_timeout,
+    )
+    cached_summarizer = providers.Singleton(
+        CachingSummarizer,
+        summarizer=llm_summarizer,
+        dir=config.summary_cache_dir,
+        max_bytes=config.summary_cache_max_bytes,
+        max_age_seconds=config.summary_cache_max_age_seconds,
+    )
+    structured_summarizer = providers.Singleton(
+        StructuredSummarizer,
+        summarizer=cached_summarizer,
+        renderer=notes_renderer,
         summarize_prompt_provider=prompt_provider,
-        model=config.openai_model,
+    )
+    # markdown: フォーマットごとにLLMで生成する / structured: 構造化データを1回だけ生成して描画する
+    output_summarizer = providers.Selector(
+        config.summary_output,
+        markdown=cached_summarizer,
+        structured=structured_summarizer,
+    )
+    summarizer = providers.Singleton(
+        MapReduceSummarizer,
+        summarizer=output_summarizer,
+        chunk_tokens=config.summary_chunk_tokens,
+        max_parallel=config.summary_max_parallel,
+    )
+    rolling_summarizer = providers.Factory(
+        RollingSummarizer,
+        partial_summarizer=cached_summarizer,
+        section_tokens=config.rolling_summary_tokens,
+        max_parallel=config.summary_max_parallel,
     )
     parameters_repository = providers.Singleton(TinyDBParametersRepository)
 
@@ -51,9 +138,42 @@ container = Container()
 container.config.google_api_key.from_env("GOOGLE_API_KEY", required=True)
 container.config.openai_api_key.from_env("OPENAI_API_KEY", required=True)
 container.config.openai_model.from_env("OPENAI_MODEL", default="gpt-5-nano")
+container.config.gemini_model.from_env("GEMINI_MODEL", default="gemini-2.0-flash")
+container.config.summarizer_policy.from_env("SUMMARIZER_POLICY", default="primary")
+container.config.summarizer_fallback_timeout.from_env(
+    "SUMMARIZER_FALLBACK_TIMEOUT", default=120.0, as_=float
+)
+container.config.summary_chunk_tokens.from_env(
+    "SUMMARY_CHUNK_TOKENS", default=8000, as_=int
+)
+container.config.summary_max_parallel.from_env(
+    "SUMMARY_MAX_PARALLEL", default=4, as_=int
+)
+container.config.summary_output.from_env("SUMMARY_OUTPUT", default="markdown")
+container.config.rolling_summary_tokens.from_env(
+    "ROLLING_SUMMARY_TOKENS", default=0, as_=int
+)
+container.config.ledger_path.from_env(
+    "LEDGER_PATH", default=str(DEFAULT_LEDGER_PATH), as_=Path
+)
+container.config.summary_cache_dir.from_env(
+    "SUMMARY_CACHE_DIR", default="./data/cache/summary", as_=Path
+)
+container.config.summary_cache_max_bytes.from_env(
+    "SUMMARY_CACHE_MAX_MB", default=256, as_=_mb_as_optional_bytes
+)
+container.config.summary_cache_max_age_seconds.from_env(
+    "SUMMARY_CACHE_MAX_AGE_DAYS", default=30, as_=_days_as_optional_seconds
+)
 container.config.model_size.from_env("MODEL_SIZE", default="small")
 container.config.beam_size.from_env("BEAM_SIZE", default=5, as_=int)
 container.config.batch_size.from_env("BATCH_SIZE", default=8, as_=int)
+container.config.preload_model.from_env("PRELOAD_MODEL", default=False, as_=_as_bool)
+container.config.model_memory_budget_mb.from_env(
+    "MODEL_MEMORY_BUDGET_MB", default=0, as_=int
+)
+container.config.model_idle_seconds.from_env("MODEL_IDLE_SECONDS", default=0, as_=float)
+container.config.live_transcription_uri.from_env("LIVE_TRANSCRIPTION_URI", default="")
 container.config.discord_bot_token.from_env("DISCORD_BOT_TOKEN", required=True)
 container.config.log_level.from_env("LOG_LEVEL", default="INFO", as_=str)
 container.config.summarize_prompt_key.from_env(
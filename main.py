@@ -3,10 +3,23 @@ import logging
 from container import container
 from logging_config import load_logging_config
 from src.bot.command import bot
+from src.transcriber.model_registry import model_registry
+from src.transcriber.transcriber import PreloadableTranscriber
 
 load_logging_config(container.config.log_level())
 
 logger = logging.getLogger(__name__)
 
+model_registry.configure(
+    memory_budget_bytes=(container.config.model_memory_budget_mb() * 1024**2) or None,
+    idle_seconds=container.config.model_idle_seconds() or None,
+)
+
+if container.config.preload_model() and isinstance(
+    transcriber := container.transcriber(), PreloadableTranscriber
+):
+    logger.info("Preloading transcription model...")
+    transcriber.preload(warmup=True)
+
 logger.info("Starting Discord bot...")
 bot.run(container.config.discord_bot_token())
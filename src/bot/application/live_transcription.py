@@ -0,0 +1,122 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator, Callable
+from logging import getLogger
+
+import websockets
+
+from src.transcriber.transcriber import IterableTranscriber, Segment, Transcriber
+from src.transcriber.websocket_client import WebSocketStreamingTranscriberClient
+
+from ..live_mixer import LiveAudioMixer
+
+logger = getLogger(__name__)
+
+# ライブ文字起こしの接続・送受信で起こりうる失敗。録音ファイルからの文字起こしに切り替えて続ける
+LIVE_TRANSCRIPTION_ERRORS = (
+    OSError,
+    RuntimeError,
+    TimeoutError,
+    websockets.WebSocketException,
+)
+
+
+class LiveTranscription:
+    """録音中の音声をミックスしながら、ストリーミング文字起こしサーバーへ送り続ける"""
+
+    def __init__(
+        self,
+        uri: str,
+        interval: float = 1.0,
+        on_segment: Callable[[Segment], None] | None = None,
+    ):
+        self.mixer = LiveAudioMixer()
+        self.client = WebSocketStreamingTranscriberClient(
+            uri,
+            sample_rate=LiveAudioMixer.OUTPUT_SAMPLE_RATE,
+            channels=1,
+            sample_width=LiveAudioMixer.SAMPLE_WIDTH,
+            on_segment=on_segment,
+        )
+        self.interval = interval
+        self._pump_task: asyncio.Task | None = None
+        self._finish_lock = asyncio.Lock()
+        self._segments: list[Segment] | None = None
+
+    async def start(self) -> None:
+        await self.client.start()
+        self._pump_task = asyncio.create_task(self._pump())
+
+    async def finish(self) -> list[Segment]:
+        """残りの音声を送り切り、確定したすべてのセグメントを返す（複数回呼んでも一度だけ実行する）"""
+        async with self._finish_lock:
+            if self._segments is None:
+                await self._stop_pump()
+                remaining = self.mixer.buffered_seconds()
+                if remaining > 0:
+                    await self.client.send(self.mixer.drain(remaining))
+                self._segments = await self.client.finish()
+            return self._segments
+
+    async def close(self) -> None:
+        """結果を待たずにセッションを破棄する"""
+        async with self._finish_lock:
+            if self._segments is None:
+                await self._stop_pump()
+                await self.client.abort()
+                self._segments = []
+
+    async def _pump(self) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sent = 0.0
+        while True:
+            await asyncio.sleep(self.interval)
+            pcm = self.mixer.drain(loop.time() - started - sent)
+            await self.client.send(pcm)
+            sent += len(pcm) / self.mixer.output_bytes_per_second
+
+    async def _stop_pump(self) -> None:
+        if self._pump_task is None:
+            return
+        if self._pump_task.done():
+            self._pump_task.result()
+            return
+        self._pump_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._pump_task
+
+
+class LiveTranscriptionTranscriber(IterableTranscriber):
+    """
+    ライブ文字起こしで確定したセグメントを返す。
+    ライブ文字起こしに失敗していた場合は、録音ファイルを fallback で文字起こしする。
+    """
+
+    def __init__(
+        self,
+        live: LiveTranscription,
+        fallback: Transcriber | IterableTranscriber,
+    ):
+        self.live = live
+        self.fallback = fallback
+
+    async def transcribe_iter(self, audio_path: str) -> AsyncGenerator[Segment, None]:
+        try:
+            segments = await self.live.finish()
+        except LIVE_TRANSCRIPTION_ERRORS as e:
+            logger.warning(f"Live transcription failed, falling back: {e}")
+            async for segment in self._fallback_iter(audio_path):
+                yield segment
+            return
+
+        for segment in segments:
+            yield segment
+
+    async def _fallback_iter(self, audio_path: str) -> AsyncGenerator[Segment, None]:
+        if isinstance(self.fallback, IterableTranscriber):
+            async for segment in self.fallback.transcribe_iter(audio_path):
+                yield segment
+        else:
+            text = await asyncio.to_thread(self.fallback.transcribe, audio_path)
+            yield Segment(start=0.0, end=0.0, text=text)
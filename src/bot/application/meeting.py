@@ -4,6 +4,7 @@ from logging import getLogger
 import discord
 
 from container import container
+from src.ledger.context import ledger_context
 from src.post_process.github_push import GitHubPusher
 from src.recording_handler.attendee import AttendeeData
 from src.recording_handler.context_provider import ParametersBaseContextProvider
@@ -13,12 +14,19 @@ from src.recording_handler.recording_handler import RecordingHandler
 from src.recording_handler.save import SaveToFolderRecordingHandler
 from src.recording_handler.transcription import TranscriptionRecordingHandler
 from src.summarizer.formatter.mdformat import MdFormatSummaryFormatter
+from src.summarizer.rolling import RollingSummarizer
+from src.transcriber.transcriber import IterableTranscriber, Transcriber
 from src.ui.embeds import create_recording_monitor_embed
 from src.ui.view_builder import CommitViewBuilder, EditViewBuilder
 
 from ..domain.meeting import Meeting
 from ..enums import Mode, PromptKey
 from ..file_sink import FileSink
+from .live_transcription import (
+    LIVE_TRANSCRIPTION_ERRORS,
+    LiveTranscription,
+    LiveTranscriptionTranscriber,
+)
 
 logger = getLogger(__name__)
 
@@ -43,8 +51,27 @@ class MeetingService:
                 f"Meeting already exists for guild {guild_id}"
             )
         vc = await voice_channel.connect()
-        sink = FileSink(loop=asyncio.get_running_loop())
-        meeting = Meeting(voice_client=vc, sink=sink)
+        # ライブ文字起こしがある場合は、録音中から区切りごとの要約を進めておく
+        rolling = (
+            _create_rolling_summarizer(guild_id)
+            if container.config.live_transcription_uri()
+            else None
+        )
+        # ライブ文字起こしの受信タスクと、そこから始まる要約をこのギルドとして記帳する
+        with ledger_context(guild_id=guild_id):
+            live = await self._start_live_transcription(rolling)
+        if live is None:
+            rolling = None
+        sink = FileSink(
+            loop=asyncio.get_running_loop(),
+            on_audio=live.mixer.push if live is not None else None,
+        )
+        meeting = Meeting(
+            voice_client=vc,
+            sink=sink,
+            live_transcription=live,
+            rolling_summarizer=rolling,
+        )
         self.meetings[guild_id] = meeting
         logger.info(f"Starting recording in {voice_channel.name} for guild {guild_id}")
         vc.start_recording(
@@ -65,7 +92,16 @@ class MeetingService:
         if meeting is None:
             raise MeetingNotFoundError(f"No meeting exists for guild {guild_id}")
 
-        meeting.recording_handler = create_recording_handler(guild_id, mode)
+        meeting.recording_handler = create_recording_handler(
+            guild_id,
+            mode,
+            transcriber=LiveTranscriptionTranscriber(
+                meeting.live_transcription, container.transcriber()
+            )
+            if meeting.live_transcription is not None
+            else None,
+            rolling_summarizer=meeting.rolling_summarizer,
+        )
         meeting.text_channel = text_channel
 
         logger.info(f"Stopping recording for guild {guild_id} with mode {mode}")
@@ -91,18 +127,44 @@ class MeetingService:
 
             context = MessageContext(channel=channel)
 
-            async for data in handler(attendees):
-                await data.effect(context)
+            with ledger_context(guild_id=guild_id):
+                async for data in handler(attendees):
+                    await data.effect(context)
         else:
             raise ValueError(
                 f"Recording handler or text channel not set for guild {guild_id}"
             )
 
         try:
+            if (live := meeting.live_transcription) is not None:
+                await live.close()
+            if (rolling := meeting.rolling_summarizer) is not None:
+                rolling.close()
             await self._stop_monitoring(guild_id, final=True)
         finally:
             del self.meetings[guild_id]
 
+    async def _start_live_transcription(
+        self, rolling: RollingSummarizer | None = None
+    ) -> LiveTranscription | None:
+        if not (uri := container.config.live_transcription_uri()):
+            return None
+        live = LiveTranscription(
+            uri,
+            on_segment=(lambda segment: rolling.add(segment.text))
+            if rolling is not None
+            else None,
+        )
+        try:
+            async with asyncio.timeout(5):
+                await live.start()
+        except LIVE_TRANSCRIPTION_ERRORS as e:
+            logger.warning(f"Failed to start live transcription: {e}")
+            # 開きかけの接続と受信タスクを残さない
+            await live.close()
+            return None
+        return live
+
     async def start_monitoring(
         self,
         guild_id: int,
@@ -149,7 +211,12 @@ class MeetingService:
             )
 
 
-def create_recording_handler(guild_id: int, mode: Mode) -> RecordingHandler:
+def create_recording_handler(
+    guild_id: int,
+    mode: Mode,
+    transcriber: Transcriber | IterableTranscriber | None = None,
+    rolling_summarizer: RollingSummarizer | None = None,
+) -> RecordingHandler:
     if mode == Mode.SAVE:
         return SaveToFolderRecordingHandler()
 
@@ -158,7 +225,7 @@ def create_recording_handler(guild_id: int, mode: Mode) -> RecordingHandler:
 
     if mode == Mode.TRANSCRIPTION:
         return TranscriptionRecordingHandler(
-            transcriber=container.transcriber(),
+            transcriber=transcriber or container.transcriber(),
         )
 
     if mode == Mode.MINUTE:
@@ -175,17 +242,29 @@ def create_recording_handler(guild_id: int, mode: Mode) -> RecordingHandler:
         formatter = MdFormatSummaryFormatter()
 
         return MinuteRecordingHandler(
-            transcriber=container.transcriber(),
+            transcriber=transcriber or container.transcriber(),
             summarizer=container.summarizer(),
-            summarize_prompt_provider=container.prompt_provider(),
             summary_formatter=formatter,
             view_builder=view_builder,
             context_provider=context_provider,
+            rolling_summarizer=rolling_summarizer
+            or _create_rolling_summarizer(guild_id),
         )
 
     return container.audio_handler()
 
 
+def _create_rolling_summarizer(guild_id: int) -> RollingSummarizer | None:
+    """ROLLING_SUMMARY_TOKENS が0の場合は、区切りごとの要約を行わない"""
+    if not container.config.rolling_summary_tokens():
+        return None
+    parameters = container.parameters_repository().get_parameters(guild_id)
+    container.config.summarize_prompt_key.override(
+        parameters.prompt_key or PromptKey.DEFAULT
+    )
+    return container.rolling_summarizer()
+
+
 def _pusher_builder(guild_id: int) -> GitHubPusher | None:
     parameters_repository = container.parameters_repository()
     parameters = parameters_repository.get_parameters(guild_id=guild_id)
@@ -1,11 +1,16 @@
 import asyncio
 import time
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 import discord
 
 from src.bot.file_sink import FileSink
 from src.recording_handler.recording_handler import RecordingHandler
+from src.summarizer.rolling import RollingSummarizer
+
+if TYPE_CHECKING:
+    from src.bot.application.live_transcription import LiveTranscription
 
 
 @dataclass
@@ -17,3 +22,5 @@ class Meeting:
     text_channel: discord.TextChannel | None = None
     monitor_task: asyncio.Task | None = None
     monitor_message: discord.Message | None = None
+    live_transcription: "LiveTranscription | None" = None
+    rolling_summarizer: RollingSummarizer | None = None
@@ -3,6 +3,7 @@ import os
 import tempfile
 import threading
 import time
+from collections.abc import Callable
 from concurrent.futures import Future
 from logging import getLogger
 from typing import IO
@@ -23,10 +24,17 @@ class FileSink(discord.sinks.Sink):
     バックグラウンドの別スレッドでファイルに書き出す自己完結型シンク。
     """
 
-    def __init__(self, loop: asyncio.AbstractEventLoop, *, filters=None):
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        filters=None,
+        on_audio: Callable[[Snowflake, bytes], None] | None = None,
+    ):
         super().__init__(filters=filters)
         os.makedirs(_TMP_DIR, exist_ok=True)
         self.loop = loop
+        self.on_audio = on_audio
 
         self.audio_data: dict[Snowflake, str] = {}
         self._file_handles: dict[Snowflake, IO[bytes]] = {}
@@ -59,6 +67,9 @@ class FileSink(discord.sinks.Sink):
         self._bytes_total += len(data)
         self._last_packet = time.monotonic()
 
+        if self.on_audio is not None:
+            self.on_audio(user, data)
+
         # キューへのデータ追加（別スレッドからの呼び出しを考慮）
         try:
             if threading.current_thread() is threading.main_thread():
@@ -0,0 +1,57 @@
+import threading
+
+import numpy as np
+from discord.types.snowflake import Snowflake
+
+
+class LiveAudioMixer:
+    """
+    ユーザーごとに届くPCM（48kHz, ステレオ, 16bit）をためておき、
+    一定時間分ずつ重ね合わせて16kHzモノラルの1本のストリームにする。
+    発話のない時間は無音で埋め、会議の経過時間とストリームの時間を揃える。
+    """
+
+    INPUT_SAMPLE_RATE = 48000
+    INPUT_CHANNELS = 2
+    SAMPLE_WIDTH = 2
+    OUTPUT_SAMPLE_RATE = 16000
+
+    def __init__(self) -> None:
+        self._buffers: dict[Snowflake, bytearray] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def output_bytes_per_second(self) -> int:
+        return self.OUTPUT_SAMPLE_RATE * self.SAMPLE_WIDTH
+
+    def push(self, user: Snowflake, data: bytes) -> None:
+        """音声受信スレッドから呼ばれる"""
+        with self._lock:
+            self._buffers.setdefault(user, bytearray()).extend(data)
+
+    def drain(self, seconds: float) -> bytes:
+        decimation = self.INPUT_SAMPLE_RATE // self.OUTPUT_SAMPLE_RATE
+        frames = int(seconds * self.INPUT_SAMPLE_RATE) // decimation * decimation
+        size = frames * self.INPUT_CHANNELS * self.SAMPLE_WIDTH
+
+        with self._lock:
+            chunks = []
+            for buffer in self._buffers.values():
+                chunks.append(bytes(buffer[:size]))
+                del buffer[:size]
+
+        mixed = np.zeros(frames * self.INPUT_CHANNELS, dtype=np.int32)
+        for chunk in chunks:
+            samples = np.frombuffer(chunk, dtype=np.int16)
+            mixed[: len(samples)] += samples
+
+        mono = mixed.reshape(-1, self.INPUT_CHANNELS).mean(axis=1)
+        downsampled = mono.reshape(-1, decimation).mean(axis=1)
+        return np.clip(downsampled, -32768, 32767).astype(np.int16).tobytes()
+
+    def buffered_seconds(self) -> float:
+        with self._lock:
+            longest = max((len(buffer) for buffer in self._buffers.values()), default=0)
+        return longest / (
+            self.INPUT_SAMPLE_RATE * self.INPUT_CHANNELS * self.SAMPLE_WIDTH
+        )
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+logger = getLogger(__name__)
+
+
+class JsonFileCache:
+    """
+    キーごとにJSONファイルを保存するディスクキャッシュ。
+    最終アクセス時刻（mtime）の古いものから、件数・容量・経過時間の上限に従って削除する。
+    """
+
+    def __init__(
+        self,
+        dir: Path,
+        max_bytes: int | None = None,
+        max_entries: int | None = None,
+        max_age_seconds: float | None = None,
+    ) -> None:
+        self.dir = dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Any | None:
+        path = self._path(key)
+        with self._lock:
+            try:
+                if self._is_expired(path):
+                    path.unlink(missing_ok=True)
+                    raise FileNotFoundError(path)
+                value = json.loads(path.read_text(encoding="utf-8"))
+                os.utime(path)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        with self._lock:
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.dir, suffix=".tmp", delete=False, encoding="utf-8"
+            ) as tmp:
+                json.dump(value, tmp, ensure_ascii=False)
+            os.replace(tmp.name, path)
+            self._evict()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def _is_expired(self, path: Path) -> bool:
+        return (
+            self.max_age_seconds is not None
+            and time.time() - path.stat().st_mtime > self.max_age_seconds
+        )
+
+    def _evict(self) -> None:
+        entries = sorted(
+            ((path, path.stat()) for path in self.dir.glob("*.json")),
+            key=lambda entry: entry[1].st_mtime,
+        )
+        total_bytes = sum(stat.st_size for _, stat in entries)
+        count = len(entries)
+        for path, stat in entries:
+            over_entries = self.max_entries is not None and count > self.max_entries
+            over_bytes = self.max_bytes is not None and total_bytes > self.max_bytes
+            expired = (
+                self.max_age_seconds is not None
+                and time.time() - stat.st_mtime > self.max_age_seconds
+            )
+            if not (over_entries or over_bytes or expired):
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= stat.st_size
+            count -= 1
+            logger.debug(f"Evicted cache entry {path.name}")
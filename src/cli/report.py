@@ -0,0 +1,33 @@
+import time
+from pathlib import Path
+
+import typer
+
+from src.ledger.call_ledger import CallLedger
+
+
+def handle_report_command(ledger_path: Path, days: float | None) -> None:
+    if not ledger_path.exists():
+        typer.echo(f"台帳が見つかりません: {ledger_path}", err=True)
+        raise typer.Exit(code=1)
+
+    since = time.time() - days * 86400 if days is not None else None
+    rows = CallLedger(ledger_path).report(since)
+    if not rows:
+        typer.echo("記録された呼び出しはありません")
+        return
+
+    typer.echo(
+        f"{'guild':>20} {'kind':<14} {'calls':>6} {'errors':>6} "
+        f"{'p50(s)':>7} {'p95(s)':>7} {'input':>10} {'cached':>10} {'output':>9} {'cost($)':>9}"
+    )
+    total_cost = 0.0
+    for row in rows:
+        total_cost += row.cost
+        typer.echo(
+            f"{row.guild_id or '-':>20} {row.kind:<14} {row.calls:>6} {row.errors:>6} "
+            f"{row.p50_latency:>7.2f} {row.p95_latency:>7.2f} "
+            f"{row.input_tokens:>10} {row.cached_tokens:>10} {row.output_tokens:>9} "
+            f"{row.cost:>9.4f}"
+        )
+    typer.echo(f"合計の推定料金: ${total_cost:.4f}（料金表にないモデルは含みません）")
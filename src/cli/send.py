@@ -7,6 +7,7 @@ from container import container
 from src.bot.application.meeting import create_recording_handler
 from src.bot.command import bot
 from src.bot.enums import Mode
+from src.ledger.context import ledger_context
 from src.recording_handler.common import create_path_builder
 from src.recording_handler.message_data import MessageContext, SendData
 from src.recording_handler.minute import MinuteRecordingHandler
@@ -72,8 +73,9 @@ def _send_messages_to_channel(
             context = MessageContext(channel=channel)
             try:
                 last_message = None
-                async for last_message in messages:
-                    pass
+                with ledger_context(guild_id=guild_id):
+                    async for last_message in messages:
+                        pass
 
                 if isinstance(last_message, SendData):
                     await last_message.effect(context)
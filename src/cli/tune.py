@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import typer
+
+from src.transcriber.tuning import (
+    TuneResult,
+    build_grid,
+    run_benchmark,
+    save_tuned_config,
+    select_best,
+)
+
+
+def handle_tune_command(
+    audio_path: Path,
+    model_size: str,
+    compute_types: list[str],
+    beam_sizes: list[int],
+    batch_sizes: list[int],
+    thread_counts: list[int],
+    output_path: Path,
+    max_rss_mb: int | None,
+) -> None:
+    grid = build_grid(
+        model_size=model_size,
+        compute_types=compute_types,
+        beam_sizes=beam_sizes,
+        batch_sizes=[batch_size or None for batch_size in batch_sizes],
+        thread_counts=thread_counts,
+    )
+    typer.echo(f"{len(grid)}通りの設定を計測します（モデル: {model_size}）")
+
+    results: list[TuneResult] = []
+    for idx, config in enumerate(grid, start=1):
+        typer.echo(f"[{idx}/{len(grid)}] {config.describe()}")
+        try:
+            result = run_benchmark(config, audio_path)
+        except (RuntimeError, ValueError, OSError) as e:
+            # 未対応の計算タイプやメモリ不足によるワーカーの異常終了など
+            typer.echo(f"  失敗しました: {e}", err=True)
+            continue
+        results.append(result)
+        typer.echo(
+            f"  RTF={result.real_time_factor:.3f}, peak RSS={result.peak_rss_bytes / 1024**2:.0f}MB"
+        )
+
+    best = select_best(
+        results, max_rss_mb * 1024**2 if max_rss_mb is not None else None
+    )
+    if best is None:
+        typer.echo("条件を満たす設定が見つかりませんでした。", err=True)
+        raise typer.Exit(1)
+
+    save_tuned_config(best, output_path)
+    typer.echo(
+        f"最適な設定: {best.config.describe()} (RTF={best.real_time_factor:.3f})"
+    )
+    typer.echo(f"保存先: {output_path}")
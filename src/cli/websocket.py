@@ -1,4 +1,6 @@
 import asyncio
+from pathlib import Path
+from typing import cast
 
 import typer
 
@@ -7,7 +9,11 @@ from src.transcriber.faster_whisper import (
     FasterWhisperModelSize,
     FasterWhisperTranscriber,
 )
-from src.transcriber.transcriber import IterableTranscriber
+from src.transcriber.model_registry import model_registry
+from src.transcriber.replica_pool import ReplicaPoolTranscriber
+from src.transcriber.transcriber import IterableTranscriber, PreloadableTranscriber
+from src.transcriber.transcription_cache import TranscriptionCache
+from src.transcriber.tuning import load_tuned_config
 from src.transcriber.websocket_server import WebSocketIterableTranscriberServer
 
 
@@ -17,25 +23,108 @@ def handle_websocket_command(
     model_size: FasterWhisperModelSize,
     compute_type: ComputeType,
     beam_size: int,
-    batch_size: int,
+    batch_size: int | None,
+    preload: bool = True,
+    memory_budget_mb: int | None = None,
+    idle_seconds: float | None = None,
+    replicas: int = 1,
+    cpu_threads: int | None = None,
+    tuned_config: Path | None = None,
+    cache_dir: Path | None = Path("./data/cache/transcription"),
+    cache_max_mb: int = 1024,
+    unix_socket: Path | None = None,
+    shared_roots: tuple[Path, ...] = (Path("./data"),),
+    metrics_port: int | None = None,
 ) -> None:
+    if tuned_config is not None:
+        tuned = load_tuned_config(tuned_config)
+        typer.echo(f"チューニング済みの設定を使用します: {tuned}")
+        model_size = cast(FasterWhisperModelSize, tuned.get("model_size", model_size))
+        compute_type = cast(ComputeType, tuned.get("compute_type", compute_type))
+        beam_size = tuned.get("beam_size", beam_size)
+        batch_size = tuned.get("batch_size", batch_size)
+        cpu_threads = tuned.get("cpu_threads", cpu_threads)
+
     typer.echo("WebSocketトランスクライバーサーバーを起動中...")
     typer.echo(f"ホスト: {host}")
     typer.echo(f"ポート: {port}")
+    if unix_socket is not None:
+        typer.echo(f"Unixソケット: {unix_socket}")
+        typer.echo(f"共有ディレクトリ: {', '.join(map(str, shared_roots))}")
+    if metrics_port is not None:
+        typer.echo(f"メトリクスポート: {metrics_port}")
     typer.echo(f"モデル: {model_size}")
 
-    transcriber = FasterWhisperTranscriber(
-        model_size=model_size,
-        compute_type=compute_type,
-        beam_size=beam_size,
-        batch_size=batch_size,
+    transcriber: ReplicaPoolTranscriber | FasterWhisperTranscriber
+    if replicas > 1:
+        typer.echo(f"レプリカ数: {replicas}")
+        transcriber = ReplicaPoolTranscriber(
+            model_size=model_size,
+            compute_type=compute_type,
+            beam_size=beam_size,
+            batch_size=batch_size,
+            replicas=replicas,
+            total_cpu_threads=cpu_threads,
+        )
+    else:
+        transcriber = FasterWhisperTranscriber(
+            model_size=model_size,
+            compute_type=compute_type,
+            beam_size=beam_size,
+            batch_size=batch_size,
+            cpu_threads=cpu_threads or 0,
+        )
+
+    model_registry.configure(
+        memory_budget_bytes=memory_budget_mb * 1024**2 if memory_budget_mb else None,
+        idle_seconds=idle_seconds,
+    )
+    if preload and isinstance(transcriber, PreloadableTranscriber):
+        typer.echo("モデルを事前読み込み中...")
+        transcriber.preload(warmup=True)
+
+    cache = (
+        TranscriptionCache(
+            cache_dir,
+            namespace=f"{model_size}:{compute_type}:beam={beam_size}:batch={batch_size}",
+            max_bytes=cache_max_mb * 1024**2,
+        )
+        if cache_dir is not None
+        else None
     )
 
-    asyncio.run(_run_server(transcriber, host, port))
+    asyncio.run(
+        _run_server(
+            transcriber,
+            host,
+            port,
+            concurrency=replicas,
+            cache=cache,
+            unix_socket=unix_socket,
+            shared_roots=shared_roots,
+            metrics_port=metrics_port,
+        )
+    )
 
 
-async def _run_server(transcriber: IterableTranscriber, host: str, port: int) -> None:
+async def _run_server(
+    transcriber: IterableTranscriber,
+    host: str,
+    port: int,
+    concurrency: int,
+    cache: TranscriptionCache | None,
+    unix_socket: Path | None = None,
+    shared_roots: tuple[Path, ...] = (),
+    metrics_port: int | None = None,
+) -> None:
     server = WebSocketIterableTranscriberServer(
-        transcriber=transcriber, host=host, port=port
+        transcriber=transcriber,
+        host=host,
+        port=port,
+        concurrency=concurrency,
+        cache=cache,
+        unix_socket=str(unix_socket) if unix_socket is not None else None,
+        shared_roots=tuple(str(root) for root in shared_roots),
+        metrics_port=metrics_port,
     )
     await server.start_server()
@@ -0,0 +1,157 @@
+import math
+import sqlite3
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from dataclasses import asdict, dataclass, field, fields
+from logging import getLogger
+from pathlib import Path
+
+from .context import current_attempt, current_guild, current_stage
+from .pricing import estimate_cost
+
+logger = getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = Path("./data/ledger.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    guild_id INTEGER,
+    stage TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cached_tokens INTEGER NOT NULL,
+    audio_seconds REAL NOT NULL,
+    latency_seconds REAL NOT NULL,
+    retries INTEGER NOT NULL,
+    success INTEGER NOT NULL
+)
+"""
+
+
+@dataclass
+class LedgerEntry:
+    """
+    LLMや文字起こしAPIの1回の呼び出し。
+    ギルド・処理・試し直しの回数は、指定しなければ呼び出し元のコンテキストから取得する。
+    """
+
+    kind: str
+    provider: str
+    model: str
+    latency_seconds: float
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    audio_seconds: float = 0.0
+    retries: int = field(default_factory=current_attempt.get)
+    success: bool = True
+    guild_id: int | None = field(default_factory=current_guild.get)
+    stage: str = field(default_factory=current_stage.get)
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def cost(self) -> float | None:
+        return estimate_cost(
+            self.model,
+            self.input_tokens,
+            self.output_tokens,
+            self.cached_tokens,
+            self.audio_seconds,
+        )
+
+
+@dataclass
+class LedgerReportRow:
+    guild_id: int | None
+    kind: str
+    calls: int
+    errors: int
+    p50_latency: float
+    p95_latency: float
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    # 料金表にないモデルの呼び出しは含まない
+    cost: float
+
+
+class CallLedger:
+    """
+    呼び出しをSQLiteに追記だけで記録する台帳。
+    記録に失敗しても呼び出し元の処理は止めない。スレッドごとに接続を開くため、どのスレッドから記録してもよい。
+    """
+
+    def __init__(self, path: Path = DEFAULT_LEDGER_PATH):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def record(self, entry: LedgerEntry) -> None:
+        values = asdict(entry)
+        columns = ", ".join(values)
+        placeholders = ", ".join(f":{name}" for name in values)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    f"INSERT INTO calls ({columns}) VALUES ({placeholders})", values
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to record call to ledger: {e}")
+
+    def entries(self, since: float | None = None) -> list[LedgerEntry]:
+        names = [f.name for f in fields(LedgerEntry)]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(names)} FROM calls WHERE created_at >= ? ORDER BY id",
+                (since or 0.0,),
+            ).fetchall()
+        entries = []
+        for row in rows:
+            values = dict(zip(names, row, strict=True))
+            values["success"] = bool(values["success"])
+            entries.append(LedgerEntry(**values))
+        return entries
+
+    def report(self, since: float | None = None) -> list[LedgerReportRow]:
+        """ギルドと呼び出しの種類ごとに、応答時間のp50/p95と消費トークン・料金を集計する"""
+        groups: dict[tuple[int | None, str], list[LedgerEntry]] = defaultdict(list)
+        for entry in self.entries(since):
+            groups[(entry.guild_id, entry.kind)].append(entry)
+
+        rows = []
+        for (guild_id, kind), entries in groups.items():
+            latencies = sorted(e.latency_seconds for e in entries if e.success)
+            rows.append(
+                LedgerReportRow(
+                    guild_id=guild_id,
+                    kind=kind,
+                    calls=len(entries),
+                    errors=sum(not e.success for e in entries),
+                    p50_latency=_percentile(latencies, 0.5),
+                    p95_latency=_percentile(latencies, 0.95),
+                    input_tokens=sum(e.input_tokens for e in entries),
+                    output_tokens=sum(e.output_tokens for e in entries),
+                    cached_tokens=sum(e.cached_tokens for e in entries),
+                    cost=sum(e.cost or 0.0 for e in entries),
+                )
+            )
+        return sorted(rows, key=lambda row: (row.guild_id or 0, row.kind))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.path, timeout=5.0)) as conn, conn:
+            yield conn
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(len(values) * q) - 1)]
@@ -0,0 +1,26 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# 記帳する呼び出しがどのギルドの、どの処理で行われたか
+current_guild: ContextVar[int | None] = ContextVar("current_guild", default=None)
+current_stage: ContextVar[str] = ContextVar("current_stage", default="")
+# 同じ依頼を別のプロバイダーで試し直した回数
+current_attempt: ContextVar[int] = ContextVar("current_attempt", default=0)
+
+
+@contextmanager
+def ledger_context(
+    guild_id: int | None = None, stage: str | None = None
+) -> Iterator[None]:
+    """ブロック内で行われた呼び出しを、指定したギルドと処理として記帳する"""
+    tokens = []
+    if guild_id is not None:
+        tokens.append((current_guild, current_guild.set(guild_id)))
+    if stage is not None:
+        tokens.append((current_stage, current_stage.set(stage)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """100万トークンあたりのUSD。音声の分単位課金のモデルは per_audio_minute を使う"""
+
+    input: float = 0.0
+    cached_input: float = 0.0
+    output: float = 0.0
+    per_audio_minute: float = 0.0
+
+
+# 公開されている料金表の参考値。料金改定があれば更新する
+MODEL_PRICES: dict[str, ModelPrice] = {
+    "gpt-5": ModelPrice(input=1.25, cached_input=0.125, output=10.0),
+    "gpt-5-mini": ModelPrice(input=0.25, cached_input=0.025, output=2.0),
+    "gpt-5-nano": ModelPrice(input=0.05, cached_input=0.005, output=0.4),
+    "gpt-4.1": ModelPrice(input=2.0, cached_input=0.5, output=8.0),
+    "gpt-4.1-mini": ModelPrice(input=0.4, cached_input=0.1, output=1.6),
+    "gpt-4.1-nano": ModelPrice(input=0.1, cached_input=0.025, output=0.4),
+    "gpt-4o": ModelPrice(input=2.5, cached_input=1.25, output=10.0),
+    "gpt-4o-mini": ModelPrice(input=0.15, cached_input=0.075, output=0.6),
+    "gpt-4o-transcribe": ModelPrice(input=2.5, output=10.0),
+    "gpt-4o-mini-transcribe": ModelPrice(input=1.25, output=5.0),
+    "whisper-1": ModelPrice(per_audio_minute=0.006),
+    "gemini-2.0-flash": ModelPrice(input=0.1, cached_input=0.025, output=0.4),
+    "gemini-2.5-flash": ModelPrice(input=0.3, cached_input=0.075, output=2.5),
+    "gemini-2.5-pro": ModelPrice(input=1.25, cached_input=0.31, output=10.0),
+}
+
+
+def price_for(model: str) -> ModelPrice | None:
+    """日付付きのモデル名にも対応するため、最も長く一致する接頭辞の料金を返す"""
+    matches = [name for name in MODEL_PRICES if model.startswith(name)]
+    if not matches:
+        return None
+    return MODEL_PRICES[max(matches, key=len)]
+
+
+def estimate_cost(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cached_tokens: int = 0,
+    audio_seconds: float = 0.0,
+) -> float | None:
+    price = price_for(model)
+    if price is None:
+        return None
+    uncached = max(0, input_tokens - cached_tokens)
+    return (
+        uncached * price.input
+        + cached_tokens * price.cached_input
+        + output_tokens * price.output
+    ) / 1_000_000 + audio_seconds / 60 * price.per_audio_minute
@@ -1,5 +1,13 @@
+import time
+
 import requests
 from google.genai import Client
+from google.genai.types import GenerateContentResponseUsageMetadata
+
+from src.ledger.call_ledger import CallLedger, LedgerEntry
+from src.summarizer.meeting_notes import MeetingNotes
+from src.summarizer.renderer.notes_renderer import NotesRenderer
+from src.summarizer.renderer.working_out_loud import WorkingOutLoudNotesRenderer
 
 from .prompt_provider.post_process_prompt_provider import PostProcessPromptProvider
 
@@ -15,10 +23,12 @@ class WorkingOutLoud:
         api_key: str,
         webhook_url: str,
         post_process_prompt_provider: PostProcessPromptProvider,
+        ledger: CallLedger | None = None,
     ):
         self.creator = _GeminiPostCreator(
             api_key=api_key,
             post_process_prompt_provider=post_process_prompt_provider,
+            ledger=ledger,
         )
         self.webhook_url = webhook_url
 
@@ -27,14 +37,25 @@ class WorkingOutLoud:
         meeting_notes: str,
     ):
         post_content = self.creator.generate_post(meeting_notes=meeting_notes)
+        self._post(post_content, footer="Generated by Google Gemini")
+
+    def post_notes(
+        self,
+        notes: MeetingNotes,
+        renderer: NotesRenderer | None = None,
+    ):
+        """構造化された議事録から、LLMを呼び出さずにポストを作成して投稿する"""
+        post_content = (renderer or WorkingOutLoudNotesRenderer()).render(notes)
+        self._post(post_content, footer="Generated from meeting notes")
 
+    def _post(self, post_content: str, footer: str):
         payload = {
             "embeds": [
                 {
                     "description": post_content,
                     "title": "📝 Working Out Loud",
                     "color": 0x1ABC9C,
-                    "footer": {"text": "Generated by Google Gemini"},
+                    "footer": {"text": footer},
                 }
             ]
         }
@@ -53,21 +74,50 @@ class _GeminiPostCreator:
         self,
         api_key: str,
         post_process_prompt_provider: PostProcessPromptProvider,
+        ledger: CallLedger | None = None,
+        model: str = "gemini-2.0-flash",
     ):
         self.client = Client(api_key=api_key)
         self.prompt_provider = post_process_prompt_provider
+        self.ledger = ledger
+        self.model = model
 
     def generate_post(self, meeting_notes: str) -> str:
         prompt = self.prompt_provider.get_prompt(meeting_notes)
+        started = time.monotonic()
         try:
             response = self.client.models.generate_content(
-                model="gemini-2.0-flash", contents=prompt
+                model=self.model, contents=prompt
             )
-            content = response.text
-            if content is None:
-                raise RuntimeError("Google Gemini API の応答が無効です")
-            return content
         except Exception as e:
+            self._record(started, success=False)
             raise RuntimeError(
                 "Google Gemini API を用いたポスト作成に失敗しました"
             ) from e
+        self._record(started, response.usage_metadata)
+        content = response.text
+        if content is None:
+            raise RuntimeError("Google Gemini API の応答が無効です")
+        return content
+
+    def _record(
+        self,
+        started: float,
+        usage: GenerateContentResponseUsageMetadata | None = None,
+        success: bool = True,
+    ) -> None:
+        if self.ledger is None:
+            return
+        self.ledger.record(
+            LedgerEntry(
+                kind="llm",
+                provider=type(self).__name__,
+                model=self.model,
+                latency_seconds=time.monotonic() - started,
+                input_tokens=(usage.prompt_token_count or 0) if usage else 0,
+                output_tokens=(usage.candidates_token_count or 0) if usage else 0,
+                cached_tokens=(usage.cached_content_token_count or 0) if usage else 0,
+                success=success,
+                stage="post_process",
+            )
+        )
@@ -0,0 +1,136 @@
+import json
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from logging import getLogger
+from pathlib import Path
+from typing import IO
+
+from src.transcriber.transcriber import Segment
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class CheckpointState:
+    segments: list[Segment] = field(default_factory=list)
+    complete: bool = False
+
+    @property
+    def resume_offset(self) -> float:
+        return self.segments[-1].end if self.segments else 0.0
+
+
+class TranscriptionCheckpoint:
+    """
+    文字起こしのセグメントを音声ファイル横のJSONLに逐次追記する。
+    同じ音声・同じ文字起こしの設定で再実行した場合は、最後に保存したセグメントの終了位置から再開できる。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        audio_path: Path,
+        transcriber: object | None = None,
+        fsync_interval: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.audio_path = audio_path
+        self.transcriber = _describe_transcriber(transcriber)
+        self.fsync_interval = fsync_interval
+        self._file: IO[str] | None = None
+        self._last_fsync = 0.0
+
+    @classmethod
+    def for_audio(
+        cls, audio_path: Path, transcriber: object | None = None
+    ) -> "TranscriptionCheckpoint":
+        return cls(
+            audio_path.with_name(f"{audio_path.stem}.segments.jsonl"),
+            audio_path,
+            transcriber,
+        )
+
+    def load(self) -> CheckpointState:
+        if not self.path.is_file():
+            return CheckpointState()
+
+        state = CheckpointState()
+        with open(self.path, encoding="utf-8") as f:
+            for idx, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring truncated checkpoint line in {self.path}")
+                    break
+                if idx == 0:
+                    if record.get("audio") != self._fingerprint():
+                        logger.info(f"Checkpoint {self.path} is for different audio")
+                        return CheckpointState()
+                    if record.get("transcriber") != self.transcriber:
+                        logger.info(
+                            f"Checkpoint {self.path} is for a different transcriber"
+                        )
+                        return CheckpointState()
+                    continue
+                if record.get("complete"):
+                    state.complete = True
+                    break
+                state.segments.append(Segment(**record))
+        return state
+
+    @contextmanager
+    def open(self, state: CheckpointState) -> Iterator[None]:
+        """既存の内容を state の内容で書き直し、抜けるまで追記できる状態にする"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            self._file = f
+            try:
+                self._write(
+                    {"audio": self._fingerprint(), "transcriber": self.transcriber}
+                )
+                for segment in state.segments:
+                    self._write(asdict(segment))
+                self._fsync()
+                yield
+            finally:
+                self._fsync()
+                self._file = None
+
+    def append(self, segment: Segment) -> None:
+        self._write(asdict(segment))
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._fsync()
+
+    def complete(self) -> None:
+        self._write({"complete": True})
+
+    def _write(self, record: dict) -> None:
+        if self._file is None:
+            raise RuntimeError("Checkpoint is not open")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def _fsync(self) -> None:
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+            self._last_fsync = time.monotonic()
+
+    def _fingerprint(self) -> dict:
+        stat = self.audio_path.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _describe_transcriber(transcriber: object | None) -> dict[str, str] | None:
+    """チェックポイントを再利用してよいかを判断するための、文字起こしの実装とモデル"""
+    if transcriber is None:
+        return None
+    model = getattr(transcriber, "model", None) or getattr(
+        transcriber, "model_size", ""
+    )
+    compute_type = getattr(transcriber, "compute_type", None)
+    return {
+        "name": type(transcriber).__name__,
+        "model": f"{model}:{compute_type}" if compute_type else str(model),
+    }
@@ -1,15 +1,16 @@
 import asyncio
+import contextlib
+from collections.abc import AsyncGenerator
 from datetime import datetime
 from logging import getLogger
 from pathlib import Path
 
 import discord
 
+from src.summarizer.compaction import compact_transcript
 from src.summarizer.formatter.summary_formatter import SummaryFormatter
-from src.summarizer.prompt_provider.summarize_prompt_provider import (
-    ContextualSummarizePromptProvider,
-)
-from src.summarizer.summarizer import Summarizer
+from src.summarizer.rolling import RollingSummarizer
+from src.summarizer.summarizer import Summarizer, Summary
 from src.transcriber.transcriber import IterableTranscriber, Transcriber
 from src.ui.view_builder import ViewBuilder
 
@@ -18,6 +19,7 @@ from .common import create_path_builder, mix, save_all_audio
 from .context_provider import ContextProvider
 from .message_data import (
     CreateThreadData,
+    EditMessageData,
     SendData,
     SendThreadData,
 )
@@ -31,22 +33,31 @@ from .recording_handler import (
 
 logger = getLogger(__name__)
 
+# Discord の埋め込みの説明文に入る最大文字数
+EMBED_DESCRIPTION_LIMIT = 4096
+
 
 class MinuteRecordingHandler(RecordingHandler):
     def __init__(
         self,
         transcriber: Transcriber | IterableTranscriber,
         summarizer: Summarizer,
-        summarize_prompt_provider: ContextualSummarizePromptProvider,
         summary_formatter: SummaryFormatter,
         view_builder: ViewBuilder,
         context_provider: ContextProvider,
         dir: Path = Path("./data"),
+        summary_timeout: float = 600.0,
+        summary_edit_interval: float = 1.5,
+        compact_transcription: bool = True,
+        rolling_summarizer: RollingSummarizer | None = None,
     ):
         self.dir = dir
+        self.summary_timeout = summary_timeout
+        self.summary_edit_interval = summary_edit_interval
+        self.compact_transcription = compact_transcription
+        self.rolling_summarizer = rolling_summarizer
         self.transcriber = transcriber
         self.summarizer = summarizer
-        self.summarize_prompt_provider = summarize_prompt_provider
         self.summary_formatter = summary_formatter
         self.view_builder = view_builder
         self.context_provider = context_provider
@@ -114,13 +125,22 @@ class MinuteRecordingHandler(RecordingHandler):
             embed=discord.Embed(description="文字起こしを開始します。")
         )
 
+        rolling = self.rolling_summarizer
+        # ライブ文字起こしで録音中から受け取っている場合は、改めて渡さない
+        on_segment = (
+            (lambda segment: rolling.add(segment.text))
+            if rolling is not None and not rolling.fed
+            else None
+        )
         try:
             transcription_path = path_builder.transcription()
             async for message in save_transcription(
-                mixed_file_path, transcription_path, self.transcriber
+                mixed_file_path, transcription_path, self.transcriber, on_segment
             ):
                 yield message
         except Exception as e:
+            if rolling is not None:
+                rolling.close()
             yield SendThreadData(
                 embed=discord.Embed(description=f"文字起こしに失敗しました: {e}")
             )
@@ -128,14 +148,24 @@ class MinuteRecordingHandler(RecordingHandler):
 
         try:
             transcription = transcription_path.read_text(encoding="utf-8")
+            if rolling is not None and rolling.covers(transcription):
+                stream = rolling.stream_meeting_notes(self.summarizer, context)
+            else:
+                if rolling is not None:
+                    logger.info("Rolling summary does not match the transcription")
+                    rolling.close()
+                stream = self.summarizer.stream_meeting_notes(
+                    self._compact(transcription), context
+                )
             summary_path = path_builder.summary()
-            summary, messages = self._summarize_and_save(
-                summary_path,
-                transcription,
-                context,
-            )
-            async for message in messages:
+            async for message in self._summarize_and_save(summary_path, stream):
                 yield message
+            summary = summary_path.read_text(encoding="utf-8")
+        except TimeoutError:
+            yield SendThreadData(
+                content=f"要約が{self.summary_timeout:.0f}秒以内に完了しませんでした"
+            )
+            return
         except Exception as e:
             yield SendThreadData(content=f"要約に失敗しました: {e}")
             return
@@ -146,27 +176,62 @@ class MinuteRecordingHandler(RecordingHandler):
             self.view_builder,
         )
 
-    def _summarize_and_save(
+    def _compact(self, transcription: str) -> str:
+        if not self.compact_transcription:
+            return transcription
+        compaction = compact_transcript(transcription)
+        logger.info(
+            f"Compacted transcription: {compaction.original_tokens} -> "
+            f"{compaction.compacted_tokens} tokens "
+            f"({compaction.saved_tokens} saved)"
+        )
+        return compaction.text
+
+    async def _summarize_and_save(
         self,
         summary_path: Path,
-        transcription: str,
-        context: str,
-    ) -> tuple[str, AudioHandlerResult]:
-        self.summarize_prompt_provider.additional_context = context
-        summary_content = self.summarizer.generate_meeting_notes(transcription).content
-        with open(summary_path, "w", encoding="utf-8") as f:
-            f.write(summary_content)
-        embed = discord.Embed(
-            description=summary_content,
-            timestamp=datetime.now(),
-        )
+        stream: AsyncGenerator[Summary, None],
+    ) -> AudioHandlerResult:
+        """
+        生成途中の議事録で埋め込みを一定間隔ごとに更新し、完成したら保存する。
+        埋め込みの更新中はこの生成器の外で処理が進むため、制限時間は受信の待ち時間だけに同じ期限で掛ける。
+        """
+        yield SendThreadData(embed=discord.Embed(description="要約を生成しています…"))
 
-        async def message_iter():
-            yield SendThreadData(
-                embed=embed,
-            )
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.summary_timeout
+        last_edit = loop.time()
+        summary_content = ""
+        input_tokens = cached_tokens = output_tokens = 0
+        async with contextlib.aclosing(stream):
+            while True:
+                async with asyncio.timeout_at(deadline):
+                    summary = await anext(stream, None)
+                if summary is None:
+                    break
+                summary_content = summary.content
+                input_tokens = summary.input_token_count
+                cached_tokens = summary.cached_input_token_count
+                output_tokens = summary.output_token_count
+                if loop.time() - last_edit >= self.summary_edit_interval:
+                    last_edit = loop.time()
+                    yield EditMessageData(
+                        embed=discord.Embed(description=_truncate(summary_content))
+                    )
 
-        return summary_content, message_iter()
+        logger.info(
+            f"Summary tokens: input={input_tokens} (cached={cached_tokens}), "
+            f"output={output_tokens}"
+        )
+        await asyncio.to_thread(
+            summary_path.write_text, summary_content, encoding="utf-8"
+        )
+        yield EditMessageData(
+            embed=discord.Embed(
+                description=_truncate(summary_content),
+                timestamp=datetime.now(),
+            )
+        )
 
     def _create_final_send_data(
         self,
@@ -177,7 +242,7 @@ class MinuteRecordingHandler(RecordingHandler):
         now = datetime.now()
         embed = discord.Embed(
             title=now.strftime("%Y年%m月%d日"),
-            description=summary,
+            description=_truncate(summary),
             timestamp=now,
         )
         view = view_builder.create_view()
@@ -189,3 +254,10 @@ class MinuteRecordingHandler(RecordingHandler):
             embed=embed,
             view=view,
         )
+
+
+def _truncate(text: str) -> str:
+    """埋め込みに収まらない場合は末尾を省略する。全文は保存したファイルに残る"""
+    if len(text) <= EMBED_DESCRIPTION_LIMIT:
+        return text
+    return text[: EMBED_DESCRIPTION_LIMIT - 1] + "…"
@@ -1,23 +1,34 @@
+import asyncio
+import subprocess
 import time
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from logging import getLogger
 from pathlib import Path
 
 import discord
 
-from src.transcriber.transcriber import IterableTranscriber, Transcriber
+from src.transcriber.transcriber import IterableTranscriber, Segment, Transcriber
 
+from .checkpoint import TranscriptionCheckpoint
 from .message_data import EditMessageData, SendThreadData
 from .recording_handler import AudioHandlerResult
 
+logger = getLogger(__name__)
+
 
 async def save_transcription(
     mixed_file_path: Path,
     transcription_path: Path,
     transcriber: Transcriber | IterableTranscriber,
+    on_segment: Callable[[Segment], None] | None = None,
 ) -> AudioHandlerResult:
+    """on_segment は、セグメント単位で文字起こしできる場合に確定したセグメントごとに呼び出す"""
     if isinstance(transcriber, IterableTranscriber):
         lines, messages = _transcribe_iter(
             mixed_file_path,
             transcriber,
+            on_segment,
         )
         async for message in messages:
             yield message
@@ -53,25 +64,57 @@ def _transcribe_and_save(
 def _transcribe_iter(
     mixed_file_path: Path,
     transcriber: IterableTranscriber,
+    on_segment: Callable[[Segment], None] | None = None,
 ) -> tuple[list[str], AudioHandlerResult]:
-    segments = transcriber.transcribe_iter(str(mixed_file_path))
-    lines: list[str] = []
+    checkpoint = TranscriptionCheckpoint.for_audio(mixed_file_path, transcriber)
+    state = checkpoint.load()
+    offset = state.resume_offset
+    lines: list[str] = [segment.text for segment in state.segments]
 
     async def message_iter():
+        if on_segment is not None:
+            for segment in state.segments:
+                on_segment(segment)
         last_yield_time = time.monotonic()
-        last_segment = None
-
-        async for segment in segments:
-            lines.append(segment.text)
-            last_segment = segment
-            current_time = time.monotonic()
-
-            if current_time - last_yield_time >= 1.0:
-                embed = discord.Embed(description="文字起こしの一部が保存されました。")
-                embed.add_field(name="進捗", value=f"{segment.end:.2f} s")
-                embed.add_field(name="プレビュー", value=segment.text[:1024])
-                yield EditMessageData(embed=embed)
-                last_yield_time = current_time
+        last_segment = state.segments[-1] if state.segments else None
+
+        if state.complete:
+            logger.info(f"Reusing completed checkpoint: {checkpoint.path}")
+        else:
+            if offset > 0:
+                logger.info(f"Resuming transcription from {offset:.2f} s")
+                yield EditMessageData(
+                    embed=discord.Embed(
+                        description=f"前回の文字起こしを {offset:.2f} s から再開します。"
+                    )
+                )
+
+            with checkpoint.open(state):
+                async with _audio_from(mixed_file_path, offset) as audio_path:
+                    async for segment in transcriber.transcribe_iter(str(audio_path)):
+                        segment = Segment(
+                            start=segment.start + offset,
+                            end=segment.end + offset,
+                            text=segment.text,
+                        )
+                        checkpoint.append(segment)
+                        lines.append(segment.text)
+                        if on_segment is not None:
+                            on_segment(segment)
+                        last_segment = segment
+                        current_time = time.monotonic()
+
+                        if current_time - last_yield_time >= 1.0:
+                            embed = discord.Embed(
+                                description="文字起こしの一部が保存されました。"
+                            )
+                            embed.add_field(name="進捗", value=f"{segment.end:.2f} s")
+                            embed.add_field(
+                                name="プレビュー", value=segment.text[:1024]
+                            )
+                            yield EditMessageData(embed=embed)
+                            last_yield_time = current_time
+                checkpoint.complete()
 
         if last_segment:
             embed = discord.Embed(description="文字起こしが完了しました。")
@@ -80,3 +123,33 @@ def _transcribe_iter(
             yield EditMessageData(embed=embed)
 
     return lines, message_iter()
+
+
+@asynccontextmanager
+async def _audio_from(audio_path: Path, offset: float):
+    """offset 秒以降の音声を一時ファイルに切り出す。offset が0なら元のファイルをそのまま使う"""
+    if offset <= 0:
+        yield audio_path
+        return
+
+    trimmed_path = audio_path.with_name(f"{audio_path.stem}.resume.wav")
+    command = [
+        "ffmpeg",
+        "-y",
+        "-ss",
+        f"{offset:.3f}",
+        "-i",
+        str(audio_path),
+        "-ac",
+        "1",
+        "-ar",
+        "16000",
+        str(trimmed_path),
+    ]
+    await asyncio.to_thread(
+        subprocess.run, command, check=True, capture_output=True, text=True
+    )
+    try:
+        yield trimmed_path
+    finally:
+        trimmed_path.unlink(missing_ok=True)
@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import json
+from collections.abc import AsyncGenerator
+from logging import getLogger
+from pathlib import Path
+
+from src.cache.json_file_cache import JsonFileCache
+
+from .summarizer import PromptedSummarizer, Summary
+
+logger = getLogger(__name__)
+
+
+class CachingSummarizer(PromptedSummarizer):
+    """
+    LLM呼び出しの結果を、プロバイダー・モデル・システムプロンプト・プロンプトをキーにディスクへ保存する。
+    プロンプトには文字起こしが含まれるため、同じ文字起こしを同じ条件で要約し直すと即座に結果を返す。
+    キャッシュから返した結果はトークンを消費しないため、トークン数は0になる。
+    非同期の呼び出しでは、ファイルの読み書きと削除をイベントループの外で行う。
+    """
+
+    def __init__(
+        self,
+        summarizer: PromptedSummarizer,
+        dir: Path = Path("./data/cache/summary"),
+        max_bytes: int | None = None,
+        max_entries: int | None = None,
+        max_age_seconds: float | None = None,
+    ):
+        self.summarizer = summarizer
+        self.summarize_prompt_provider = summarizer.summarize_prompt_provider
+        self._cache = JsonFileCache(
+            dir,
+            max_bytes=max_bytes,
+            max_entries=max_entries,
+            max_age_seconds=max_age_seconds,
+        )
+
+    @property
+    def model(self) -> str:
+        return self.summarizer.model
+
+    @property
+    def provider(self) -> str:
+        return type(self.summarizer).__name__
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def complete(self, system_prompt: str, prompt: str) -> Summary:
+        key = self._key(system_prompt, prompt)
+        if (cached := self._get(key)) is not None:
+            return cached
+        summary = self.summarizer.complete(system_prompt, prompt)
+        self._set(key, summary.content)
+        return summary
+
+    async def complete_async(self, system_prompt: str, prompt: str) -> Summary:
+        key = self._key(system_prompt, prompt)
+        if (cached := await asyncio.to_thread(self._get, key)) is not None:
+            return cached
+        summary = await self.summarizer.complete_async(system_prompt, prompt)
+        await asyncio.to_thread(self._set, key, summary.content)
+        return summary
+
+    async def stream_async(
+        self, system_prompt: str, prompt: str
+    ) -> AsyncGenerator[Summary, None]:
+        key = self._key(system_prompt, prompt)
+        if (cached := await asyncio.to_thread(self._get, key)) is not None:
+            yield cached
+            return
+
+        last: Summary | None = None
+        async for summary in self.summarizer.stream_async(system_prompt, prompt):
+            last = summary
+            yield summary
+        if last is not None:
+            await asyncio.to_thread(self._set, key, last.content)
+
+    def _get(self, key: str) -> Summary | None:
+        content = self._cache.get(key)
+        logger.info(
+            f"Summary cache {'hit' if content is not None else 'miss'} "
+            f"(hits={self.hits}, misses={self.misses})"
+        )
+        if content is None:
+            return None
+        return Summary(content=content, input_token_count=0, output_token_count=0)
+
+    def _set(self, key: str, content: str) -> None:
+        # 保存に失敗しても、生成できた要約は返す
+        try:
+            self._cache.set(key, content)
+        except OSError as e:
+            logger.warning(f"Failed to write summary cache: {e}")
+
+    def _key(self, system_prompt: str, prompt: str) -> str:
+        payload = json.dumps(
+            [self.provider, self.model, system_prompt, prompt], ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
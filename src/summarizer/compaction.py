@@ -0,0 +1,86 @@
+import re
+from dataclasses import dataclass
+
+from .token_estimator import estimate_tokens
+
+_FILLERS = re.compile(
+    r"(?:(?<=^)|(?<=[\s、。,.!?！？]))"
+    r"(?:え[ーっ]*と+|えー+|あー+|あの[ーぅ]+|うー*ん+|んー+|まあ+|uh+|um+|er+m*)"
+    r"(?=$|[\s、。,.!?！？])[\s、,]*",
+    re.IGNORECASE,
+)
+_SEPARATOR = r"[\s、。，,．.！!？?]"
+# 区切り文字で囲まれた同じ語句が3回以上続く箇所（Whisperの幻聴ループなど）。
+# 数字・英字・URLなどASCIIを含む語句は、IDや金額を壊さないよう対象にしない
+_REPEATS = re.compile(
+    rf"(?:(?<=^)|(?<={_SEPARATOR}))"
+    r"([^\x00-\x7f\s\d、。，．！？]{3,30}?)"
+    rf"(?:{_SEPARATOR}*\1){{2,}}"
+    rf"(?=$|{_SEPARATOR})"
+)
+# 「[00:01:23] 話者: 発言」の形式の行
+_SPEAKER_LINE = re.compile(r"^(\[[^\]]+\]\s*([^:：]{1,40}?)\s*[:：])\s*(.*)$")
+_SPACES = re.compile(r"\s+")
+
+
+@dataclass
+class CompactionResult:
+    text: str
+    original_tokens: int
+    compacted_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.compacted_tokens
+
+
+def compact_transcript(
+    transcription: str,
+    window: int = 3,
+    max_line_chars: int = 200,
+) -> CompactionResult:
+    """
+    要約に渡す前に文字起こしを圧縮する。元の文字起こしは変更しない。
+    フィラーと繰り返しを取り除き、直近 window 行と同じ行を捨て、短い行を max_line_chars 文字まで連結する。
+    「[時刻] 話者: 発言」の形式の行は、発言部分だけを圧縮し、同じ話者が続く行だけを連結する。
+    """
+    lines: list[tuple[str | None, str, str]] = []
+    for raw in transcription.splitlines():
+        speaker, header, body = _split_speaker(raw)
+        body = _compact_line(body)
+        if not body or any((speaker, body) == (s, b) for s, _, b in lines[-window:]):
+            continue
+        lines.append((speaker, header, body))
+
+    merged: list[tuple[str | None, str]] = []
+    for speaker, header, body in lines:
+        if (
+            merged
+            and merged[-1][0] == speaker
+            and len(merged[-1][1]) + len(body) < max_line_chars
+        ):
+            merged[-1] = (speaker, f"{merged[-1][1]} {body}")
+        else:
+            merged.append((speaker, f"{header} {body}" if header else body))
+
+    text = "\n".join(line for _, line in merged)
+    return CompactionResult(
+        text=text,
+        original_tokens=estimate_tokens(transcription),
+        compacted_tokens=estimate_tokens(text),
+    )
+
+
+def _split_speaker(line: str) -> tuple[str | None, str, str]:
+    """話者・見出し（時刻と話者）・発言に分ける。話者のない行は (None, "", 行) を返す"""
+    match = _SPEAKER_LINE.match(line)
+    if match is None:
+        return None, "", line
+    header, speaker, body = match.groups()
+    return speaker, header, body
+
+
+def _compact_line(line: str) -> str:
+    line = _FILLERS.sub("", line)
+    line = _REPEATS.sub(r"\1", line)
+    return _SPACES.sub(" ", line).strip(" 、,")
@@ -0,0 +1,235 @@
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from logging import getLogger
+from typing import Literal, TypeVar
+
+from src.ledger.context import current_attempt
+
+from .summarizer import PromptedSummarizer, Summary
+
+logger = getLogger(__name__)
+
+SummarizerPolicy = Literal["primary", "fallback", "hedge"]
+SUMMARIZER_POLICIES: tuple[SummarizerPolicy, ...] = ("primary", "fallback", "hedge")
+
+T = TypeVar("T")
+
+
+class ProviderStats:
+    """直近の応答時間と失敗回数。ヘッジの待ち時間と、呼び出す順番の判断に使う"""
+
+    def __init__(self, window: int = 50):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.successes = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.last_error_at: float | None = None
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.successes += 1
+        self.consecutive_errors = 0
+
+    def record_error(self) -> None:
+        self.errors += 1
+        self.consecutive_errors += 1
+        self.last_error_at = time.monotonic()
+
+    def p95(self, min_samples: int = 5) -> float | None:
+        if len(self.latencies) < min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[math.ceil(len(ordered) * 0.95) - 1]
+
+
+class CompositeSummarizer(PromptedSummarizer):
+    """
+    複数のプロバイダーの議事録作成クラスを、ポリシーに従って使い分ける。
+
+    - primary: 先頭のプロバイダーだけを使う
+    - fallback: fallback_timeout 秒以内に応答しないか失敗したら、次のプロバイダーに切り替える
+    - hedge: 応答時間のp95を過ぎても応答がなければ次のプロバイダーにも同時に依頼し、先に返った方を使う
+
+    fallback と hedge では、連続して max_consecutive_errors 回失敗したプロバイダーを
+    demotion_seconds 秒の間だけ後回しにし、その後は元の順番で試し直す。
+    ストリーミングでは最初のチャンクが届くまでの時間で判断し、届いた後は切り替えない。
+    同期版の complete はスレッドを使わず、失敗時に次のプロバイダーを順に試すだけにする。
+    """
+
+    def __init__(
+        self,
+        summarizers: list[PromptedSummarizer],
+        policy: SummarizerPolicy = "primary",
+        fallback_timeout: float = 120.0,
+        initial_hedge_delay: float = 30.0,
+        min_hedge_delay: float = 1.0,
+        max_consecutive_errors: int = 3,
+        demotion_seconds: float = 300.0,
+    ):
+        if not summarizers:
+            raise ValueError("summarizers を1つ以上指定してください")
+        if policy not in SUMMARIZER_POLICIES:
+            raise ValueError(f"未対応のポリシーです: {policy}")
+        self.summarizers = summarizers
+        self.summarize_prompt_provider = summarizers[0].summarize_prompt_provider
+        self.policy = policy
+        self.fallback_timeout = fallback_timeout
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_consecutive_errors = max_consecutive_errors
+        self.demotion_seconds = demotion_seconds
+        self.stats = {id(s): ProviderStats() for s in summarizers}
+        self.first_chunk_stats = {id(s): ProviderStats() for s in summarizers}
+
+    @property
+    def model(self) -> str:
+        return "+".join(summarizer.model for summarizer in self.summarizers)
+
+    def complete(self, system_prompt: str, prompt: str) -> Summary:
+        errors: list[Exception] = []
+        for attempt, summarizer in enumerate(self._ranked(self.stats)):
+            stats = self.stats[id(summarizer)]
+            started = time.monotonic()
+            token = current_attempt.set(attempt)
+            try:
+                summary = summarizer.complete(system_prompt, prompt)
+            except Exception as e:
+                # どの種類の失敗でも次のプロバイダーで試し直すため、原因は追跡情報ごと残す
+                logger.exception(f"{type(summarizer).__name__} failed")
+                stats.record_error()
+                errors.append(e)
+                continue
+            finally:
+                current_attempt.reset(token)
+            stats.record_success(time.monotonic() - started)
+            return summary
+        raise errors[-1]
+
+    async def complete_async(self, system_prompt: str, prompt: str) -> Summary:
+        return await self._race(
+            self.stats,
+            lambda summarizer: summarizer.complete_async(system_prompt, prompt),
+        )
+
+    async def stream_async(
+        self, system_prompt: str, prompt: str
+    ) -> AsyncGenerator[Summary, None]:
+        async def first_chunk(
+            summarizer: PromptedSummarizer,
+        ) -> tuple[AsyncGenerator[Summary, None], Summary]:
+            stream = summarizer.stream_async(system_prompt, prompt)
+            try:
+                return stream, await anext(stream)
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        stream, first = await self._race(self.first_chunk_stats, first_chunk)
+        try:
+            yield first
+            async for summary in stream:
+                yield summary
+        finally:
+            await stream.aclose()
+
+    async def _race(
+        self,
+        stats: dict[int, ProviderStats],
+        start: Callable[[PromptedSummarizer], Awaitable[T]],
+    ) -> T:
+        """ポリシーに従ってプロバイダーを順に起動し、最初に成功した結果を返す"""
+        ranked = self._ranked(stats)
+        if self.policy == "primary":
+            ranked = ranked[:1]
+
+        running: dict[asyncio.Task[T], PromptedSummarizer] = {}
+        errors: list[BaseException] = []
+        try:
+            for index, summarizer in enumerate(ranked):
+                task = asyncio.create_task(
+                    self._timed(stats, summarizer, start, attempt=index)
+                )
+                running[task] = summarizer
+                is_last = index == len(ranked) - 1
+                deadline = time.monotonic() + self._launch_delay(stats, summarizer)
+
+                while running:
+                    timeout = None if is_last else deadline - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    done, _ = await asyncio.wait(
+                        running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        break
+                    for task in done:
+                        failed = running.pop(task)
+                        if (error := task.exception()) is None:
+                            return task.result()
+                        self._log_failure(failed, error)
+                        errors.append(error)
+
+                if self.policy == "fallback":
+                    for task, timed_out in running.items():
+                        logger.warning(
+                            f"{type(timed_out).__name__} did not respond within "
+                            f"{self.fallback_timeout:.0f}s, falling back"
+                        )
+                        stats[id(timed_out)].record_error()
+                        task.cancel()
+                    running.clear()
+                elif running:
+                    logger.info(f"Hedging with {type(ranked[index + 1]).__name__}")
+        finally:
+            for task in running:
+                task.cancel()
+        raise errors[-1] if errors else RuntimeError("要約を生成できませんでした")
+
+    async def _timed(
+        self,
+        stats: dict[int, ProviderStats],
+        summarizer: PromptedSummarizer,
+        start: Callable[[PromptedSummarizer], Awaitable[T]],
+        attempt: int = 0,
+    ) -> T:
+        # タスクごとにコンテキストが複製されるため、他の試行には影響しない
+        current_attempt.set(attempt)
+        started = time.monotonic()
+        try:
+            result = await start(summarizer)
+        except Exception:
+            stats[id(summarizer)].record_error()
+            raise
+        stats[id(summarizer)].record_success(time.monotonic() - started)
+        return result
+
+    def _launch_delay(
+        self, stats: dict[int, ProviderStats], summarizer: PromptedSummarizer
+    ) -> float:
+        """次のプロバイダーを起動するまでの待ち時間"""
+        if self.policy == "fallback":
+            return self.fallback_timeout
+        p95 = stats[id(summarizer)].p95()
+        if p95 is None:
+            return self.initial_hedge_delay
+        return max(self.min_hedge_delay, p95)
+
+    def _ranked(self, stats: dict[int, ProviderStats]) -> list[PromptedSummarizer]:
+        if self.policy == "primary":
+            return list(self.summarizers)
+        return sorted(self.summarizers, key=lambda s: self._demoted(stats[id(s)]))
+
+    def _demoted(self, stats: ProviderStats) -> bool:
+        return (
+            stats.consecutive_errors >= self.max_consecutive_errors
+            and stats.last_error_at is not None
+            and time.monotonic() - stats.last_error_at < self.demotion_seconds
+        )
+
+    def _log_failure(
+        self, summarizer: PromptedSummarizer, error: BaseException
+    ) -> None:
+        logger.warning(f"{type(summarizer).__name__} failed: {error}")
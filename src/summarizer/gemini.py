@@ -1,11 +1,17 @@
+from collections.abc import AsyncGenerator
+
 from google.genai import Client
-from google.genai.types import GenerateContentConfig
+from google.genai.types import (
+    GenerateContentConfig,
+    GenerateContentResponse,
+    GenerateContentResponseUsageMetadata,
+)
 
 from .prompt_provider.summarize_prompt_provider import SummarizePromptProvider
-from .summarizer import Summarizer, Summary
+from .summarizer import PromptedSummarizer, Summary
 
 
-class GeminiSummarizer(Summarizer):
+class GeminiSummarizer(PromptedSummarizer):
     """Google Gemini API を利用して議事録を生成するクラス"""
 
     def __init__(
@@ -18,25 +24,58 @@ class GeminiSummarizer(Summarizer):
         self.summarize_prompt_provider = summarize_prompt_provider
         self.model = model
 
-    def generate_meeting_notes(self, transcription: str) -> Summary:
+    def complete(self, system_prompt: str, prompt: str) -> Summary:
         response = self.client.models.generate_content(
             model=self.model,
-            contents=self.summarize_prompt_provider.get_prompt(transcription),
-            config=GenerateContentConfig(
-                system_instruction=self.summarize_prompt_provider.get_system_prompt()
-            ),
+            contents=prompt,
+            config=GenerateContentConfig(system_instruction=system_prompt),
+        )
+        return self._to_summary(response)
+
+    async def complete_async(self, system_prompt: str, prompt: str) -> Summary:
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=GenerateContentConfig(system_instruction=system_prompt),
         )
+        return self._to_summary(response)
+
+    async def stream_async(
+        self, system_prompt: str, prompt: str
+    ) -> AsyncGenerator[Summary, None]:
+        stream = await self.client.aio.models.generate_content_stream(
+            model=self.model,
+            contents=prompt,
+            config=GenerateContentConfig(system_instruction=system_prompt),
+        )
+        content = ""
+        usage: GenerateContentResponseUsageMetadata | None = None
+        async for chunk in stream:
+            if chunk.usage_metadata is not None:
+                usage = chunk.usage_metadata
+            if chunk.text:
+                content += chunk.text
+                yield Summary(
+                    content=content, input_token_count=0, output_token_count=0
+                )
+        if not content:
+            raise RuntimeError("コンテンツが返されませんでした")
+        yield self._with_usage(content, usage)
+
+    def _to_summary(self, response: GenerateContentResponse) -> Summary:
         content = response.text
         if content is None:
             raise RuntimeError("コンテンツが返されませんでした")
+        return self._with_usage(content, response.usage_metadata)
 
-        usage = response.usage_metadata
-
-        input_token_count = usage.prompt_token_count if usage is not None else None
-        output_token_count = usage.candidates_token_count if usage is not None else None
-
+    def _with_usage(
+        self, content: str, usage: GenerateContentResponseUsageMetadata | None
+    ) -> Summary:
+        if usage is None:
+            return Summary(content=content, input_token_count=0, output_token_count=0)
         return Summary(
             content=content,
-            input_token_count=input_token_count or 0,
-            output_token_count=output_token_count or 0,
+            input_token_count=usage.prompt_token_count or 0,
+            output_token_count=usage.candidates_token_count or 0,
+            cached_input_token_count=usage.cached_content_token_count or 0,
         )
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from collections.abc import AsyncGenerator
+from logging import getLogger
+
+from src.ledger.call_ledger import CallLedger, LedgerEntry
+from src.ledger.context import current_stage
+
+from .summarizer import PromptedSummarizer, Summary
+from .token_estimator import context_window, estimate_tokens
+
+logger = getLogger(__name__)
+
+
+class LedgerSummarizer(PromptedSummarizer):
+    """
+    プロバイダーの議事録作成クラスへの呼び出しを、トークン数と応答時間とともに台帳へ記録する。
+    送信前にプロンプトのトークン数を概算し、モデルの入力上限を超えそうな場合は警告する。
+    処理名が設定されていない呼び出しは default_stage として記録する。
+    ヘッジで取り消された呼び出しや、途中で閉じられたストリーミングも失敗として記録する。
+    """
+
+    def __init__(
+        self,
+        summarizer: PromptedSummarizer,
+        ledger: CallLedger,
+        default_stage: str = "summary",
+    ):
+        self.summarizer = summarizer
+        self.summarize_prompt_provider = summarizer.summarize_prompt_provider
+        self.ledger = ledger
+        self.default_stage = default_stage
+
+    @property
+    def model(self) -> str:
+        return self.summarizer.model
+
+    def complete(self, system_prompt: str, prompt: str) -> Summary:
+        self._check_prompt(system_prompt, prompt)
+        started = time.monotonic()
+        summary: Summary | None = None
+        try:
+            summary = self.summarizer.complete(system_prompt, prompt)
+            return summary
+        finally:
+            self._record(started, summary, success=summary is not None)
+
+    async def complete_async(self, system_prompt: str, prompt: str) -> Summary:
+        self._check_prompt(system_prompt, prompt)
+        started = time.monotonic()
+        summary: Summary | None = None
+        try:
+            summary = await self.summarizer.complete_async(system_prompt, prompt)
+            return summary
+        finally:
+            self._record(started, summary, success=summary is not None)
+
+    async def stream_async(
+        self, system_prompt: str, prompt: str
+    ) -> AsyncGenerator[Summary, None]:
+        self._check_prompt(system_prompt, prompt)
+        started = time.monotonic()
+        last: Summary | None = None
+        finished = False
+        try:
+            async for summary in self.summarizer.stream_async(system_prompt, prompt):
+                last = summary
+                yield summary
+            finished = True
+        finally:
+            self._record(started, last, success=finished)
+
+    def _check_prompt(self, system_prompt: str, prompt: str) -> None:
+        window = context_window(self.model)
+        tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt)
+        if window is not None and tokens > window:
+            logger.warning(
+                f"Prompt of about {tokens} tokens exceeds the {window} token "
+                f"context window of {self.model}"
+            )
+
+    def _record(self, started: float, summary: Summary | None, success: bool) -> None:
+        entry = LedgerEntry(
+            kind="llm",
+            provider=type(self.summarizer).__name__,
+            model=self.model,
+            latency_seconds=time.monotonic() - started,
+            input_tokens=summary.input_token_count if summary else 0,
+            output_tokens=summary.output_token_count if summary else 0,
+            cached_tokens=summary.cached_input_token_count if summary else 0,
+            success=success,
+            stage=current_stage.get() or self.default_stage,
+        )
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.ledger.record(entry)
+            return
+        # イベントループ上では sqlite への書き込みを待たず、別スレッドで記録する
+        loop.run_in_executor(None, self.ledger.record, entry)
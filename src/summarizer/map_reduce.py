@@ -0,0 +1,199 @@
+import asyncio
+import contextvars
+from collections.abc import AsyncGenerator
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+
+from src.ledger.context import current_stage, ledger_context
+
+from .summarizer import PromptedSummarizer, Summarizer, Summary
+from .token_estimator import context_window, estimate_tokens, split_by_tokens
+
+logger = getLogger(__name__)
+
+MAP_SYSTEM_PROMPT = "あなたは優秀な議事録作成者です。長い会議の文字起こしの一部が与えられます。後で全体の議事録にまとめるためのメモを作成してください。メモ以外の内容は出力しないこと。"
+
+MAP_PROMPT = """以下は会議の文字起こしの {index}/{total} 番目の部分です。
+話題ごとに、議論の内容・決まったこと・決まらなかったこと・担当者や期限を箇条書きで簡潔にまとめてください。
+固有名詞や数値は省略せずに残してください。
+
+【文字起こし】
+{text}
+"""
+
+REDUCE_INPUT = "以下は長い会議を分割して作成したメモです。これらを会議全体の文字起こしとして扱ってください。\n\n{notes}"
+
+
+class MapReduceSummarizer(Summarizer):
+    """
+    長い文字起こしをトークン数で分割して並列に要約し、そのメモから最終的な議事録を作る。
+    メモをまとめても上限を超える場合は、収まるまでメモ同士の要約を繰り返す。
+    短い文字起こしはそのまま1回の呼び出しで要約する。
+    chunk_tokens がモデルの入力上限より大きい場合は、入力上限の半分を区切りの大きさとする。
+    メモ同士の要約は max_rounds 回まで、かつメモの合計が縮む間だけ繰り返す。
+    """
+
+    def __init__(
+        self,
+        summarizer: PromptedSummarizer,
+        chunk_tokens: int = 8000,
+        max_parallel: int = 4,
+        max_rounds: int = 3,
+    ):
+        if chunk_tokens < 1:
+            raise ValueError("chunk_tokens は1以上を指定してください")
+        if max_parallel < 1:
+            raise ValueError("max_parallel は1以上を指定してください")
+        if max_rounds < 1:
+            raise ValueError("max_rounds は1以上を指定してください")
+        self.summarizer = summarizer
+        self.chunk_tokens = chunk_tokens
+        self.max_parallel = max_parallel
+        self.max_rounds = max_rounds
+
+    @property
+    def model(self) -> str:
+        return self.summarizer.model
+
+    @property
+    def max_tokens(self) -> int:
+        """1回の呼び出しに渡す文字起こしの上限"""
+        window = context_window(self.model)
+        if window is None:
+            return self.chunk_tokens
+        return min(self.chunk_tokens, window // 2)
+
+    def generate_meeting_notes(
+        self, transcription: str, context: str | None = None
+    ) -> Summary:
+        if estimate_tokens(transcription) <= self.max_tokens:
+            return self.summarizer.generate_meeting_notes(transcription, context)
+
+        usage = Summary(content="", input_token_count=0, output_token_count=0)
+        notes = [transcription]
+        tokens = estimate_tokens(transcription)
+        # ワーカースレッドにはギルドなどの記帳用のコンテキストが引き継がれないため、明示的に渡す
+        with ledger_context(stage="map"):
+            ledger = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            for round_ in range(self.max_rounds):
+                chunks = split_by_tokens("\n\n".join(notes), self.max_tokens)
+                logger.info(f"Summarizing {len(chunks)} chunks")
+                partials = list(
+                    executor.map(
+                        lambda args: ledger.copy().run(
+                            self.summarizer.complete,
+                            MAP_SYSTEM_PROMPT,
+                            self._map_prompt(*args),
+                        ),
+                        [(i, len(chunks), chunk) for i, chunk in enumerate(chunks)],
+                    )
+                )
+                notes = self._collect(partials, usage)
+                tokens, done = self._reduced(notes, tokens, len(chunks), round_)
+                if done:
+                    break
+
+        final = self.summarizer.generate_meeting_notes(
+            REDUCE_INPUT.format(notes="\n\n".join(notes)), context
+        )
+        return self._add_usage(final, usage)
+
+    async def generate_meeting_notes_async(
+        self, transcription: str, context: str | None = None
+    ) -> Summary:
+        if estimate_tokens(transcription) <= self.max_tokens:
+            return await self.summarizer.generate_meeting_notes_async(
+                transcription, context
+            )
+
+        usage = Summary(content="", input_token_count=0, output_token_count=0)
+        notes = await self._map(transcription, usage)
+        final = await self.summarizer.generate_meeting_notes_async(
+            REDUCE_INPUT.format(notes="\n\n".join(notes)), context
+        )
+        return self._add_usage(final, usage)
+
+    async def stream_meeting_notes(
+        self, transcription: str, context: str | None = None
+    ) -> AsyncGenerator[Summary, None]:
+        """分割した部分の要約は一括で行い、最後の議事録の生成だけをストリーミングする"""
+        if estimate_tokens(transcription) <= self.max_tokens:
+            async for summary in self.summarizer.stream_meeting_notes(
+                transcription, context
+            ):
+                yield summary
+            return
+
+        usage = Summary(content="", input_token_count=0, output_token_count=0)
+        notes = await self._map(transcription, usage)
+        # 最後の1件にだけ分割要約のトークン数を足すため、1件遅らせて返す
+        last: Summary | None = None
+        async for summary in self.summarizer.stream_meeting_notes(
+            REDUCE_INPUT.format(notes="\n\n".join(notes)), context
+        ):
+            if last is not None:
+                yield last
+            last = summary
+        if last is not None:
+            yield self._add_usage(last, usage)
+
+    async def _map(self, transcription: str, usage: Summary) -> list[str]:
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        async def summarize_chunk(index: int, total: int, chunk: str) -> Summary:
+            current_stage.set("map")
+            async with semaphore:
+                return await self.summarizer.complete_async(
+                    MAP_SYSTEM_PROMPT, self._map_prompt(index, total, chunk)
+                )
+
+        notes = [transcription]
+        tokens = estimate_tokens(transcription)
+        for round_ in range(self.max_rounds):
+            chunks = split_by_tokens("\n\n".join(notes), self.max_tokens)
+            logger.info(f"Summarizing {len(chunks)} chunks")
+            partials = await asyncio.gather(
+                *(
+                    summarize_chunk(i, len(chunks), chunk)
+                    for i, chunk in enumerate(chunks)
+                )
+            )
+            notes = self._collect(partials, usage)
+            tokens, done = self._reduced(notes, tokens, len(chunks), round_)
+            if done:
+                break
+        return notes
+
+    def _reduced(
+        self, notes: list[str], previous: int, chunks: int, round_: int
+    ) -> tuple[int, bool]:
+        """メモの合計トークン数と、メモ同士の要約をやめるかどうかを返す"""
+        tokens = estimate_tokens("\n\n".join(notes))
+        if tokens <= self.max_tokens or chunks == 1:
+            return tokens, True
+        if tokens >= previous:
+            logger.warning(f"Notes did not shrink ({previous} -> {tokens} tokens)")
+            return tokens, True
+        if round_ + 1 == self.max_rounds:
+            logger.warning(f"Notes still exceed {self.max_tokens} tokens")
+        return tokens, False
+
+    def _map_prompt(self, index: int, total: int, text: str) -> str:
+        return MAP_PROMPT.format(index=index + 1, total=total, text=text)
+
+    def _collect(self, partials: list[Summary], usage: Summary) -> list[str]:
+        for partial in partials:
+            usage.input_token_count += partial.input_token_count
+            usage.output_token_count += partial.output_token_count
+            usage.cached_input_token_count += partial.cached_input_token_count
+        return [partial.content for partial in partials]
+
+    def _add_usage(self, final: Summary, usage: Summary) -> Summary:
+        return Summary(
+            content=final.content,
+            input_token_count=final.input_token_count + usage.input_token_count,
+            output_token_count=final.output_token_count + usage.output_token_count,
+            cached_input_token_count=final.cached_input_token_count
+            + usage.cached_input_token_count,
+        )
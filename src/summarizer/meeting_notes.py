@@ -0,0 +1,41 @@
+import json
+import re
+
+from pydantic import BaseModel, Field, ValidationError
+
+# モデルがJSONをコードブロックで囲んで返した場合に中身だけを取り出す
+_CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*\n(.*)\n\s*```\s*$", re.DOTALL)
+
+
+class AgendaItem(BaseModel):
+    title: str = Field(description="議題の見出し")
+    points: list[str] = Field(default_factory=list, description="話し合った内容の要点")
+
+
+class MeetingNotes(BaseModel):
+    """1回のLLM呼び出しで生成し、各フォーマットへはローカルで描画する議事録"""
+
+    date: str = Field(default="", description="会議の日時")
+    attendees: list[str] = Field(
+        default_factory=list, description="参加者。省略せずすべて記載する"
+    )
+    tldr: list[str] = Field(default_factory=list, description="会議全体の簡潔な要約")
+    progress: list[str] = Field(default_factory=list, description="報告された進捗")
+    agenda: list[AgendaItem] = Field(default_factory=list, description="議題")
+    decisions: list[str] = Field(default_factory=list, description="決まったこと")
+    open_items: list[str] = Field(
+        default_factory=list, description="決まらなかったこと・持ち越した課題"
+    )
+
+
+def meeting_notes_schema() -> str:
+    return json.dumps(MeetingNotes.model_json_schema(), ensure_ascii=False)
+
+
+def parse_meeting_notes(content: str) -> MeetingNotes:
+    if match := _CODE_FENCE.match(content):
+        content = match.group(1)
+    try:
+        return MeetingNotes.model_validate_json(content)
+    except ValidationError as e:
+        raise RuntimeError("構造化された議事録を解析できませんでした") from e
@@ -1,10 +1,14 @@
-from openai import OpenAI
+from collections.abc import AsyncGenerator
+
+from openai import AsyncOpenAI, OpenAI
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionMessageParam
 
 from .prompt_provider.summarize_prompt_provider import SummarizePromptProvider
-from .summarizer import Summarizer, Summary
+from .summarizer import PromptedSummarizer, Summary
 
 
-class OpenAISummarizer(Summarizer):
+class OpenAISummarizer(PromptedSummarizer):
     """OpenAI API を利用して議事録を生成するクラス"""
 
     def __init__(
@@ -14,34 +18,68 @@ class OpenAISummarizer(Summarizer):
         model: str = "gpt-4.1-nano",
     ):
         self.client = OpenAI(api_key=api_key)
+        self.async_client = AsyncOpenAI(api_key=api_key)
         self.model = model
         self.summarize_prompt_provider = summarize_prompt_provider
 
-    def generate_meeting_notes(self, transcription: str) -> Summary:
+    def complete(self, system_prompt: str, prompt: str) -> Summary:
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": self.summarize_prompt_provider.get_system_prompt(),
-                },
-                {
-                    "role": "user",
-                    "content": self.summarize_prompt_provider.get_prompt(transcription),
-                },
-            ],
+            messages=self._messages(system_prompt, prompt),
         )
-        content = response.choices[0].message.content
-        if content is None:
+        return self._to_summary(response)
+
+    async def complete_async(self, system_prompt: str, prompt: str) -> Summary:
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(system_prompt, prompt),
+        )
+        return self._to_summary(response)
+
+    async def stream_async(
+        self, system_prompt: str, prompt: str
+    ) -> AsyncGenerator[Summary, None]:
+        stream = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(system_prompt, prompt),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        content = ""
+        usage: CompletionUsage | None = None
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.choices and (delta := chunk.choices[0].delta.content):
+                content += delta
+                yield Summary(
+                    content=content, input_token_count=0, output_token_count=0
+                )
+        if not content:
             raise RuntimeError("コンテンツが返されませんでした")
+        yield self._with_usage(content, usage)
 
-        usage = response.usage
+    def _messages(
+        self, system_prompt: str, prompt: str
+    ) -> list[ChatCompletionMessageParam]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ]
 
-        input_token_count = usage.prompt_tokens if usage is not None else None
-        output_token_count = usage.completion_tokens if usage is not None else None
+    def _to_summary(self, response: ChatCompletion) -> Summary:
+        content = response.choices[0].message.content
+        if content is None:
+            raise RuntimeError("コンテンツが返されませんでした")
+        return self._with_usage(content, response.usage)
 
+    def _with_usage(self, content: str, usage: CompletionUsage | None) -> Summary:
+        if usage is None:
+            return Summary(content=content, input_token_count=0, output_token_count=0)
+        details = usage.prompt_tokens_details
         return Summary(
             content=content,
-            input_token_count=input_token_count or 0,
-            output_token_count=output_token_count or 0,
+            input_token_count=usage.prompt_tokens,
+            output_token_count=usage.completion_tokens,
+            cached_input_token_count=(details.cached_tokens or 0) if details else 0,
         )
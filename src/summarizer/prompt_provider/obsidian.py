@@ -7,8 +7,8 @@ class ObsidianSummarizePromptProvider(ContextualSummarizePromptProvider):
     def get_system_prompt(self) -> str:
         return "あなたは優秀な議事録作成者です。ユーザーから指定されたフォーマットと文字起こしなどの情報から、マークダウンで議事録を作成してください。マークダウン以外の内容は出力しないこと。"
 
-    def get_prompt(self, transcription: str) -> str:
-        prompt = f"""【フォーマット】
+    def get_prompt_prefix(self) -> str:
+        return """【フォーマット】
 #minute <!-- タグとして機能するため、このまま記載する -->
 
 **日時**:
@@ -30,7 +30,4 @@ class ObsidianSummarizePromptProvider(ContextualSummarizePromptProvider):
 ## 決まらなかったこと
 
 【会議】
-{super().get_prompt(transcription)}
 """
-
-        return prompt
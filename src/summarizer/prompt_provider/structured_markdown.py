@@ -7,8 +7,8 @@ class StructuredMarkdownSummarizePromptProvider(ContextualSummarizePromptProvide
     def get_system_prompt(self) -> str:
         return "あなたは優秀な議事録作成者です。ユーザーから指定されたフォーマットと文字起こしなどの情報から、マークダウンで議事録を作成してください。議事録以外の内容は出力しないこと。"
 
-    def get_prompt(self, transcription: str) -> str:
-        prompt = f"""【フォーマット】
+    def get_prompt_prefix(self) -> str:
+        return """【フォーマット】
 # 議事録
 **日時**:
 **参加者**: <!-- 参加者は省略せず記載する -->
@@ -29,6 +29,4 @@ class StructuredMarkdownSummarizePromptProvider(ContextualSummarizePromptProvide
 ## 決まらなかったこと
 
 【会議】
-{super().get_prompt(transcription)}
 """
-        return prompt
@@ -2,11 +2,24 @@ from abc import ABC, abstractmethod
 
 
 class SummarizePromptProvider(ABC):
-    """AI に対してプロンプトを提供するための抽象基底クラス"""
+    """
+    AI に対してプロンプトを提供するための抽象基底クラス。
+    プロンプトは、リクエスト間で変わらない前半と、会議ごとに変わる後半に分けて組み立てる。
+    前半を固定にしておくと、プロバイダーのプロンプトキャッシュが効きやすくなる。
+    インスタンスは会議間で共有されるため、会議ごとのコンテキストは呼び出しごとに context で渡す。
+    """
+
+    def get_prompt(self, transcription: str, context: str | None = None) -> str:
+        """音声のテキスト化結果を受け取り、AI に対してプロンプトを生成する"""
+        return self.get_prompt_prefix() + self.get_prompt_suffix(transcription, context)
+
+    def get_prompt_prefix(self) -> str:
+        """フォーマットの指示など、会議によらず同じ内容になるプロンプトの前半"""
+        return ""
 
     @abstractmethod
-    def get_prompt(self, transcription: str) -> str:
-        """音声のテキスト化結果を受け取り、AI に対してプロンプトを生成する"""
+    def get_prompt_suffix(self, transcription: str, context: str | None = None) -> str:
+        """文字起こしなど、会議ごとに変わるプロンプトの後半"""
         pass
 
     @abstractmethod
@@ -16,11 +29,13 @@ class SummarizePromptProvider(ABC):
 
 
 class ContextualSummarizePromptProvider(SummarizePromptProvider):
-    """追加のコンテキストを持つプロンプトを提供する抽象基底クラス"""
+    """追加のコンテキストを持つプロンプトを提供する抽象基底クラス。context を渡さない呼び出しでは additional_context を使う"""
 
     def __init__(self, additional_context: str | None = None) -> None:
         super().__init__()
         self.additional_context = additional_context
 
-    def get_prompt(self, transcription: str) -> str:
-        return f"{self.additional_context or ''}\n文字起こし: {transcription}"
+    def get_prompt_suffix(self, transcription: str, context: str | None = None) -> str:
+        if context is None:
+            context = self.additional_context
+        return f"{context or ''}\n文字起こし: {transcription}\n"
@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+
+from ..meeting_notes import MeetingNotes
+
+
+class NotesRenderer(ABC):
+    """構造化された議事録を、LLMを使わずに文字列へ描画するための抽象基底クラス"""
+
+    @abstractmethod
+    def render(self, notes: MeetingNotes) -> str:
+        pass
+
+
+class MarkdownNotesRenderer(NotesRenderer):
+    """議事録フォーマットのプロンプトと同じ見出し構成のマークダウンを描画する"""
+
+    def render(self, notes: MeetingNotes) -> str:
+        lines = [
+            *self.header(notes),
+            f"**日時**: {notes.date}",
+            f"**参加者**: {', '.join(notes.attendees)}",
+            "",
+            "## TL;DR",
+            *_bullets(notes.tldr),
+            "",
+            "## 進捗",
+            *_bullets(notes.progress),
+            "",
+            "## 議題",
+        ]
+        for index, item in enumerate(notes.agenda, start=1):
+            lines += [f"### {index}. {item.title}", *_bullets(item.points), ""]
+        lines += [
+            "## 決まったこと",
+            *_bullets(notes.decisions),
+            "",
+            "## 決まらなかったこと",
+            *_bullets(notes.open_items),
+        ]
+        return "\n".join(lines) + "\n"
+
+    @abstractmethod
+    def header(self, notes: MeetingNotes) -> list[str]:
+        pass
+
+
+def _bullets(items: list[str]) -> list[str]:
+    return [f"- {item}" for item in items] or ["- なし"]
@@ -0,0 +1,9 @@
+from ..meeting_notes import MeetingNotes
+from .notes_renderer import MarkdownNotesRenderer
+
+
+class ObsidianNotesRenderer(MarkdownNotesRenderer):
+    """ObsidianSummarizePromptProvider と同じフォーマットで描画する"""
+
+    def header(self, notes: MeetingNotes) -> list[str]:
+        return ["#minute", ""]
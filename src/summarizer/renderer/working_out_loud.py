@@ -0,0 +1,15 @@
+from ..meeting_notes import MeetingNotes
+from .notes_renderer import NotesRenderer
+
+
+class WorkingOutLoudNotesRenderer(NotesRenderer):
+    """Working Out Loud 用の、ツイートのような短い進捗報告を描画する"""
+
+    def __init__(self, hashtags: tuple[str, ...] = ("#WorkingOutLoud",)):
+        self.hashtags = hashtags
+
+    def render(self, notes: MeetingNotes) -> str:
+        lines = [f"・{item}" for item in notes.tldr]
+        lines += [f"✅ {item}" for item in notes.decisions]
+        lines += [f"🔜 {item}" for item in notes.open_items]
+        return "\n".join([*lines, "", " ".join(self.hashtags)])
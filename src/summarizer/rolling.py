@@ -0,0 +1,136 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from logging import getLogger
+
+from src.ledger.context import current_stage
+
+from .compaction import compact_transcript
+from .map_reduce import MAP_SYSTEM_PROMPT
+from .summarizer import PromptedSummarizer, Summarizer, Summary
+from .token_estimator import estimate_tokens
+
+logger = getLogger(__name__)
+
+SECTION_PROMPT = """以下は進行中の会議の文字起こしの {index} 番目の区切りです。
+話題ごとに、議論の内容・決まったこと・決まらなかったこと・担当者や期限を箇条書きで簡潔にまとめてください。
+固有名詞や数値は省略せずに残してください。
+
+【文字起こし】
+{text}
+"""
+
+ROLLING_REDUCE_INPUT = """以下は会議を区切りごとにまとめたメモと、まだまとめていない最後の部分の文字起こしです。これらを会議全体の文字起こしとして扱ってください。
+
+{notes}
+
+【最後の部分の文字起こし】
+{tail}"""
+
+
+class RollingSummarizer:
+    """
+    1回の会議分の文字起こしを受け取りながら、section_tokens ごとに区切ってバックグラウンドでメモにしておく。
+    停止後はメモと未要約の残りだけから議事録を作るため、会議が長くても待ち時間がほぼ一定になる。
+    区切りの要約に失敗した場合は、その区切りの文字起こしをそのまま最後の要約に渡す。
+    """
+
+    def __init__(
+        self,
+        partial_summarizer: PromptedSummarizer,
+        section_tokens: int = 4000,
+        max_parallel: int = 2,
+    ):
+        if section_tokens < 1:
+            raise ValueError("section_tokens は1以上を指定してください")
+        self.partial_summarizer = partial_summarizer
+        self.section_tokens = section_tokens
+        self._semaphore = asyncio.Semaphore(max_parallel)
+        self._lines: list[str] = []
+        self._pending: list[str] = []
+        self._pending_tokens = 0
+        self._sections: list[tuple[asyncio.Task[Summary], str]] = []
+
+    @property
+    def fed(self) -> bool:
+        return bool(self._lines)
+
+    def add(self, text: str) -> None:
+        """文字起こしの1行を追加する。イベントループ上から呼び出すこと"""
+        self._lines.append(text)
+        self._pending.append(text)
+        self._pending_tokens += estimate_tokens(text) + 1
+        if self._pending_tokens >= self.section_tokens:
+            section = "\n".join(self._pending)
+            self._pending, self._pending_tokens = [], 0
+            task = asyncio.create_task(
+                self._summarize_section(len(self._sections), section)
+            )
+            self._sections.append((task, section))
+
+    def covers(self, transcription: str) -> bool:
+        """受け取った行が、保存された文字起こしと一致するか"""
+        return "\n".join(self._lines) == transcription
+
+    async def stream_meeting_notes(
+        self, summarizer: Summarizer, context: str | None = None
+    ) -> AsyncGenerator[Summary, None]:
+        """
+        区切りのメモの完成を待ち、残りの文字起こしと合わせて summarizer で議事録をストリーミングする。
+        参加者などの context は録音の停止後に決まるため、区切りのメモには含めず最後の要約にだけ渡す。
+        """
+        if not self._sections:
+            async for summary in summarizer.stream_meeting_notes(
+                compact_transcript("\n".join(self._lines)).text, context
+            ):
+                yield summary
+            return
+
+        usage = Summary(content="", input_token_count=0, output_token_count=0)
+        notes: list[str] = []
+        for index, (task, section) in enumerate(self._sections):
+            try:
+                partial = await task
+            except Exception:
+                logger.exception(f"Failed to summarize section {index + 1}")
+                notes.append(compact_transcript(section).text)
+                continue
+            notes.append(partial.content)
+            usage.input_token_count += partial.input_token_count
+            usage.output_token_count += partial.output_token_count
+            usage.cached_input_token_count += partial.cached_input_token_count
+
+        logger.info(f"Merging {len(notes)} rolling sections with the tail")
+        merged = ROLLING_REDUCE_INPUT.format(
+            notes="\n\n".join(notes),
+            tail=compact_transcript("\n".join(self._pending)).text,
+        )
+        # 最後の1件にだけ区切りの要約のトークン数を足すため、1件遅らせて返す
+        last: Summary | None = None
+        async for summary in summarizer.stream_meeting_notes(merged, context):
+            if last is not None:
+                yield last
+            last = summary
+        if last is not None:
+            yield Summary(
+                content=last.content,
+                input_token_count=last.input_token_count + usage.input_token_count,
+                output_token_count=last.output_token_count + usage.output_token_count,
+                cached_input_token_count=last.cached_input_token_count
+                + usage.cached_input_token_count,
+            )
+
+    def close(self) -> None:
+        """議事録を作らずに終える場合に、実行中の区切りの要約を取り消す"""
+        for task, _ in self._sections:
+            task.cancel()
+
+    async def _summarize_section(self, index: int, section: str) -> Summary:
+        current_stage.set("rolling")
+        async with self._semaphore:
+            logger.info(f"Summarizing rolling section {index + 1}")
+            return await self.partial_summarizer.complete_async(
+                MAP_SYSTEM_PROMPT,
+                SECTION_PROMPT.format(
+                    index=index + 1, text=compact_transcript(section).text
+                ),
+            )
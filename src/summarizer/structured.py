@@ -0,0 +1,96 @@
+from collections.abc import AsyncGenerator
+
+from .meeting_notes import MeetingNotes, meeting_notes_schema, parse_meeting_notes
+from .prompt_provider.summarize_prompt_provider import SummarizePromptProvider
+from .renderer.notes_renderer import NotesRenderer
+from .summarizer import PromptedSummarizer, Summary
+
+STRUCTURED_SYSTEM_PROMPT = "あなたは優秀な議事録作成者です。文字起こしなどの情報から議事録を作成し、指定されたJSONスキーマに従うJSONだけを出力してください。JSON以外の内容は出力しないこと。"
+
+STRUCTURED_PROMPT_PREFIX = """【JSONスキーマ】
+{schema}
+
+【会議】
+"""
+
+
+class StructuredSummarizer(PromptedSummarizer):
+    """
+    議事録をJSONスキーマに沿った構造化データとして1回だけ生成し、renderer でフォーマットに描画する。
+    プロンプトはフォーマットによらず同じになるため、キャッシュを挟めば別のフォーマットへの描画や
+    Working Out Loud への投稿でLLMを呼び直さずに済む。
+    プロンプトの後半（コンテキストと文字起こし）は summarize_prompt_provider から取得する。
+    """
+
+    def __init__(
+        self,
+        summarizer: PromptedSummarizer,
+        renderer: NotesRenderer,
+        summarize_prompt_provider: SummarizePromptProvider,
+    ):
+        self.summarizer = summarizer
+        self.renderer = renderer
+        self.summarize_prompt_provider = summarize_prompt_provider
+        self._prefix = STRUCTURED_PROMPT_PREFIX.format(schema=meeting_notes_schema())
+
+    @property
+    def model(self) -> str:
+        return self.summarizer.model
+
+    def complete(self, system_prompt: str, prompt: str) -> Summary:
+        return self.summarizer.complete(system_prompt, prompt)
+
+    async def complete_async(self, system_prompt: str, prompt: str) -> Summary:
+        return await self.summarizer.complete_async(system_prompt, prompt)
+
+    async def stream_async(
+        self, system_prompt: str, prompt: str
+    ) -> AsyncGenerator[Summary, None]:
+        async for summary in self.summarizer.stream_async(system_prompt, prompt):
+            yield summary
+
+    def generate_notes(
+        self, transcription: str, context: str | None = None
+    ) -> tuple[MeetingNotes, Summary]:
+        """構造化された議事録と、その生成にかかったトークン数を返す"""
+        summary = self.complete(
+            STRUCTURED_SYSTEM_PROMPT, self._prompt(transcription, context)
+        )
+        return parse_meeting_notes(summary.content), summary
+
+    async def generate_notes_async(
+        self, transcription: str, context: str | None = None
+    ) -> tuple[MeetingNotes, Summary]:
+        summary = await self.complete_async(
+            STRUCTURED_SYSTEM_PROMPT, self._prompt(transcription, context)
+        )
+        return parse_meeting_notes(summary.content), summary
+
+    def generate_meeting_notes(
+        self, transcription: str, context: str | None = None
+    ) -> Summary:
+        return self._render(*self.generate_notes(transcription, context))
+
+    async def generate_meeting_notes_async(
+        self, transcription: str, context: str | None = None
+    ) -> Summary:
+        return self._render(*await self.generate_notes_async(transcription, context))
+
+    async def stream_meeting_notes(
+        self, transcription: str, context: str | None = None
+    ) -> AsyncGenerator[Summary, None]:
+        # 途中までのJSONは描画できないため、完成したものを1回だけ返す
+        yield await self.generate_meeting_notes_async(transcription, context)
+
+    def _prompt(self, transcription: str, context: str | None) -> str:
+        return self._prefix + self.summarize_prompt_provider.get_prompt_suffix(
+            transcription, context
+        )
+
+    def _render(self, notes: MeetingNotes, usage: Summary) -> Summary:
+        return Summary(
+            content=self.renderer.render(notes),
+            input_token_count=usage.input_token_count,
+            output_token_count=usage.output_token_count,
+            cached_input_token_count=usage.cached_input_token_count,
+        )
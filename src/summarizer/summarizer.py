@@ -1,18 +1,94 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import AsyncGenerator
 from dataclasses import dataclass
 
+from .prompt_provider.summarize_prompt_provider import SummarizePromptProvider
+
 
 @dataclass
 class Summary:
     content: str
     input_token_count: int
     output_token_count: int
+    # 入力トークンのうち、プロバイダーのプロンプトキャッシュから読まれた分
+    cached_input_token_count: int = 0
 
 
 class Summarizer(ABC):
     """議事録を作成するための抽象基底クラス"""
 
     @abstractmethod
-    def generate_meeting_notes(self, transcription: str) -> Summary:
-        """文字起こしから議事録を生成する"""
+    def generate_meeting_notes(
+        self, transcription: str, context: str | None = None
+    ) -> Summary:
+        """文字起こしと、参加者などの会議ごとのコンテキストから議事録を生成する"""
+        pass
+
+    async def generate_meeting_notes_async(
+        self, transcription: str, context: str | None = None
+    ) -> Summary:
+        """
+        イベントループを止めずに議事録を生成する。
+        非同期クライアントを持たない実装では、同期版を別スレッドで実行する。
+        """
+        return await asyncio.to_thread(
+            self.generate_meeting_notes, transcription, context
+        )
+
+    async def stream_meeting_notes(
+        self, transcription: str, context: str | None = None
+    ) -> AsyncGenerator[Summary, None]:
+        """
+        生成途中の議事録を、それまでに生成された全文として逐次返す。
+        トークン数は最後に返す Summary にだけ含まれる。
+        ストリーミングに対応しない実装では、完成した議事録を1回だけ返す。
+        """
+        yield await self.generate_meeting_notes_async(transcription, context)
+
+
+class PromptedSummarizer(Summarizer):
+    """
+    システムプロンプトとプロンプトを1回のLLM呼び出しで補完する議事録作成クラス。
+    map-reduce などの上位の要約処理からも、任意のプロンプトで呼び出せるようにする。
+    """
+
+    summarize_prompt_provider: SummarizePromptProvider
+    model: str
+
+    @abstractmethod
+    def complete(self, system_prompt: str, prompt: str) -> Summary:
         pass
+
+    async def complete_async(self, system_prompt: str, prompt: str) -> Summary:
+        return await asyncio.to_thread(self.complete, system_prompt, prompt)
+
+    def generate_meeting_notes(
+        self, transcription: str, context: str | None = None
+    ) -> Summary:
+        return self.complete(
+            self.summarize_prompt_provider.get_system_prompt(),
+            self.summarize_prompt_provider.get_prompt(transcription, context),
+        )
+
+    async def generate_meeting_notes_async(
+        self, transcription: str, context: str | None = None
+    ) -> Summary:
+        return await self.complete_async(
+            self.summarize_prompt_provider.get_system_prompt(),
+            self.summarize_prompt_provider.get_prompt(transcription, context),
+        )
+
+    async def stream_async(
+        self, system_prompt: str, prompt: str
+    ) -> AsyncGenerator[Summary, None]:
+        yield await self.complete_async(system_prompt, prompt)
+
+    async def stream_meeting_notes(
+        self, transcription: str, context: str | None = None
+    ) -> AsyncGenerator[Summary, None]:
+        async for summary in self.stream_async(
+            self.summarize_prompt_provider.get_system_prompt(),
+            self.summarize_prompt_provider.get_prompt(transcription, context),
+        ):
+            yield summary
@@ -0,0 +1,71 @@
+import math
+import re
+
+# ひらがな・カタカナ・漢字・全角記号は、概ね1文字1トークン程度になる
+_WIDE_CHARS = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    トークナイザーを使わずにトークン数を概算する。
+    日本語は1文字1トークン、それ以外は4文字1トークンとして数える。
+    """
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+def split_by_tokens(text: str, max_tokens: int) -> list[str]:
+    """
+    行の区切りでテキストを分割し、各チャンクを max_tokens 以下に収める。
+    1行だけで上限を超える場合は、その行を文字数で分割する。
+    """
+    chunks: list[str] = []
+    lines: list[str] = []
+    tokens = 0
+    for line in text.splitlines():
+        line_tokens = estimate_tokens(line) + 1
+        if lines and tokens + line_tokens > max_tokens:
+            chunks.append("\n".join(lines))
+            lines, tokens = [], 0
+        if line_tokens > max_tokens:
+            chunks.extend(_split_line(line, max_tokens))
+            continue
+        lines.append(line)
+        tokens += line_tokens
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+
+def _split_line(line: str, max_tokens: int) -> list[str]:
+    parts: list[str] = []
+    start = 0
+    while start < len(line):
+        # 全角文字だけでも上限を超えないよう、max_tokens 文字ずつ区切る
+        parts.append(line[start : start + max_tokens])
+        start += max_tokens
+    return parts
+
+
+# モデルごとの入力に使えるトークン数の目安。前方一致で最も長いものを使う
+CONTEXT_WINDOWS: dict[str, int] = {
+    "gpt-5": 272_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4o": 128_000,
+    "gemini-2.0-flash": 1_048_576,
+    "gemini-2.5": 1_048_576,
+}
+
+
+def context_window(model: str) -> int | None:
+    """
+    モデルの入力上限を返す。不明なモデルは None。
+    複数のプロバイダーを組み合わせた "a+b" の形式では、最も小さい上限を返す。
+    """
+    windows = []
+    for name in model.split("+"):
+        matches = [prefix for prefix in CONTEXT_WINDOWS if name.startswith(prefix)]
+        if not matches:
+            return None
+        windows.append(CONTEXT_WINDOWS[max(matches, key=len)])
+    return min(windows, default=None)
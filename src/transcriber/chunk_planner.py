@@ -0,0 +1,113 @@
+from dataclasses import dataclass, field
+
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+
+
+@dataclass(frozen=True)
+class Span:
+    """元の音声上の区間（ミリ秒）"""
+
+    start: int
+    end: int
+
+    @property
+    def duration(self) -> int:
+        return self.end - self.start
+
+
+@dataclass
+class Chunk:
+    """APIに送信する1チャンク分の発話区間の集まり"""
+
+    spans: list[Span] = field(default_factory=list)
+
+    @property
+    def start(self) -> int:
+        return self.spans[0].start
+
+    @property
+    def end(self) -> int:
+        return self.spans[-1].end
+
+    @property
+    def voiced_duration(self) -> int:
+        return sum(span.duration for span in self.spans)
+
+    def render(self, audio: AudioSegment, gap_ms: int) -> AudioSegment:
+        """無音区間を取り除き、発話区間を短い無音で繋いだ音声を生成する"""
+        rendered = AudioSegment.empty()
+        for idx, span in enumerate(self.spans):
+            if idx > 0:
+                rendered += AudioSegment.silent(
+                    duration=gap_ms, frame_rate=audio.frame_rate
+                )
+            rendered += audio[span.start : span.end]
+        return rendered
+
+
+@dataclass(frozen=True)
+class ChunkPlanner:
+    """
+    無音位置を境界としてチャンクを計画する。
+    目標長に近い無音で区切り、長い無音はアップロード対象から除外する。
+    """
+
+    target_ms: int = 5 * 60 * 1000
+    max_ms: int = 10 * 60 * 1000
+    min_silence_ms: int = 700
+    silence_offset_db: float = 16.0
+    padding_ms: int = 200
+    seek_step_ms: int = 10
+
+    def plan(self, audio: AudioSegment) -> list[Chunk]:
+        return self._pack(self._voiced_spans(audio))
+
+    def _voiced_spans(self, audio: AudioSegment) -> list[Span]:
+        if len(audio) == 0:
+            return []
+
+        silence_thresh = audio.dBFS - self.silence_offset_db
+        ranges = detect_nonsilent(
+            audio,
+            min_silence_len=self.min_silence_ms,
+            silence_thresh=silence_thresh,
+            seek_step=self.seek_step_ms,
+        )
+
+        spans: list[Span] = []
+        for start, end in ranges:
+            span = Span(
+                start=max(0, start - self.padding_ms),
+                end=min(len(audio), end + self.padding_ms),
+            )
+            if spans and span.start <= spans[-1].end:
+                spans[-1] = Span(start=spans[-1].start, end=span.end)
+            else:
+                spans.append(span)
+
+        return [piece for span in spans for piece in self._split_long(span)]
+
+    def _split_long(self, span: Span) -> list[Span]:
+        return [
+            Span(start=start, end=min(start + self.max_ms, span.end))
+            for start in range(span.start, span.end, self.max_ms)
+        ]
+
+    def _pack(self, spans: list[Span]) -> list[Chunk]:
+        chunks: list[Chunk] = []
+        current = Chunk()
+
+        for span in spans:
+            if current.spans and (
+                current.voiced_duration >= self.target_ms
+                or current.voiced_duration + span.duration > self.max_ms
+            ):
+                chunks.append(current)
+                current = Chunk()
+            current.spans.append(span)
+
+        if current.spans:
+            chunks.append(current)
+
+        return chunks
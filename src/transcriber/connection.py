@@ -0,0 +1,164 @@
+import asyncio
+import contextlib
+import time
+from collections.abc import Callable
+from logging import getLogger
+from typing import Any
+
+import websockets
+
+from .message_types import PING_TIMEOUT, CancelJobMessage, ServerStatusMessage
+from .protocol import (
+    CONTROL_JOB,
+    SUPPORTED_PROTOCOLS,
+    JobFrameError,
+    JobStream,
+    MessageChannel,
+    MultiplexChannel,
+    request_handshake,
+)
+
+logger = getLogger(__name__)
+
+_CONNECT_OPTIONS: dict[str, Any] = {
+    "max_size": 8 * 1024 * 1024,
+    "ping_interval": PING_TIMEOUT,
+    "ping_timeout": PING_TIMEOUT,
+}
+
+
+class LegacyServers:
+    """
+    Hello を理解しなかった接続先。ttl 秒が過ぎたら、サーバーが更新された場合に備えて交渉し直す。
+    """
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self._expires_at: dict[str, float] = {}
+
+    def __contains__(self, target: str) -> bool:
+        expires_at = self._expires_at.get(target)
+        if expires_at is None:
+            return False
+        if time.monotonic() >= expires_at:
+            del self._expires_at[target]
+            return False
+        return True
+
+    def add(self, target: str) -> None:
+        self._expires_at[target] = time.monotonic() + self.ttl
+
+
+async def open_channel(
+    uri: str,
+    unix_socket: str | None = None,
+    protocols: tuple[int, ...] = SUPPORTED_PROTOCOLS,
+    legacy_servers: LegacyServers | None = None,
+) -> MessageChannel:
+    """
+    Hello でフレーム形式を交渉して接続する。
+    Hello を理解しない従来サーバーにはJSON形式で接続し直す。legacy_servers を渡すと、
+    その接続先ではしばらく交渉を省略する。
+    """
+    target = unix_socket or uri
+    if legacy_servers is None or target not in legacy_servers:
+        websocket = await _connect(uri, unix_socket)
+        try:
+            channel = await request_handshake(websocket, protocols)
+        except BaseException:
+            await websocket.close()
+            raise
+        if channel is not None:
+            return channel
+        await websocket.close()
+        if legacy_servers is not None:
+            legacy_servers.add(target)
+        logger.info(
+            f"{target} does not support protocol negotiation, using JSON frames"
+        )
+    return MessageChannel(await _connect(uri, unix_socket))
+
+
+async def _connect(uri: str, unix_socket: str | None) -> Any:
+    if unix_socket is not None:
+        return await websockets.unix_connect(unix_socket, **_CONNECT_OPTIONS)
+    return await websockets.connect(uri, **_CONNECT_OPTIONS)
+
+
+class MultiplexedConnection:
+    """
+    1つのWebSocket接続を使い回し、複数のジョブをジョブIDで多重化して並行に扱う。
+    サーバーから CONTROL_JOB 宛てに届く状態は on_status に渡す。
+    """
+
+    def __init__(
+        self,
+        channel: MultiplexChannel,
+        on_status: Callable[[ServerStatusMessage], None] | None = None,
+    ):
+        self.channel = channel
+        self.on_status = on_status
+        self._jobs: dict[int, JobStream] = {}
+        self._next_job_id = CONTROL_JOB + 1
+        self._reader = asyncio.create_task(self._read())
+
+    @property
+    def closed(self) -> bool:
+        return self._reader.done()
+
+    @property
+    def active_jobs(self) -> int:
+        return len(self._jobs)
+
+    def open_job(self) -> JobStream:
+        if self.closed:
+            raise ConnectionError("Multiplexed connection is closed")
+        job_id = self._next_job_id
+        self._next_job_id += 1
+        stream = JobStream(self.channel, job_id, on_close=self._release)
+        self._jobs[job_id] = stream
+        return stream
+
+    async def close(self) -> None:
+        self._reader.cancel()
+        await self.channel.close()
+
+    async def _release(self, stream: JobStream) -> None:
+        self._jobs.pop(stream.job_id, None)
+        if stream.finished or self.closed:
+            return
+        # 結果を待たずに閉じたジョブは、サーバー側でも止めて一時ファイルを消させる
+        with contextlib.suppress(OSError, websockets.WebSocketException):
+            await stream.send(CancelJobMessage())
+
+    async def _read(self) -> None:
+        error: BaseException = ConnectionError("Multiplexed connection closed")
+        try:
+            while True:
+                try:
+                    job_id, item = await self.channel.recv_from()
+                except JobFrameError as e:
+                    # 解釈できないフレームは、宛先のジョブだけを失敗させる
+                    logger.warning(str(e))
+                    if (stream := self._jobs.get(e.job_id)) is not None:
+                        stream.feed(RuntimeError(str(e)))
+                    continue
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Skipping invalid multiplexed frame: {e}")
+                    continue
+                if job_id == CONTROL_JOB:
+                    if isinstance(item, ServerStatusMessage) and self.on_status:
+                        self.on_status(item)
+                    continue
+                stream = self._jobs.get(job_id)
+                if stream is not None:
+                    stream.feed(item)
+        except (OSError, websockets.WebSocketException) as e:
+            logger.info(f"Multiplexed connection closed: {e}")
+            error = e
+        finally:
+            # 読み取りをやめた後も recv で待ち続けないよう、キャンセル時を含めて全ジョブに伝える
+            for stream in self._jobs.values():
+                stream.feed(error)
+            with contextlib.suppress(OSError, websockets.WebSocketException):
+                await self.channel.close()
@@ -1,10 +1,19 @@
 import os
+from collections.abc import Iterator
 from logging import getLogger
-from typing import Literal, cast
+from typing import Literal
 
+import numpy as np
 from faster_whisper import BatchedInferencePipeline, WhisperModel
 
-from .transcriber import IterableTranscriber, Segment, Transcriber
+from .model_registry import ModelKey, model_registry
+from .thread_iter import iterate_in_thread
+from .transcriber import (
+    IterableTranscriber,
+    PreloadableTranscriber,
+    Segment,
+    Transcriber,
+)
 
 ComputeType = Literal["float16", "int8", "float16_int8"]
 FasterWhisperModelSize = Literal[
@@ -30,8 +39,12 @@ FasterWhisperModelSize = Literal[
 
 logger = getLogger(__name__)
 
+WARMUP_SAMPLES = 16000
 
-class FasterWhisperTranscriber(Transcriber, IterableTranscriber):
+
+class FasterWhisperTranscriber(
+    Transcriber, IterableTranscriber, PreloadableTranscriber
+):
     """faster-whisper を利用して音声をテキスト化する実装クラス"""
 
     def __init__(
@@ -41,32 +54,55 @@ class FasterWhisperTranscriber(Transcriber, IterableTranscriber):
         beam_size: int = 5,
         hotwords: str | None = None,
         batch_size: int | None = None,
+        cpu_threads: int = 0,
+        num_workers: int = 1,
+        replica: int = 0,
     ):
         self.model_size = model_size
         self.compute_type = compute_type
         self.beam_size = beam_size
         self.hotwords = hotwords
         self.batch_size = batch_size
-        self._model = None
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.replica = replica
 
-    def _get_model(self) -> BatchedInferencePipeline | WhisperModel:
-        if self._model is None:
-            logger.info(
-                f"Loading FasterWhisper model: size='{self.model_size}', compute_type='{self.compute_type}', beam_size='{self.beam_size}', hotwords='{self.hotwords}'"
-            )
+    @property
+    def model_key(self) -> ModelKey:
+        return ModelKey(
+            "faster-whisper",
+            self.model_size,
+            self.compute_type,
+            f"threads={self.cpu_threads},workers={self.num_workers},replica={self.replica}",
+        )
 
-            self._model = WhisperModel(self.model_size, compute_type=self.compute_type)
-            if self.batch_size is not None:
-                self._model = BatchedInferencePipeline(model=self._model)
+    def _load_model(self) -> WhisperModel:
+        logger.info(
+            f"Loading FasterWhisper model: size='{self.model_size}', compute_type='{self.compute_type}', beam_size='{self.beam_size}', hotwords='{self.hotwords}', cpu_threads={self.cpu_threads}, num_workers={self.num_workers}, replica={self.replica}"
+        )
+        return WhisperModel(
+            self.model_size,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers,
+        )
 
-        return self._model
+    def preload(self, warmup: bool = True) -> None:
+        with model_registry.use(self.model_key, self._load_model) as model:
+            if warmup:
+                segments, _ = self._transcribe(
+                    model, np.zeros(WARMUP_SAMPLES, dtype=np.float32)
+                )
+                for _ in segments:
+                    pass
 
     def transcribe(self, audio_path: str) -> str:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"音声ファイルが見つかりません: {audio_path}")
         try:
-            segments, info = self._transcribe(audio_path)
-            texts = [segment.text for segment in segments]
+            with model_registry.use(self.model_key, self._load_model) as model:
+                segments, info = self._transcribe(model, audio_path)
+                texts = [segment.text for segment in segments]
             return "\n".join(texts)
         except Exception as e:
             raise RuntimeError("音声のテキスト化に失敗しました") from e
@@ -75,31 +111,35 @@ class FasterWhisperTranscriber(Transcriber, IterableTranscriber):
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"音声ファイルが見つかりません: {audio_path}")
         try:
-            segments, info = self._transcribe(audio_path)
+            async for segment in iterate_in_thread(
+                lambda: self._iter_segments(audio_path)
+            ):
+                yield segment
+        except Exception as e:
+            raise RuntimeError("音声のテキスト化に失敗しました") from e
+
+    def _iter_segments(self, audio_path: str) -> Iterator[Segment]:
+        with model_registry.use(self.model_key, self._load_model) as model:
+            segments, info = self._transcribe(model, audio_path)
             for segment in segments:
                 yield Segment(
                     start=segment.start,
                     end=segment.end,
                     text=segment.text,
                 )
-        except Exception as e:
-            raise RuntimeError("音声のテキスト化に失敗しました") from e
 
-    def _transcribe(self, audio_path: str):
-        model = self._get_model()
-
-        if isinstance(model, BatchedInferencePipeline):
-            batch_size = cast(int, self.batch_size)
-            return model.transcribe(
-                audio_path,
+    def _transcribe(self, model: WhisperModel, audio: str | np.ndarray):
+        if self.batch_size is not None:
+            return BatchedInferencePipeline(model=model).transcribe(
+                audio,
                 beam_size=self.beam_size,
                 language="ja",
                 hotwords=self.hotwords,
-                batch_size=batch_size,
+                batch_size=self.batch_size,
             )
         else:
             return model.transcribe(
-                audio_path,
+                audio,
                 beam_size=self.beam_size,
                 language="ja",
                 hotwords=self.hotwords,
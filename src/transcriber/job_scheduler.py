@@ -0,0 +1,92 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass, field
+from logging import getLogger
+from uuid import uuid4
+
+from .transcriber import IterableTranscriber, Segment
+
+logger = getLogger(__name__)
+
+
+@dataclass(eq=False)
+class TranscriptionJob:
+    audio_path: str
+    id: str = field(default_factory=lambda: uuid4().hex)
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def wait_seconds(self) -> float:
+        return (self.started_at or time.monotonic()) - self.submitted_at
+
+
+class TranscriptionJobScheduler:
+    """
+    アップロードが完了したジョブをFIFOで受け付け、同時実行数の範囲で文字起こしを行う。
+    待機中のジョブには、自分より前に並んでいるジョブ数の変化を通知する。
+    """
+
+    def __init__(self, transcriber: IterableTranscriber, concurrency: int = 1):
+        if concurrency < 1:
+            raise ValueError("concurrency は1以上を指定してください")
+        self.transcriber = transcriber
+        self.concurrency = concurrency
+        self._waiting: deque[TranscriptionJob] = deque()
+        self._active = 0
+        self._condition: asyncio.Condition | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def active_jobs(self) -> int:
+        return self._active
+
+    async def process(
+        self, job: TranscriptionJob
+    ) -> AsyncGenerator[int | Segment, None]:
+        """待機中は前にいるジョブ数を、実行開始後はセグメントを返す"""
+        condition = self._get_condition()
+        self._waiting.append(job)
+        admitted = False
+        try:
+            last_position: int | None = None
+            while not admitted:
+                async with condition:
+                    position = self._waiting.index(job)
+                    if position == 0 and self._active < self.concurrency:
+                        self._waiting.popleft()
+                        self._active += 1
+                        admitted = True
+                        job.started_at = time.monotonic()
+                        condition.notify_all()
+                        continue
+                    if position == last_position:
+                        await condition.wait()
+                        continue
+                last_position = position
+                yield position
+
+            logger.info(
+                f"Job {job.id} started: waited={job.wait_seconds:.1f}s, active={self._active}/{self.concurrency}, queued={self.queue_depth}"
+            )
+            async for segment in self.transcriber.transcribe_iter(job.audio_path):
+                yield segment
+        finally:
+            job.finished_at = time.monotonic()
+            async with condition:
+                if admitted:
+                    self._active -= 1
+                elif job in self._waiting:
+                    self._waiting.remove(job)
+                condition.notify_all()
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
@@ -13,6 +13,16 @@ class MessageType(StrEnum):
     TRANSCRIPTION_SEGMENT = "transcription_segment"
     END_OF_TRANSCRIPTION = "end_of_transcription"
     ERROR = "error"
+    QUEUE_POSITION = "queue_position"
+    CACHE_QUERY = "cache_query"
+    CACHE_STATUS = "cache_status"
+    START_STREAM = "start_stream"
+    HELLO = "hello"
+    HELLO_ACK = "hello_ack"
+    LOCAL_FILE = "local_file"
+    STATUS_QUERY = "status_query"
+    SERVER_STATUS = "server_status"
+    CANCEL_JOB = "cancel_job"
 
 
 class WebsocketMessage(ABC):
@@ -46,16 +56,24 @@ class AudioChunkMessage(WebsocketMessage):
 @dataclass(frozen=True)
 class EndOfAudioMessage(WebsocketMessage):
     hash: str = ""
+    upload_format: str = "original"
     type: MessageType = MessageType.END_OF_AUDIO
 
     def to_dict(self):
-        return {"type": self.type, "hash": self.hash}
+        return {
+            "type": self.type,
+            "hash": self.hash,
+            "upload_format": self.upload_format,
+        }
 
     @classmethod
     def from_dict(cls, obj: dict) -> "EndOfAudioMessage":
         if obj.get("type") != MessageType.END_OF_AUDIO:
             raise ValueError("Not an end_of_audio message")
-        return cls(hash=obj.get("hash", ""))
+        return cls(
+            hash=obj.get("hash", ""),
+            upload_format=obj.get("upload_format", "original"),
+        )
 
 
 @dataclass(frozen=True)
@@ -104,12 +122,194 @@ class ErrorMessage(WebsocketMessage):
         return cls(error=obj["error"])
 
 
+@dataclass(frozen=True)
+class QueuePositionMessage(WebsocketMessage):
+    position: int = 0
+    type: MessageType = MessageType.QUEUE_POSITION
+
+    def to_dict(self):
+        return {"type": self.type, "position": self.position}
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "QueuePositionMessage":
+        return cls(position=obj["position"])
+
+
+@dataclass(frozen=True)
+class CacheQueryMessage(WebsocketMessage):
+    hash: str = ""
+    type: MessageType = MessageType.CACHE_QUERY
+
+    def to_dict(self):
+        return {"type": self.type, "hash": self.hash}
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "CacheQueryMessage":
+        return cls(hash=obj["hash"])
+
+
+@dataclass(frozen=True)
+class CacheStatusMessage(WebsocketMessage):
+    hit: bool = False
+    type: MessageType = MessageType.CACHE_STATUS
+
+    def to_dict(self):
+        return {"type": self.type, "hit": self.hit}
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "CacheStatusMessage":
+        return cls(hit=obj["hit"])
+
+
+@dataclass(frozen=True)
+class StartStreamMessage(WebsocketMessage):
+    sample_rate: int = 48000
+    channels: int = 2
+    sample_width: int = 2
+    type: MessageType = MessageType.START_STREAM
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "sample_width": self.sample_width,
+        }
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "StartStreamMessage":
+        return cls(
+            sample_rate=obj["sample_rate"],
+            channels=obj["channels"],
+            sample_width=obj["sample_width"],
+        )
+
+
+@dataclass(frozen=True)
+class HelloMessage(WebsocketMessage):
+    protocols: tuple[int, ...] = ()
+    upload_formats: tuple[str, ...] = ()
+    type: MessageType = MessageType.HELLO
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "protocols": list(self.protocols),
+            "upload_formats": list(self.upload_formats),
+        }
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "HelloMessage":
+        return cls(
+            protocols=tuple(obj["protocols"]),
+            upload_formats=tuple(obj.get("upload_formats", ())),
+        )
+
+
+@dataclass(frozen=True)
+class HelloAckMessage(WebsocketMessage):
+    protocol: int = 1
+    upload_formats: tuple[str, ...] = ()
+    # サーバーが対応している追加機能（"cache" など）
+    features: tuple[str, ...] = ()
+    type: MessageType = MessageType.HELLO_ACK
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "protocol": self.protocol,
+            "upload_formats": list(self.upload_formats),
+            "features": list(self.features),
+        }
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "HelloAckMessage":
+        return cls(
+            protocol=obj["protocol"],
+            upload_formats=tuple(obj.get("upload_formats", ())),
+            features=tuple(obj.get("features", ())),
+        )
+
+
+@dataclass(frozen=True)
+class LocalFileMessage(WebsocketMessage):
+    path: str = ""
+    type: MessageType = MessageType.LOCAL_FILE
+
+    def to_dict(self):
+        return {"type": self.type, "path": self.path}
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "LocalFileMessage":
+        return cls(path=obj["path"])
+
+
+@dataclass(frozen=True)
+class StatusQueryMessage(WebsocketMessage):
+    type: MessageType = MessageType.STATUS_QUERY
+
+    def to_dict(self):
+        return {"type": self.type}
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "StatusQueryMessage":
+        return cls()
+
+
+@dataclass(frozen=True)
+class ServerStatusMessage(WebsocketMessage):
+    queue_depth: int = 0
+    active_jobs: int = 0
+    capacity: int = 1
+    type: MessageType = MessageType.SERVER_STATUS
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "queue_depth": self.queue_depth,
+            "active_jobs": self.active_jobs,
+            "capacity": self.capacity,
+        }
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "ServerStatusMessage":
+        return cls(
+            queue_depth=obj["queue_depth"],
+            active_jobs=obj["active_jobs"],
+            capacity=obj["capacity"],
+        )
+
+
+@dataclass(frozen=True)
+class CancelJobMessage(WebsocketMessage):
+    """多重化接続で、結果を待たずに閉じたジョブをサーバー側でも止める"""
+
+    type: MessageType = MessageType.CANCEL_JOB
+
+    def to_dict(self):
+        return {"type": self.type}
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "CancelJobMessage":
+        return cls()
+
+
 MESSAGE_TYPE_TO_CLASS: Dict[str, Type[WebsocketMessage]] = {
     MessageType.AUDIO_CHUNK: AudioChunkMessage,
     MessageType.END_OF_AUDIO: EndOfAudioMessage,
     MessageType.TRANSCRIPTION_SEGMENT: TranscriptionSegmentMessage,
     MessageType.END_OF_TRANSCRIPTION: EndOfTranscriptionMessage,
     MessageType.ERROR: ErrorMessage,
+    MessageType.QUEUE_POSITION: QueuePositionMessage,
+    MessageType.CACHE_QUERY: CacheQueryMessage,
+    MessageType.CACHE_STATUS: CacheStatusMessage,
+    MessageType.START_STREAM: StartStreamMessage,
+    MessageType.HELLO: HelloMessage,
+    MessageType.HELLO_ACK: HelloAckMessage,
+    MessageType.LOCAL_FILE: LocalFileMessage,
+    MessageType.STATUS_QUERY: StatusQueryMessage,
+    MessageType.SERVER_STATUS: ServerStatusMessage,
+    MessageType.CANCEL_JOB: CancelJobMessage,
 }
 
 
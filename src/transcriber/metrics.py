@@ -0,0 +1,209 @@
+import asyncio
+import bisect
+from collections.abc import Callable
+from logging import getLogger
+from typing import TypeVar
+
+logger = getLogger(__name__)
+
+DEFAULT_METRICS_PORT = 9877
+REQUEST_TIMEOUT = 5.0
+
+DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label: str | None = None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._values: dict[str, float] = {}
+
+    def inc(self, label_value: str = "", amount: float = 1.0) -> None:
+        self._values[label_value] = self._values.get(label_value, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        if self.label is None:
+            lines.append(f"{self.name} {self._values.get('', 0.0)}")
+            return lines
+        for value, count in sorted(self._values.items()):
+            lines.append(f'{self.name}{{{self.label}="{value}"}} {count}')
+        return lines
+
+
+class Gauge:
+    """
+    値は描画のたびに関数から取得する。
+    他のオブジェクトが数えている累計値を公開する場合は metric_type="counter" を指定する。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        value: Callable[[], float],
+        metric_type: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.value = value
+        self.metric_type = metric_type
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.metric_type}",
+            f"{self.name} {float(self.value())}",
+        ]
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self.buckets)
+        self._count = 0
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        if idx < len(self._counts):
+            self._counts[idx] += 1
+        self._count += 1
+        self._sum += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self._counts, strict=True):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self._count}')
+        lines.append(f"{self.name}_sum {self._sum}")
+        lines.append(f"{self.name}_count {self._count}")
+        return lines
+
+
+Metric = Counter | Gauge | Histogram
+M = TypeVar("M", Counter, Gauge, Histogram)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for m in self._metrics for line in m.render()) + "\n"
+
+
+class TranscriptionServerMetrics:
+    """文字起こしサーバーのジョブ単位の計測値。状態から求まる値は gauge で登録する"""
+
+    def __init__(self) -> None:
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+        self.jobs = register(
+            Counter("transcription_jobs_total", "Finished jobs by result", "result")
+        )
+        self.errors = register(
+            Counter("transcription_errors_total", "Errors by kind", "kind")
+        )
+        self.upload_seconds = register(
+            Histogram("transcription_upload_seconds", "Time to receive the audio")
+        )
+        self.queue_wait_seconds = register(
+            Histogram(
+                "transcription_queue_wait_seconds", "Time spent waiting in the queue"
+            )
+        )
+        self.first_segment_seconds = register(
+            Histogram(
+                "transcription_first_segment_seconds",
+                "Time from end of upload to the first segment",
+            )
+        )
+        self.total_seconds = register(
+            Histogram(
+                "transcription_total_seconds",
+                "Time from the first request frame to the end of transcription",
+            )
+        )
+        self.real_time_factor = register(
+            Histogram(
+                "transcription_real_time_factor",
+                "Processing time divided by the end of the last segment",
+                buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5),
+            )
+        )
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        value: Callable[[], float],
+        metric_type: str = "gauge",
+    ) -> None:
+        self.registry.register(Gauge(name, help, value, metric_type))
+
+
+class MetricsHttpServer:
+    """
+    Prometheus のテキスト形式で /metrics を返すだけの最小限のHTTPサーバー。
+    文字起こしサーバーと同じイベントループで動かす。
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        host: str = "0.0.0.0",
+        port: int = DEFAULT_METRICS_PORT,
+    ):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"Metrics available on http://{self.host}:{self.port}/metrics")
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            # ヘッダーを送り切らない接続が居座らないよう、リクエスト全体の読み取りに期限を設ける
+            async with asyncio.timeout(REQUEST_TIMEOUT):
+                request_line = await reader.readline()
+                while (await reader.readline()).strip():
+                    pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1] == "/metrics":
+                status = "200 OK"
+                body = self.registry.render().encode()
+            else:
+                status = "404 Not Found"
+                body = b"Not Found\n"
+            header = (
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(header.encode() + body)
+            await writer.drain()
+        except (OSError, TimeoutError) as e:
+            logger.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
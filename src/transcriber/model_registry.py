@@ -0,0 +1,220 @@
+import gc
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any, NamedTuple
+
+logger = getLogger(__name__)
+
+
+class ModelKey(NamedTuple):
+    backend: str
+    model: str
+    compute_type: str
+    variant: str = ""
+
+
+@dataclass
+class ModelStats:
+    key: ModelKey
+    load_seconds: float
+    resident_bytes: int
+    last_used: float
+    in_use: int = 0
+
+
+@dataclass
+class _Entry:
+    model: Any
+    stats: ModelStats
+
+
+class ModelRegistry:
+    """
+    プロセス全体で音声認識モデルを共有するレジストリ。
+    メモリ予算を超えた場合やアイドル状態が続いた場合は、未使用のモデルから解放する。
+    モデルの読み込みはロックの外でキーごとに1回だけ行うため、別のモデルの利用を待たせない。
+    読み込みの前に、前回測った大きさ（初めてなら読み込み済みの最大のモデル）の分だけ予算を空けておく。
+    プロセス全体の常駐メモリの増分で大きさを測るため、読み込み自体は1つずつ行う。
+    """
+
+    def __init__(
+        self,
+        memory_budget_bytes: int | None = None,
+        idle_seconds: float | None = None,
+    ) -> None:
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_seconds = idle_seconds
+        self._entries: dict[ModelKey, _Entry] = {}
+        self._loading: dict[ModelKey, Future[None]] = {}
+        self._measured: dict[ModelKey, int] = {}
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._evictor: threading.Thread | None = None
+
+    def configure(
+        self,
+        memory_budget_bytes: int | None = None,
+        idle_seconds: float | None = None,
+    ) -> None:
+        with self._lock:
+            self.memory_budget_bytes = memory_budget_bytes
+            self.idle_seconds = idle_seconds
+            self._enforce_budget()
+            if idle_seconds is not None and self._evictor is None:
+                self._evictor = threading.Thread(
+                    target=self._evict_periodically,
+                    name="model-registry-evictor",
+                    daemon=True,
+                )
+                self._evictor.start()
+
+    @contextmanager
+    def use(self, key: ModelKey, loader: Callable[[], Any]) -> Iterator[Any]:
+        """モデルを取得し、利用中は解放対象から外す"""
+        entry = self._acquire(key, loader)
+        try:
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.stats.in_use -= 1
+                entry.stats.last_used = time.monotonic()
+
+    def evict_idle(self, protect: ModelKey | None = None) -> list[ModelKey]:
+        if self.idle_seconds is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                key
+                for key, entry in self._entries.items()
+                if key != protect
+                and entry.stats.in_use == 0
+                and now - entry.stats.last_used >= self.idle_seconds
+            ]
+            for key in idle:
+                self._evict(key, reason="idle")
+        return idle
+
+    def stats(self) -> list[ModelStats]:
+        with self._lock:
+            return [entry.stats for entry in self._entries.values()]
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.stats.resident_bytes for entry in self._entries.values())
+
+    def _acquire(self, key: ModelKey, loader: Callable[[], Any]) -> _Entry:
+        """利用中の数を増やした状態でモデルを返す。読み込み中なら完了を待つ"""
+        while True:
+            with self._lock:
+                self.evict_idle(protect=key)
+                if (entry := self._entries.get(key)) is not None:
+                    entry.stats.in_use += 1
+                    entry.stats.last_used = time.monotonic()
+                    return entry
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = Future()
+                    break
+            # 他のスレッドが読み込み中のため、完了後にもう一度取得する
+            loading.result()
+
+        try:
+            with self._load_lock:
+                with self._lock:
+                    self._enforce_budget(protect=key, reserve=self._estimate(key))
+                entry = self._load(key, loader)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[key]
+            self._entries[key] = entry
+            self._measured[key] = entry.stats.resident_bytes
+            self._enforce_budget(protect=key)
+        loading.set_result(None)
+        return entry
+
+    def _load(self, key: ModelKey, loader: Callable[[], Any]) -> _Entry:
+        rss_before = _process_resident_bytes()
+        started = time.perf_counter()
+        model = loader()
+        load_seconds = time.perf_counter() - started
+        resident = max(0, _process_resident_bytes() - rss_before)
+        logger.info(
+            f"Loaded model {key}: load_time={load_seconds:.1f}s, resident={resident / 1024**2:.0f}MB"
+        )
+        return _Entry(
+            model=model,
+            stats=ModelStats(
+                key=key,
+                load_seconds=load_seconds,
+                resident_bytes=resident,
+                last_used=time.monotonic(),
+                in_use=1,
+            ),
+        )
+
+    def _estimate(self, key: ModelKey) -> int:
+        """読み込む前のモデルの大きさの見積もり"""
+        if key in self._measured:
+            return self._measured[key]
+        return max(self._measured.values(), default=0)
+
+    def _evict_periodically(self) -> None:
+        while True:
+            idle_seconds = self.idle_seconds
+            time.sleep(min(max(idle_seconds or 60.0, 1.0), 60.0))
+            if idle_seconds is not None:
+                self.evict_idle()
+
+    def _enforce_budget(
+        self, protect: ModelKey | None = None, reserve: int = 0
+    ) -> None:
+        """reserve はこれから読み込むモデルの分として空けておく大きさ"""
+        if self.memory_budget_bytes is None:
+            return
+        candidates = sorted(
+            (
+                entry.stats
+                for key, entry in self._entries.items()
+                if key != protect and entry.stats.in_use == 0
+            ),
+            key=lambda stats: stats.last_used,
+        )
+        for stats in candidates:
+            if self.resident_bytes() + reserve <= self.memory_budget_bytes:
+                break
+            self._evict(stats.key, reason="memory budget")
+        if self.resident_bytes() + reserve > self.memory_budget_bytes:
+            logger.warning(
+                f"Model memory {(self.resident_bytes() + reserve) / 1024**2:.0f}MB exceeds budget {self.memory_budget_bytes / 1024**2:.0f}MB"
+            )
+
+    def _evict(self, key: ModelKey, reason: str) -> None:
+        entry = self._entries.pop(key)
+        logger.info(
+            f"Evicted model {key} ({reason}): resident={entry.stats.resident_bytes / 1024**2:.0f}MB"
+        )
+        del entry
+        gc.collect()
+
+
+def _process_resident_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+model_registry = ModelRegistry()
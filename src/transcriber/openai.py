@@ -7,8 +7,10 @@ from typing import Literal
 
 from openai import OpenAI
 from pydub import AudioSegment
-from pydub.utils import make_chunks
 
+from src.ledger.call_ledger import CallLedger, LedgerEntry
+
+from .chunk_planner import ChunkPlanner
 from .transcriber import IterableTranscriber, Segment
 
 OpenAIWhisperModel = Literal["gpt-4o-transcribe", "gpt-4o-mini-transcribe"]
@@ -23,35 +25,42 @@ class OpenAIWhisperTranscriber(IterableTranscriber):
         self,
         api_key: str,
         model: OpenAIWhisperModel = "gpt-4o-transcribe",
+        chunk_planner: ChunkPlanner | None = None,
+        gap_ms: int = 300,
+        ledger: CallLedger | None = None,
     ):
         self.model = model
         self._model = OpenAI(api_key=api_key)
+        self.chunk_planner = chunk_planner or ChunkPlanner()
+        self.gap_ms = gap_ms
+        self.ledger = ledger
 
     async def transcribe_iter(self, audio_path: str):
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"音声ファイルが見つかりません: {audio_path}")
         try:
             audio = AudioSegment.from_file(audio_path)
-            chunk_seconds = 5 * 60
-            chunks = make_chunks(
-                audio,
-                chunk_seconds * 1000,
+            chunks = self.chunk_planner.plan(audio)
+            voiced_ms = sum(chunk.voiced_duration for chunk in chunks)
+            logger.info(
+                f"Planned {len(chunks)} chunks: voiced={voiced_ms / 1000:.1f}s, total={len(audio) / 1000:.1f}s"
             )
 
             for idx, chunk in enumerate(chunks, start=1):
                 logger.info(f"Processing chunk {idx}/{len(chunks)}...")
 
-                with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-                    chunk.export(tmp.name, format="mp3")
-                    tmp_path = tmp.name
-                    text = self._transcribe_with_retry(tmp_path)
-
-                    yield Segment(
-                        start=(idx - 1) * chunk_seconds,
-                        end=min(idx * chunk_seconds, len(audio) / 1000),
-                        text=text,
+                with tempfile.NamedTemporaryFile(suffix=".mp3") as tmp:
+                    chunk.render(audio, self.gap_ms).export(tmp.name, format="mp3")
+                    text = self._transcribe_with_retry(
+                        tmp.name, audio_seconds=(chunk.end - chunk.start) / 1000
                     )
 
+                yield Segment(
+                    start=chunk.start / 1000,
+                    end=chunk.end / 1000,
+                    text=text,
+                )
+
         except Exception as e:
             raise RuntimeError("音声のテキスト化に失敗しました") from e
 
@@ -61,12 +70,14 @@ class OpenAIWhisperTranscriber(IterableTranscriber):
         *,
         max_retries: int = 5,
         base_delay: float = 1.0,
+        audio_seconds: float = 0.0,
     ) -> str:
         """Call transcription API with retries and exponential backoff.
 
         Returns the transcribed text on success, raises the last exception on failure.
         """
         attempt = 0
+        started = time.monotonic()
         while True:
             attempt += 1
             try:
@@ -76,9 +87,11 @@ class OpenAIWhisperTranscriber(IterableTranscriber):
                         file=f,
                         language="ja",
                     )
+                self._record(started, attempt - 1, audio_seconds, resp)
                 return resp.text
             except Exception as e:  # Broad catch to be robust across SDK versions
                 if attempt >= max_retries:
+                    self._record(started, attempt - 1, audio_seconds)
                     raise
                 # Exponential backoff with jitter
                 delay = base_delay * (2 ** (attempt - 1))
@@ -87,3 +100,29 @@ class OpenAIWhisperTranscriber(IterableTranscriber):
                     f"  Error on attempt {attempt}/{max_retries}: {e}. Retrying in {delay:.1f}s..."
                 )
                 time.sleep(delay)
+
+    def _record(
+        self,
+        started: float,
+        retries: int,
+        audio_seconds: float,
+        response: object | None = None,
+    ) -> None:
+        if self.ledger is None:
+            return
+        # 音声の長さで課金されるモデルはトークン数を返さない
+        usage = getattr(response, "usage", None)
+        self.ledger.record(
+            LedgerEntry(
+                kind="transcription",
+                provider=type(self).__name__,
+                model=self.model,
+                latency_seconds=time.monotonic() - started,
+                input_tokens=getattr(usage, "input_tokens", 0) or 0,
+                output_tokens=getattr(usage, "output_tokens", 0) or 0,
+                audio_seconds=audio_seconds,
+                retries=retries,
+                success=response is not None,
+                stage="transcription",
+            )
+        )
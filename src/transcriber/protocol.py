@@ -0,0 +1,386 @@
+import asyncio
+import json
+import struct
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .message_types import (
+    EndOfTranscriptionMessage,
+    ErrorMessage,
+    HelloAckMessage,
+    HelloMessage,
+    MessageType,
+    QueuePositionMessage,
+    TranscriptionSegmentMessage,
+    WebsocketMessage,
+    parse_message,
+)
+from .upload_format import SUPPORTED_UPLOAD_FORMATS
+
+PROTOCOL_JSON = 1
+PROTOCOL_BINARY = 2
+PROTOCOL_MULTIPLEX = 3
+SUPPORTED_PROTOCOLS = (PROTOCOL_BINARY, PROTOCOL_JSON)
+MULTIPLEX_PROTOCOLS = (PROTOCOL_MULTIPLEX, *SUPPORTED_PROTOCOLS)
+
+# 多重化接続で、ジョブに属さないサーバー状態などをやり取りするためのID
+CONTROL_JOB = 0
+
+# アップロード前のキャッシュ問い合わせ（CacheQueryMessage）に対応している
+FEATURE_CACHE = "cache"
+
+TAG_AUDIO = 0
+MESSAGE_TAGS: dict[MessageType, int] = {
+    MessageType.END_OF_AUDIO: 1,
+    MessageType.TRANSCRIPTION_SEGMENT: 2,
+    MessageType.END_OF_TRANSCRIPTION: 3,
+    MessageType.ERROR: 4,
+    MessageType.QUEUE_POSITION: 5,
+    MessageType.CACHE_QUERY: 6,
+    MessageType.CACHE_STATUS: 7,
+    MessageType.START_STREAM: 8,
+    MessageType.HELLO: 9,
+    MessageType.HELLO_ACK: 10,
+    MessageType.LOCAL_FILE: 11,
+    MessageType.STATUS_QUERY: 12,
+    MessageType.SERVER_STATUS: 13,
+    MessageType.CANCEL_JOB: 14,
+}
+_TAG_TO_TYPE = {tag: msg_type for msg_type, tag in MESSAGE_TAGS.items()}
+
+_SEGMENT = struct.Struct("<dd")
+_POSITION = struct.Struct("<I")
+_JOB = struct.Struct("<I")
+
+
+class JobFrameError(ValueError):
+    """ジョブIDは読めたが、本体を解釈できなかった多重化フレーム"""
+
+    def __init__(self, job_id: int, message: str):
+        super().__init__(message)
+        self.job_id = job_id
+
+
+class MessageCodec(ABC):
+    """メッセージとWebSocketフレームの相互変換。デコード結果が bytes の場合は音声データ"""
+
+    version: int
+
+    @abstractmethod
+    def encode(self, msg: WebsocketMessage) -> str | bytes:
+        pass
+
+    @abstractmethod
+    def encode_audio(self, data: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, frame: str | bytes) -> WebsocketMessage | bytes:
+        pass
+
+
+class JsonCodec(MessageCodec):
+    """従来形式。制御メッセージはJSONテキスト、音声はタグなしのバイナリフレーム"""
+
+    version = PROTOCOL_JSON
+
+    def encode(self, msg: WebsocketMessage) -> str:
+        return json.dumps(msg.to_dict())
+
+    def encode_audio(self, data: bytes) -> bytes:
+        return data
+
+    def decode(self, frame: str | bytes) -> WebsocketMessage | bytes:
+        if isinstance(frame, bytes):
+            return frame
+        return parse_message(json.loads(frame))
+
+
+class BinaryCodec(MessageCodec):
+    """
+    すべてをバイナリフレームで送る形式。先頭1バイトのタグで種類を区別する。
+    セグメントと待ち順位は struct で詰め、それ以外の制御メッセージはJSONをそのまま載せる。
+    """
+
+    version = PROTOCOL_BINARY
+
+    def encode(self, msg: WebsocketMessage) -> bytes:
+        tag = bytes([MESSAGE_TAGS[msg.type]])
+        match msg:
+            case TranscriptionSegmentMessage(start=start, end=end, text=text):
+                return tag + _SEGMENT.pack(start, end) + text.encode("utf-8")
+            case QueuePositionMessage(position=position):
+                return tag + _POSITION.pack(position)
+            case EndOfTranscriptionMessage(end_of_transcription=True):
+                return tag
+            case _:
+                return tag + json.dumps(msg.to_dict(), separators=(",", ":")).encode()
+
+    def encode_audio(self, data: bytes) -> bytes:
+        return bytes([TAG_AUDIO]) + data
+
+    def decode(self, frame: str | bytes) -> WebsocketMessage | bytes:
+        if isinstance(frame, str):
+            return parse_message(json.loads(frame))
+        if not frame:
+            raise ValueError("Empty frame")
+
+        tag = frame[0]
+        payload = memoryview(frame)[1:]
+        if tag == TAG_AUDIO:
+            return bytes(payload)
+
+        msg_type = _TAG_TO_TYPE.get(tag)
+        if msg_type is None:
+            raise ValueError(f"Unknown frame tag: {tag}")
+        match msg_type:
+            case MessageType.TRANSCRIPTION_SEGMENT:
+                start, end = _SEGMENT.unpack_from(payload)
+                text = bytes(payload[_SEGMENT.size :]).decode("utf-8")
+                return TranscriptionSegmentMessage(start=start, end=end, text=text)
+            case MessageType.QUEUE_POSITION:
+                (position,) = _POSITION.unpack(payload)
+                return QueuePositionMessage(position=position)
+            case MessageType.END_OF_TRANSCRIPTION if not payload:
+                return EndOfTranscriptionMessage()
+            case _:
+                return parse_message(json.loads(bytes(payload)))
+
+
+class MultiplexCodec(BinaryCodec):
+    """
+    BinaryCodec のフレームの前にジョブIDを付け、1つの接続で複数のジョブを扱う形式。
+    ジョブIDを指定しない encode/decode は CONTROL_JOB 宛てとして扱う。
+    ジョブIDは接続ごとに、新しいジョブほど大きな値を使う。
+    本体を解釈できないフレームは、どのジョブ宛てかを JobFrameError で伝える。
+    """
+
+    version = PROTOCOL_MULTIPLEX
+
+    def encode(self, msg: WebsocketMessage) -> bytes:
+        return self.encode_job(CONTROL_JOB, msg)
+
+    def encode_audio(self, data: bytes) -> bytes:
+        return self.encode_job_audio(CONTROL_JOB, data)
+
+    def decode(self, frame: str | bytes) -> WebsocketMessage | bytes:
+        return self.decode_job(frame)[1]
+
+    def encode_job(self, job_id: int, msg: WebsocketMessage) -> bytes:
+        return _JOB.pack(job_id) + super().encode(msg)
+
+    def encode_job_audio(self, job_id: int, data: bytes) -> bytes:
+        return _JOB.pack(job_id) + super().encode_audio(data)
+
+    def decode_job(self, frame: str | bytes) -> tuple[int, WebsocketMessage | bytes]:
+        if isinstance(frame, str):
+            return CONTROL_JOB, super().decode(frame)
+        if len(frame) < _JOB.size:
+            raise ValueError("Frame is too short for a job ID")
+        (job_id,) = _JOB.unpack_from(frame)
+        try:
+            return job_id, super().decode(frame[_JOB.size :])
+        except (ValueError, KeyError) as e:
+            raise JobFrameError(job_id, f"Invalid frame for job {job_id}: {e}") from e
+
+
+CODECS: dict[int, MessageCodec] = {
+    PROTOCOL_JSON: JsonCodec(),
+    PROTOCOL_BINARY: BinaryCodec(),
+    PROTOCOL_MULTIPLEX: MultiplexCodec(),
+}
+
+
+class MessageChannel:
+    """
+    WebSocket接続と、ハンドシェイクで決まったコーデック・アップロード形式・機能の組。
+    negotiated が False の接続は Hello を交わしていない従来形式で、追加した制御メッセージは送らない。
+    """
+
+    def __init__(
+        self,
+        websocket: Any,
+        codec: MessageCodec = CODECS[PROTOCOL_JSON],
+        upload_formats: tuple[str, ...] = ("original",),
+        features: tuple[str, ...] = (),
+        negotiated: bool = False,
+    ):
+        self.websocket = websocket
+        self.codec = codec
+        self.upload_formats = upload_formats
+        self.features = features
+        self.negotiated = negotiated
+
+    @property
+    def protocol(self) -> int:
+        return self.codec.version
+
+    async def send(self, msg: WebsocketMessage) -> None:
+        await self.websocket.send(self.codec.encode(msg))
+
+    async def send_audio(self, data: bytes) -> None:
+        await self.websocket.send(self.codec.encode_audio(data))
+
+    async def recv(self) -> WebsocketMessage | bytes:
+        return self.codec.decode(await self.websocket.recv())
+
+    async def close(self) -> None:
+        await self.websocket.close()
+
+
+class MultiplexChannel(MessageChannel):
+    """ジョブIDでフレームを振り分ける接続"""
+
+    codec: MultiplexCodec
+
+    def __init__(
+        self,
+        websocket: Any,
+        upload_formats: tuple[str, ...] = ("original",),
+        features: tuple[str, ...] = (),
+    ):
+        super().__init__(
+            websocket,
+            CODECS[PROTOCOL_MULTIPLEX],
+            upload_formats,
+            features,
+            negotiated=True,
+        )
+
+    @classmethod
+    def from_channel(cls, channel: MessageChannel) -> "MultiplexChannel":
+        return cls(channel.websocket, channel.upload_formats, channel.features)
+
+    async def send_to(self, job_id: int, msg: WebsocketMessage) -> None:
+        await self.websocket.send(self.codec.encode_job(job_id, msg))
+
+    async def send_audio_to(self, job_id: int, data: bytes) -> None:
+        await self.websocket.send(self.codec.encode_job_audio(job_id, data))
+
+    async def recv_from(self) -> tuple[int, WebsocketMessage | bytes]:
+        return self.codec.decode_job(await self.websocket.recv())
+
+
+class JobStream:
+    """
+    多重化された接続上の1ジョブ分の送受信。MessageChannel と同じ操作を提供する。
+    受信は接続側の読み取りループが feed で振り分ける。
+    finished は終了か失敗の通知を受け取ったかどうかで、途中で閉じたジョブの判別に使う。
+    """
+
+    def __init__(
+        self,
+        channel: MultiplexChannel,
+        job_id: int,
+        on_close: Callable[["JobStream"], Awaitable[None]] | None = None,
+    ):
+        self.channel = channel
+        self.job_id = job_id
+        self.finished = False
+        self._on_close = on_close
+        self._inbox: asyncio.Queue[WebsocketMessage | bytes | BaseException] = (
+            asyncio.Queue()
+        )
+
+    @property
+    def protocol(self) -> int:
+        return self.channel.protocol
+
+    @property
+    def upload_formats(self) -> tuple[str, ...]:
+        return self.channel.upload_formats
+
+    @property
+    def features(self) -> tuple[str, ...]:
+        return self.channel.features
+
+    @property
+    def negotiated(self) -> bool:
+        return self.channel.negotiated
+
+    def feed(self, item: WebsocketMessage | bytes | BaseException) -> None:
+        """例外を渡すと、次の recv でその例外を送出する"""
+        self._inbox.put_nowait(item)
+
+    async def send(self, msg: WebsocketMessage) -> None:
+        await self.channel.send_to(self.job_id, msg)
+
+    async def send_audio(self, data: bytes) -> None:
+        await self.channel.send_audio_to(self.job_id, data)
+
+    async def recv(self) -> WebsocketMessage | bytes:
+        item = await self._inbox.get()
+        if isinstance(item, BaseException):
+            raise item
+        if isinstance(item, EndOfTranscriptionMessage | ErrorMessage):
+            self.finished = True
+        return item
+
+    async def close(self) -> None:
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            await on_close(self)
+
+
+JobChannel = MessageChannel | JobStream
+
+
+async def accept_handshake(
+    websocket: Any,
+    features: tuple[str, ...] = (),
+) -> tuple[MessageChannel, WebsocketMessage | bytes | None]:
+    """
+    サーバー側のハンドシェイク。最初のフレームが Hello でなければ従来のJSON形式とみなし、
+    読んでしまったフレームを2つ目の戻り値として返す。features は Hello に応じたクライアントに伝える。
+    """
+    legacy = MessageChannel(websocket)
+    first = await legacy.recv()
+    if not isinstance(first, HelloMessage):
+        return legacy, first
+
+    common = set(first.protocols) & CODECS.keys()
+    protocol = max(common, default=PROTOCOL_JSON)
+    upload_formats = tuple(
+        fmt for fmt in first.upload_formats if fmt in SUPPORTED_UPLOAD_FORMATS
+    ) or ("original",)
+    await legacy.send(
+        HelloAckMessage(
+            protocol=protocol, upload_formats=upload_formats, features=features
+        )
+    )
+    return (
+        MessageChannel(
+            websocket, CODECS[protocol], upload_formats, features, negotiated=True
+        ),
+        None,
+    )
+
+
+async def request_handshake(
+    websocket: Any,
+    protocols: tuple[int, ...] = SUPPORTED_PROTOCOLS,
+    upload_formats: tuple[str, ...] = SUPPORTED_UPLOAD_FORMATS,
+) -> MessageChannel | None:
+    """
+    クライアント側のハンドシェイク。Hello を理解しない従来サーバーの場合は None を返す。
+    従来サーバーはエラーを返して接続を閉じるため、呼び出し側で接続し直す必要がある。
+    upload_formats は希望順に並べ、サーバーが受け付けた形式がチャネルに記録される。
+    """
+    legacy = MessageChannel(websocket)
+    await legacy.send(HelloMessage(protocols=protocols, upload_formats=upload_formats))
+    match await legacy.recv():
+        case HelloAckMessage(
+            protocol=protocol, upload_formats=accepted, features=features
+        ) if protocol in CODECS:
+            return MessageChannel(
+                websocket,
+                CODECS[protocol],
+                accepted or ("original",),
+                features,
+                negotiated=True,
+            )
+        case ErrorMessage():
+            return None
+        case msg:
+            raise RuntimeError(f"Unexpected handshake response: {msg}")
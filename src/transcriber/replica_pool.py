@@ -0,0 +1,128 @@
+import asyncio
+import os
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from logging import getLogger
+
+from .faster_whisper import (
+    ComputeType,
+    FasterWhisperModelSize,
+    FasterWhisperTranscriber,
+)
+from .transcriber import IterableTranscriber, PreloadableTranscriber, Segment
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    replicas: int
+    busy: int
+    queue_depth: int
+    assigned_jobs: int
+    last_wait_seconds: float
+    average_wait_seconds: float
+
+
+class ReplicaPoolTranscriber(IterableTranscriber, PreloadableTranscriber):
+    """
+    faster-whisper のレプリカを複数持ち、空いているレプリカにジョブを割り当てる。
+    全レプリカのCPUスレッド数の合計は total_cpu_threads 以下に抑える。
+    shared_weights=True の場合は1つのモデルを num_workers で共有する。
+    """
+
+    def __init__(
+        self,
+        model_size: FasterWhisperModelSize = "small",
+        compute_type: ComputeType = "int8",
+        beam_size: int = 5,
+        hotwords: str | None = None,
+        batch_size: int | None = None,
+        replicas: int = 2,
+        total_cpu_threads: int | None = None,
+        shared_weights: bool = True,
+    ):
+        if replicas < 1:
+            raise ValueError("replicas は1以上を指定してください")
+
+        self.model_size = model_size
+        self.compute_type = compute_type
+        total_cpu_threads = total_cpu_threads or os.cpu_count() or replicas
+        cpu_threads = max(1, total_cpu_threads // replicas)
+
+        self.replicas = [
+            FasterWhisperTranscriber(
+                model_size=model_size,
+                compute_type=compute_type,
+                beam_size=beam_size,
+                hotwords=hotwords,
+                batch_size=batch_size,
+                cpu_threads=cpu_threads,
+                num_workers=replicas if shared_weights else 1,
+                replica=0 if shared_weights else idx,
+            )
+            for idx in range(replicas)
+        ]
+        self._free: asyncio.Queue[FasterWhisperTranscriber] | None = None
+        self._waiting = 0
+        self._assigned = 0
+        self._last_wait = 0.0
+        self._total_wait = 0.0
+
+        logger.info(
+            f"Replica pool: replicas={replicas}, cpu_threads_per_replica={cpu_threads}, shared_weights={shared_weights}"
+        )
+
+    def stats(self) -> PoolStats:
+        free = self._free.qsize() if self._free is not None else len(self.replicas)
+        return PoolStats(
+            replicas=len(self.replicas),
+            busy=len(self.replicas) - free,
+            queue_depth=self._waiting,
+            assigned_jobs=self._assigned,
+            last_wait_seconds=self._last_wait,
+            average_wait_seconds=self._total_wait / self._assigned
+            if self._assigned
+            else 0.0,
+        )
+
+    def preload(self, warmup: bool = True) -> None:
+        for replica in self.replicas:
+            replica.preload(warmup=warmup)
+
+    async def transcribe_iter(self, audio_path: str) -> AsyncGenerator[Segment, None]:
+        async with self._acquire() as replica:
+            async for segment in replica.transcribe_iter(audio_path):
+                yield segment
+
+    @asynccontextmanager
+    async def _acquire(self):
+        free = self._free_replicas()
+        self._waiting += 1
+        started = time.monotonic()
+        try:
+            replica = await free.get()
+        finally:
+            self._waiting -= 1
+
+        wait = time.monotonic() - started
+        self._last_wait = wait
+        self._total_wait += wait
+        self._assigned += 1
+        stats = self.stats()
+        logger.info(
+            f"Assigned replica {self.replicas.index(replica)}: waited={wait:.1f}s, busy={stats.busy}/{stats.replicas}, queue_depth={stats.queue_depth}"
+        )
+        try:
+            yield replica
+        finally:
+            free.put_nowait(replica)
+
+    def _free_replicas(self) -> asyncio.Queue[FasterWhisperTranscriber]:
+        if self._free is None:
+            self._free = asyncio.Queue()
+            for replica in self.replicas:
+                self._free.put_nowait(replica)
+        return self._free
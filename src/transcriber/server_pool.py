@@ -0,0 +1,130 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from logging import getLogger
+
+import websockets
+
+from .connection import LegacyServers, open_channel
+from .message_types import ErrorMessage, ServerStatusMessage, StatusQueryMessage
+
+logger = getLogger(__name__)
+
+
+@dataclass(eq=False)
+class ServerEndpoint:
+    uri: str
+    unix_socket: str | None = None
+    healthy: bool = True
+    queue_depth: int = 0
+    active_jobs: int = 0
+    capacity: int = 1
+    # 直近のヘルスチェック以降にこのクライアントが割り当てたジョブ数
+    assigned_since_check: int = 0
+    last_checked: float | None = None
+
+    @property
+    def name(self) -> str:
+        return self.unix_socket or self.uri
+
+    @property
+    def load(self) -> float:
+        pending = self.queue_depth + self.active_jobs + self.assigned_since_check
+        return pending / max(1, self.capacity)
+
+
+class TranscriptionServerPool:
+    """
+    複数の文字起こしサーバーの状態をバックグラウンドで定期的に問い合わせ、
+    負荷の低い順に接続先を返す。状態を返さない従来サーバーは負荷0として扱う。
+    """
+
+    def __init__(
+        self,
+        endpoints: list[ServerEndpoint],
+        check_interval: float = 15.0,
+        check_timeout: float = 5.0,
+        legacy_servers: LegacyServers | None = None,
+    ):
+        if not endpoints:
+            raise ValueError("endpoints を1つ以上指定してください")
+        self.endpoints = endpoints
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.legacy_servers = legacy_servers
+        self._checker: asyncio.Task | None = None
+
+    async def ranked(self) -> list[ServerEndpoint]:
+        """正常なサーバーを負荷の低い順に並べ、最後に異常と判定されたサーバーを続ける"""
+        if len(self.endpoints) == 1:
+            return list(self.endpoints)
+        if self._checker is None or self._checker.done():
+            if all(endpoint.last_checked is None for endpoint in self.endpoints):
+                await self.check_all()
+            self._checker = asyncio.create_task(self._check_periodically())
+        return sorted(
+            self.endpoints, key=lambda endpoint: (not endpoint.healthy, endpoint.load)
+        )
+
+    def assign(self, endpoint: ServerEndpoint) -> None:
+        endpoint.assigned_since_check += 1
+
+    def mark_failed(self, endpoint: ServerEndpoint, error: BaseException) -> None:
+        logger.warning(f"Transcription server {endpoint.name} failed: {error}")
+        endpoint.healthy = False
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(endpoint) for endpoint in self.endpoints))
+
+    async def check(self, endpoint: ServerEndpoint) -> None:
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                channel = await open_channel(
+                    endpoint.uri,
+                    endpoint.unix_socket,
+                    legacy_servers=self.legacy_servers,
+                )
+                try:
+                    if channel.negotiated:
+                        await channel.send(StatusQueryMessage())
+                        status = await channel.recv()
+                    else:
+                        # 接続できれば正常とみなし、状態の問い合わせは送らない
+                        status = ServerStatusMessage()
+                finally:
+                    await channel.close()
+        except (OSError, TimeoutError, ValueError, websockets.WebSocketException) as e:
+            if endpoint.healthy:
+                logger.warning(f"Health check for {endpoint.name} failed: {e}")
+            endpoint.healthy = False
+        else:
+            match status:
+                case ServerStatusMessage() as server_status:
+                    self.update(endpoint, server_status)
+                case ErrorMessage():
+                    # 状態の問い合わせに対応していない従来サーバー
+                    self.update(endpoint, ServerStatusMessage())
+        finally:
+            endpoint.assigned_since_check = 0
+            endpoint.last_checked = time.monotonic()
+
+    def update(self, endpoint: ServerEndpoint, status: ServerStatusMessage) -> None:
+        """ヘルスチェックの結果や、多重化接続でサーバーから届いた状態を反映する"""
+        if not endpoint.healthy:
+            logger.info(f"Transcription server {endpoint.name} is back")
+        endpoint.healthy = True
+        endpoint.queue_depth = status.queue_depth
+        endpoint.active_jobs = status.active_jobs
+        endpoint.capacity = status.capacity
+        endpoint.assigned_since_check = 0
+        endpoint.last_checked = time.monotonic()
+
+    async def close(self) -> None:
+        if self._checker is not None:
+            self._checker.cancel()
+            self._checker = None
+
+    async def _check_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check_all()
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import tempfile
+import wave
+from logging import getLogger
+
+from .job_scheduler import TranscriptionJob, TranscriptionJobScheduler
+from .transcriber import Segment
+
+logger = getLogger(__name__)
+
+
+class StreamingTranscriptionSession:
+    """
+    録音中に届くPCMをバッファし、スライディングウィンドウで繰り返し文字起こしする。
+    ウィンドウ末尾から holdback 秒以内のセグメントは次のウィンドウで再認識し、
+    それより前に終わるセグメントだけを確定として返す。
+    """
+
+    def __init__(
+        self,
+        scheduler: TranscriptionJobScheduler,
+        tmp_dir: str,
+        sample_rate: int = 48000,
+        channels: int = 2,
+        sample_width: int = 2,
+        step_seconds: float = 30.0,
+        holdback_seconds: float = 5.0,
+        max_window_seconds: float = 180.0,
+    ):
+        self.scheduler = scheduler
+        self.tmp_dir = tmp_dir
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.step_seconds = step_seconds
+        self.holdback_seconds = holdback_seconds
+        self.max_window_seconds = max_window_seconds
+
+        self._buffer = bytearray()
+        self._buffer_start = 0
+        self._last_window_end = 0
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.channels * self.sample_width
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate * self.frame_bytes
+
+    @property
+    def received_seconds(self) -> float:
+        return (self._buffer_start + len(self._buffer)) / self.bytes_per_second
+
+    def feed(self, pcm: bytes) -> None:
+        self._buffer.extend(pcm)
+
+    def ready(self) -> bool:
+        received = self._buffer_start + len(self._buffer)
+        pending = received - self._last_window_end
+        return pending >= self.step_seconds * self.bytes_per_second
+
+    async def poll(self) -> list[Segment]:
+        """新しい音声が step 秒分たまっていれば、ウィンドウを文字起こしして確定分を返す"""
+        if not self.ready():
+            return []
+        return await self._transcribe_window(final=False)
+
+    async def finish(self) -> list[Segment]:
+        """残りのバッファをすべて文字起こしし、確定させる"""
+        if not self._buffer:
+            return []
+        return await self._transcribe_window(final=True)
+
+    async def _transcribe_window(self, final: bool) -> list[Segment]:
+        window = bytes(self._buffer)
+        window_start = self._buffer_start / self.bytes_per_second
+        window_end_byte = self._buffer_start + len(window)
+        window_end = window_end_byte / self.bytes_per_second
+        self._last_window_end = window_end_byte
+
+        segments = [
+            Segment(
+                start=segment.start + window_start,
+                end=segment.end + window_start,
+                text=segment.text,
+            )
+            for segment in await self._transcribe_pcm(window)
+        ]
+
+        force = final or window_end - window_start >= self.max_window_seconds
+        cutoff = window_end if force else window_end - self.holdback_seconds
+        finalized = [segment for segment in segments if segment.end <= cutoff]
+
+        if finalized:
+            commit = finalized[-1].end
+        elif not segments:
+            commit = max(window_start, cutoff)
+        else:
+            commit = window_start
+        self._commit(commit)
+
+        logger.info(
+            f"Streaming window {window_start:.1f}-{window_end:.1f}s: finalized={len(finalized)}, pending={len(segments) - len(finalized)}"
+        )
+        return finalized
+
+    def _commit(self, seconds: float) -> None:
+        commit_byte = int(seconds * self.sample_rate) * self.frame_bytes
+        drop = max(0, commit_byte - self._buffer_start)
+        del self._buffer[:drop]
+        self._buffer_start += drop
+
+    async def _transcribe_pcm(self, pcm: bytes) -> list[Segment]:
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.tmp_dir, suffix=".wav") as tmp:
+            await asyncio.to_thread(self._write_wav, tmp.name, pcm)
+            return [
+                item
+                async for item in self.scheduler.process(TranscriptionJob(tmp.name))
+                if isinstance(item, Segment)
+            ]
+
+    def _write_wav(self, path: str, pcm: bytes) -> None:
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(self.channels)
+            wav.setsampwidth(self.sample_width)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(pcm)
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+from collections.abc import AsyncGenerator, Callable, Iterable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+_DONE = object()
+
+
+async def iterate_in_thread(
+    iterable_factory: Callable[[], Iterable[T]],
+) -> AsyncGenerator[T, None]:
+    """
+    同期イテレータを別スレッドで回し、要素をイベントループ側へ逐次受け渡す。
+    消費側が途中で抜けた場合は、次の要素の取得時点で生成を打ち切る。
+    生成中の例外は、すべての要素を受け渡した後に呼び出し元へ送出する。
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[object] = asyncio.Queue()
+    stopped = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in iterable_factory():
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while (item := await queue.get()) is not _DONE:
+            yield item  # type: ignore[misc]
+        await producer
+    finally:
+        stopped.set()
+        await asyncio.wait([producer])
@@ -28,3 +28,11 @@ class IterableTranscriber(ABC):
     async def transcribe_iter(self, audio_path: str) -> AsyncGenerator[Segment, None]:
         """指定された音声ファイルを複数のテキストチャンクとして逐次的に返す（async generator）"""
         yield  # type: ignore
+
+
+class PreloadableTranscriber(ABC):
+    """モデルの事前読み込みとウォームアップに対応するTranscriberの抽象基底クラス"""
+
+    @abstractmethod
+    def preload(self, warmup: bool = True) -> None:
+        """モデルを読み込み、必要に応じて短い無音で推論を一度実行する"""
@@ -0,0 +1,43 @@
+import hashlib
+from dataclasses import asdict
+from pathlib import Path
+
+from src.cache.json_file_cache import JsonFileCache
+
+from .transcriber import Segment
+
+
+class TranscriptionCache:
+    """音声のSHA-256と文字起こし設定をキーに、完了したセグメント列を保存するキャッシュ"""
+
+    def __init__(self, dir: Path, namespace: str, max_bytes: int | None = None):
+        self.namespace = namespace
+        self._cache = JsonFileCache(dir, max_bytes=max_bytes)
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def get(self, audio_hash: str) -> list[Segment] | None:
+        records = self._cache.get(self._key(audio_hash))
+        if records is None:
+            return None
+        return [Segment(**record) for record in records]
+
+    def set(self, audio_hash: str, segments: list[Segment]) -> None:
+        self._cache.set(
+            self._key(audio_hash), [asdict(segment) for segment in segments]
+        )
+
+    def _key(self, audio_hash: str) -> str:
+        return f"{audio_hash}:{self.namespace}"
+
+
+def file_sha256(path: str) -> str:
+    """キャッシュのキーに使う、音声ファイル全体のSHA-256"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
@@ -0,0 +1,131 @@
+import itertools
+import json
+import multiprocessing
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, cast
+
+DEFAULT_TUNED_CONFIG_PATH = Path("./data/tuned_config.json")
+
+
+@dataclass(frozen=True)
+class TuneConfig:
+    model_size: str
+    compute_type: str
+    beam_size: int
+    batch_size: int | None
+    cpu_threads: int
+
+    def describe(self) -> str:
+        pipeline = f"batched({self.batch_size})" if self.batch_size else "plain"
+        return f"{self.compute_type}, {pipeline}, beam={self.beam_size}, threads={self.cpu_threads}"
+
+
+@dataclass(frozen=True)
+class TuneResult:
+    config: TuneConfig
+    audio_seconds: float
+    elapsed_seconds: float
+    peak_rss_bytes: int
+
+    @property
+    def real_time_factor(self) -> float:
+        return self.elapsed_seconds / self.audio_seconds
+
+
+def build_grid(
+    model_size: str,
+    compute_types: list[str],
+    beam_sizes: list[int],
+    batch_sizes: list[int | None],
+    thread_counts: list[int],
+) -> list[TuneConfig]:
+    return [
+        TuneConfig(
+            model_size=model_size,
+            compute_type=compute_type,
+            beam_size=beam_size,
+            batch_size=batch_size,
+            cpu_threads=cpu_threads,
+        )
+        for compute_type, beam_size, batch_size, cpu_threads in itertools.product(
+            compute_types, beam_sizes, batch_sizes, thread_counts
+        )
+    ]
+
+
+def run_benchmark(config: TuneConfig, audio_path: Path) -> TuneResult:
+    """設定ごとに新しいプロセスで計測し、ピークRSSが他の試行の影響を受けないようにする"""
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        audio_seconds, elapsed, peak_rss = executor.submit(
+            _benchmark_worker, config, str(audio_path)
+        ).result()
+    return TuneResult(
+        config=config,
+        audio_seconds=audio_seconds,
+        elapsed_seconds=elapsed,
+        peak_rss_bytes=peak_rss,
+    )
+
+
+def select_best(
+    results: list[TuneResult], max_rss_bytes: int | None = None
+) -> TuneResult | None:
+    candidates = [
+        result
+        for result in results
+        if max_rss_bytes is None or result.peak_rss_bytes <= max_rss_bytes
+    ]
+    return min(candidates, key=lambda r: r.real_time_factor, default=None)
+
+
+def save_tuned_config(result: TuneResult, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        **asdict(result.config),
+        "real_time_factor": result.real_time_factor,
+        "peak_rss_mb": result.peak_rss_bytes / 1024**2,
+    }
+    path.write_text(json.dumps(data, indent=4), encoding="utf-8")
+
+
+def load_tuned_config(path: Path = DEFAULT_TUNED_CONFIG_PATH) -> dict[str, Any]:
+    """チューニング結果を読み込む。ファイルがなければ空の辞書を返す"""
+    if not path.is_file():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {key: data[key] for key in TuneConfig.__dataclass_fields__ if key in data}
+
+
+def _benchmark_worker(config: TuneConfig, audio_path: str) -> tuple[float, float, int]:
+    from faster_whisper.audio import decode_audio
+
+    from .faster_whisper import (
+        ComputeType,
+        FasterWhisperModelSize,
+        FasterWhisperTranscriber,
+    )
+
+    sampling_rate = 16000
+    audio_seconds = len(decode_audio(audio_path, sampling_rate)) / sampling_rate
+
+    transcriber = FasterWhisperTranscriber(
+        model_size=cast(FasterWhisperModelSize, config.model_size),
+        compute_type=cast(ComputeType, config.compute_type),
+        beam_size=config.beam_size,
+        batch_size=config.batch_size,
+        cpu_threads=config.cpu_threads,
+    )
+    transcriber.preload(warmup=True)
+
+    started = time.perf_counter()
+    transcriber.transcribe(audio_path)
+    elapsed = time.perf_counter() - started
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return audio_seconds, elapsed, peak_rss
@@ -0,0 +1,82 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from typing import Literal
+
+UploadFormat = Literal["opus", "flac", "original"]
+
+# 受信側が扱えるアップロード形式。faster-whisper はコンテナ形式を自動判別して読み込む
+SUPPORTED_UPLOAD_FORMATS: tuple[UploadFormat, ...] = ("opus", "flac", "original")
+
+UPLOAD_SAMPLE_RATE = 16000
+
+
+class TranscodeError(RuntimeError):
+    """送信前の音声の変換に失敗した。送信先のサーバーの障害ではない"""
+
+
+_ENCODER_ARGS: dict[str, list[str]] = {
+    "opus": [
+        "-c:a",
+        "libopus",
+        "-b:a",
+        "24k",
+        "-application",
+        "voip",
+        "-f",
+        "ogg",
+    ],
+    "flac": ["-c:a", "flac", "-f", "flac"],
+}
+
+
+async def transcode_stream(
+    audio_path: str,
+    upload_format: UploadFormat,
+    chunk_size: int = 64 * 1024,
+) -> AsyncGenerator[bytes, None]:
+    """ffmpeg で16kHzモノラルに変換しながら、出力をチャンクごとに返す"""
+    if upload_format not in _ENCODER_ARGS:
+        raise ValueError(f"Unsupported upload format: {upload_format}")
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-nostdin",
+            "-loglevel",
+            "error",
+            "-i",
+            audio_path,
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            str(UPLOAD_SAMPLE_RATE),
+            # 同じ音声から毎回同じバイト列を作り、サーバーのキャッシュのキー（ハッシュ）を揃える。
+            # Ogg のストリーム番号やエンコーダー名などのメタデータは、既定では実行ごと・版ごとに変わる
+            "-map_metadata",
+            "-1",
+            "-fflags",
+            "+bitexact",
+            "-flags:a",
+            "+bitexact",
+            *_ENCODER_ARGS[upload_format],
+            "pipe:1",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        raise TranscodeError(f"Failed to start ffmpeg: {e}") from e
+    if process.stdout is None or process.stderr is None:
+        raise TranscodeError("ffmpeg pipes are not available")
+    stderr = asyncio.create_task(process.stderr.read())
+    try:
+        while chunk := await process.stdout.read(chunk_size):
+            yield chunk
+        if await process.wait() != 0:
+            message = (await stderr).decode(errors="replace").strip()
+            raise TranscodeError(f"ffmpeg failed to transcode {audio_path}: {message}")
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        await stderr
@@ -1,67 +1,316 @@
-import json
-from typing import Any, AsyncGenerator
+import asyncio
+import functools
+import hashlib
+import os
+import time
+from collections.abc import AsyncGenerator, Callable, Sequence
+from logging import getLogger
 
 import websockets
 
+from .connection import LegacyServers, MultiplexedConnection, open_channel
 from .message_types import (
     DEFAULT_WEBSOCKET_PORT,
-    PING_TIMEOUT,
+    CacheQueryMessage,
+    CacheStatusMessage,
     EndOfAudioMessage,
     EndOfTranscriptionMessage,
+    ErrorMessage,
+    LocalFileMessage,
+    QueuePositionMessage,
+    StartStreamMessage,
     TranscriptionSegmentMessage,
     WebsocketMessage,
-    parse_message,
 )
+from .protocol import (
+    FEATURE_CACHE,
+    MULTIPLEX_PROTOCOLS,
+    PROTOCOL_MULTIPLEX,
+    JobChannel,
+    MessageChannel,
+    MultiplexChannel,
+)
+from .server_pool import ServerEndpoint, TranscriptionServerPool
 from .transcriber import IterableTranscriber, Segment
+from .transcription_cache import file_sha256
+from .upload_format import TranscodeError, UploadFormat, transcode_stream
+
+logger = getLogger(__name__)
 
 
 class WebSocketIterableTranscriberClient(IterableTranscriber):
     """
     WebSocket経由でサーバーに音声ファイルパスを送り、逐次セグメントを受信するクライアント実装。
+    サーバーが受け付ける場合は upload_format に変換しながら送信し、転送量を抑える。
+    unix_socket を指定すると同一ホストのサーバーへ接続し、音声は送らずにパスだけを渡す。
+    その場合、音声ファイルはサーバーと同じパスで見える共有ボリューム上にある必要がある。
+    uri に複数のサーバーを渡すと、負荷の低いサーバーに割り当て、失敗時は次のサーバーで再試行する。
+    unix_socket は同一ホストの1台を指すため、複数のサーバーとは組み合わせられない。
+    多重化に対応したサーバーとは接続を保持し、以降のジョブはジョブIDを付けて同じ接続で送る。
+    use_cache=True でも、キャッシュの問い合わせはハンドシェイクでキャッシュに対応していると
+    通知したサーバーに、無変換でアップロードする場合にだけ送る。
+    それ以外はサーバーが受け取った音声からキャッシュを確認する。
     """
 
-    def __init__(self, uri=f"ws://localhost:{DEFAULT_WEBSOCKET_PORT}"):
-        self.uri = uri
+    def __init__(
+        self,
+        uri: str | Sequence[str] = f"ws://localhost:{DEFAULT_WEBSOCKET_PORT}",
+        use_cache: bool = True,
+        upload_format: UploadFormat = "opus",
+        unix_socket: str | None = None,
+        health_check_interval: float = 15.0,
+    ):
+        uris = [uri] if isinstance(uri, str) else list(uri)
+        if unix_socket is not None and len(uris) > 1:
+            # 全サーバーが同じソケット名になり、負荷分散もフェイルオーバーも効かなくなる
+            raise ValueError("unix_socket は複数のサーバーと同時に指定できません")
+        self.uri = uris[0]
+        self.use_cache = use_cache
+        self.upload_format = upload_format
+        self.unix_socket = unix_socket
+        self.legacy_servers = LegacyServers()
+        self.pool = TranscriptionServerPool(
+            [ServerEndpoint(uri, unix_socket) for uri in uris],
+            check_interval=health_check_interval,
+            legacy_servers=self.legacy_servers,
+        )
+        self._connections: dict[str, MultiplexedConnection] = {}
+        self._connect_lock = asyncio.Lock()
 
     async def transcribe_iter(self, audio_path: str) -> AsyncGenerator[Segment, None]:
-        async with websockets.connect(
-            self.uri,
-            max_size=8 * 1024 * 1024,
-            ping_interval=PING_TIMEOUT,
-            ping_timeout=PING_TIMEOUT,
-        ) as websocket:
-            await self._send_audio_chunks(websocket, audio_path)
+        # フェイルオーバー時は最初から文字起こしし直すため、返却済みの区間は読み飛ばす
+        delivered_until = 0.0
+        last_error: Exception | None = None
+        for endpoint in await self.pool.ranked():
+            self.pool.assign(endpoint)
+            try:
+                async for segment in self._transcribe_on(endpoint, audio_path):
+                    if segment.end <= delivered_until:
+                        continue
+                    delivered_until = segment.end
+                    yield segment
+                return
+            except TranscodeError:
+                # 手元の ffmpeg の失敗は、サーバーを切り替えても解決しない
+                raise
+            except (OSError, RuntimeError, websockets.WebSocketException) as e:
+                self.pool.mark_failed(endpoint, e)
+                last_error = e
+        raise RuntimeError(f"All transcription servers failed: {last_error}")
+
+    async def close(self) -> None:
+        await self.pool.close()
+        for connection in self._connections.values():
+            await connection.close()
+        self._connections.clear()
+
+    async def _open_job(self, endpoint: ServerEndpoint) -> JobChannel:
+        async with self._connect_lock:
+            connection = self._connections.get(endpoint.name)
+            if connection is None or connection.closed:
+                channel = await open_channel(
+                    endpoint.uri,
+                    endpoint.unix_socket,
+                    MULTIPLEX_PROTOCOLS,
+                    self.legacy_servers,
+                )
+                if channel.protocol != PROTOCOL_MULTIPLEX:
+                    # 多重化に対応していないサーバーにはジョブごとに接続する
+                    return channel
+                connection = MultiplexedConnection(
+                    MultiplexChannel.from_channel(channel),
+                    on_status=functools.partial(self.pool.update, endpoint),
+                )
+                self._connections[endpoint.name] = connection
+            return connection.open_job()
+
+    async def _transcribe_on(
+        self, endpoint: ServerEndpoint, audio_path: str
+    ) -> AsyncGenerator[Segment, None]:
+        channel = await self._open_job(endpoint)
+        try:
+            upload_format: UploadFormat = (
+                self.upload_format
+                if self.upload_format in channel.upload_formats
+                and endpoint.unix_socket is None
+                else "original"
+            )
+            file_hash = None
+            cached: bool | None = False
+            if (
+                self.use_cache
+                and FEATURE_CACHE in channel.features
+                and upload_format == "original"
+                and endpoint.unix_socket is None
+            ):
+                # アップロードと別に全体を読むため、キャッシュがあるサーバーに限って計算する
+                file_hash = await asyncio.to_thread(file_sha256, audio_path)
+                cached = await self._query_cache(channel, file_hash)
+                if cached:
+                    logger.info(f"Transcription cache hit: {file_hash}")
+                elif cached is None:
+                    # 問い合わせを拒否したサーバーは接続を閉じるため、接続し直して通常どおり送る
+                    logger.info(
+                        f"{endpoint.name} rejected the cache query, uploading without cache"
+                    )
+                    await channel.close()
+                    channel = await self._open_job(endpoint)
+            if not cached and endpoint.unix_socket is not None:
+                await channel.send(LocalFileMessage(path=os.path.abspath(audio_path)))
+            elif not cached:
+                await self._send_audio_chunks(
+                    channel, audio_path, upload_format, file_hash
+                )
             while True:
-                message = await websocket.recv()
-                if isinstance(message, bytes):
-                    # バイナリはサーバーから返されない想定
-                    continue
-                data: dict = json.loads(message)
-                msg: WebsocketMessage = parse_message(data)
-                match msg:
+                match await self._recv(channel):
                     case EndOfTranscriptionMessage():
                         break
+                    case QueuePositionMessage(position=position):
+                        logger.info(
+                            f"Waiting for transcription server: {position} job(s) ahead"
+                        )
                     case TranscriptionSegmentMessage(start=s, end=e, text=t):
                         yield Segment(start=s, end=e, text=t)
-                    case _ if "error" in data:
-                        raise RuntimeError(data["error"])
+                    case ErrorMessage(error=error):
+                        raise RuntimeError(error)
+        finally:
+            await channel.close()
+
+    async def _query_cache(self, channel: JobChannel, audio_hash: str) -> bool | None:
+        """キャッシュの有無を返す。サーバーが問い合わせを受け付けなかった場合は None"""
+        await channel.send(CacheQueryMessage(hash=audio_hash))
+        match await self._recv(channel):
+            case CacheStatusMessage(hit=hit):
+                return hit
+            case ErrorMessage(error=error):
+                logger.warning(f"Cache query failed: {error}")
+                return None
+            case msg:
+                raise RuntimeError(f"Unexpected message: {msg}")
+
+    async def _recv(self, channel: JobChannel) -> WebsocketMessage:
+        while True:
+            message = await channel.recv()
+            if isinstance(message, bytes):
+                # 音声はサーバーから返されない想定
+                continue
+            return message
 
     async def _send_audio_chunks(
-        self, websocket: Any, audio_path: str, chunk_size: int = 512 * 1024
+        self,
+        channel: JobChannel,
+        audio_path: str,
+        upload_format: UploadFormat = "original",
+        upload_hash: str | None = None,
+        chunk_size: int = 512 * 1024,
     ) -> None:
-        import hashlib
+        """upload_hash は送信するバイト列のハッシュ。既知でなければ送信しながら計算する"""
+        if upload_format == "original":
+            chunks = _read_chunks(audio_path, chunk_size)
+        else:
+            chunks = transcode_stream(audio_path, upload_format)
 
         hasher = hashlib.sha256()
-        with open(audio_path, "rb") as f:
-            while True:
-                chunk: bytes = f.read(chunk_size)
-                if not chunk:
-                    break
+        sent = 0
+        started = time.monotonic()
+        async for chunk in chunks:
+            if upload_hash is None:
                 hasher.update(chunk)
-                # バイナリフレームで直接送信
-                await websocket.send(chunk)
-        file_hash = hasher.hexdigest()
-        await self._send(websocket, EndOfAudioMessage(hash=file_hash))
+            sent += len(chunk)
+            await channel.send_audio(chunk)
+        logger.info(
+            f"Uploaded {sent / 1024**2:.1f}MB as {upload_format} in {time.monotonic() - started:.1f}s"
+        )
+        await channel.send(
+            EndOfAudioMessage(
+                hash=upload_hash or hasher.hexdigest(), upload_format=upload_format
+            )
+        )
+
+
+class WebSocketStreamingTranscriberClient:
+    """
+    録音中のPCMを逐次サーバーへ送り、確定したセグメントを受け取るストリーミングクライアント。
+    on_segment を指定すると、セグメントが確定するたびに呼び出す。
+    """
+
+    def __init__(
+        self,
+        uri=f"ws://localhost:{DEFAULT_WEBSOCKET_PORT}",
+        sample_rate: int = 48000,
+        channels: int = 2,
+        sample_width: int = 2,
+        on_segment: Callable[[Segment], None] | None = None,
+    ):
+        self.uri = uri
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.on_segment = on_segment
+        self.segments: list[Segment] = []
+        self._channel: MessageChannel | None = None
+        self._receiver: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._channel = await open_channel(self.uri)
+        if not self._channel.negotiated:
+            await self._channel.close()
+            raise RuntimeError(f"{self.uri} does not support streaming transcription")
+        await self._channel.send(
+            StartStreamMessage(
+                sample_rate=self.sample_rate,
+                channels=self.channels,
+                sample_width=self.sample_width,
+            )
+        )
+        self._receiver = asyncio.create_task(self._receive())
+
+    async def send(self, pcm: bytes) -> None:
+        if self._receiver is not None and self._receiver.done():
+            self._receiver.result()
+        await self._require_channel().send_audio(pcm)
+
+    async def finish(self) -> list[Segment]:
+        """音声の終了を通知し、残りのセグメントがすべて届くまで待つ"""
+        channel = self._require_channel()
+        try:
+            await channel.send(EndOfAudioMessage())
+            if self._receiver is not None:
+                await self._receiver
+        finally:
+            await channel.close()
+        return self.segments
+
+    async def abort(self) -> None:
+        if self._receiver is not None:
+            self._receiver.cancel()
+        if self._channel is not None:
+            await self._channel.close()
+
+    def _require_channel(self) -> MessageChannel:
+        if self._channel is None:
+            raise RuntimeError("Streaming session is not started")
+        return self._channel
+
+    async def _receive(self) -> None:
+        channel = self._require_channel()
+        while True:
+            match await channel.recv():
+                case EndOfTranscriptionMessage():
+                    return
+                case TranscriptionSegmentMessage(start=s, end=e, text=t):
+                    segment = Segment(start=s, end=e, text=t)
+                    self.segments.append(segment)
+                    if self.on_segment is not None:
+                        self.on_segment(segment)
+                case ErrorMessage(error=error):
+                    raise RuntimeError(error)
+
 
-    async def _send(self, websocket: Any, msg: WebsocketMessage) -> None:
-        await websocket.send(json.dumps(msg.to_dict()))
+async def _read_chunks(path: str, chunk_size: int) -> AsyncGenerator[bytes, None]:
+    with open(path, "rb") as f:
+        chunk: bytes = await asyncio.to_thread(f.read, chunk_size)
+        while chunk:
+            next_chunk = asyncio.create_task(asyncio.to_thread(f.read, chunk_size))
+            yield chunk
+            chunk = await next_chunk
@@ -1,28 +1,67 @@
+import asyncio
+import contextlib
+import functools
 import hashlib
-import json
 import os
 import tempfile
-from typing import Any
+import time
+from logging import getLogger
 
 import websockets
 
+from .job_scheduler import TranscriptionJob, TranscriptionJobScheduler
 from .message_types import (
     DEFAULT_WEBSOCKET_PORT,
     PING_TIMEOUT,
+    CacheQueryMessage,
+    CacheStatusMessage,
+    CancelJobMessage,
     EndOfAudioMessage,
     EndOfTranscriptionMessage,
     ErrorMessage,
+    LocalFileMessage,
+    QueuePositionMessage,
+    ServerStatusMessage,
+    StartStreamMessage,
+    StatusQueryMessage,
     TranscriptionSegmentMessage,
     WebsocketMessage,
-    parse_message,
 )
-from .transcriber import IterableTranscriber
+from .metrics import MetricsHttpServer, TranscriptionServerMetrics
+from .model_registry import model_registry
+from .protocol import (
+    CONTROL_JOB,
+    FEATURE_CACHE,
+    PROTOCOL_MULTIPLEX,
+    JobChannel,
+    JobFrameError,
+    JobStream,
+    MessageChannel,
+    MultiplexChannel,
+    accept_handshake,
+)
+from .streaming import StreamingTranscriptionSession
+from .transcriber import IterableTranscriber, Segment
+from .transcription_cache import TranscriptionCache, file_sha256
+from .upload_format import SUPPORTED_UPLOAD_FORMATS
+
+logger = getLogger(__name__)
 
 
 class WebSocketIterableTranscriberServer:
     """
     WebSocket経由で音声ファイルの逐次文字起こしを提供するサーバー実装。
     クライアントから音声データをチャンクで受信し、一時ファイルに保存してTranscriberに渡す。
+    文字起こしはジョブキューを経由し、待機中のクライアントには待ち順位を通知する。
+    アップロード前にハッシュで問い合わせがあれば、キャッシュ済みの結果を返す。
+    キャッシュのキーは、受け取った音声からサーバーが計算したハッシュとアップロード形式で決める。
+    ストリーミングセッションでは録音中のPCMを受け取りながら確定したセグメントを返す。
+    接続直後に Hello を受け取った場合はバイナリ形式とアップロード形式を交渉し、
+    なければ従来のJSON形式で応答する。
+    状態の問い合わせには待ちジョブ数・実行中ジョブ数・同時実行数を返す。
+    多重化を交渉した接続では複数ジョブを並行に受け付け、サーバー状態を随時通知する。
+    Unixドメインソケット経由の接続に限り、共有ボリューム上のパスを受け取ってその場で文字起こしする。
+    metrics_port を指定すると、Prometheus 形式の計測値を同じプロセスからHTTPで公開する。
     """
 
     def __init__(
@@ -31,93 +70,401 @@ class WebSocketIterableTranscriberServer:
         host: str = "0.0.0.0",
         port: int = DEFAULT_WEBSOCKET_PORT,
         tmp_dir="./tmp",
+        concurrency: int = 1,
+        cache: TranscriptionCache | None = None,
+        unix_socket: str | None = None,
+        shared_roots: tuple[str, ...] = (),
+        status_interval: float = 2.0,
+        metrics_port: int | None = None,
     ):
         self.host = host
         self.port = port
+        self.unix_socket = unix_socket
+        self.shared_roots = tuple(os.path.realpath(root) for root in shared_roots)
         self.transcriber = transcriber
         self.tmp_dir = tmp_dir
+        self.scheduler = TranscriptionJobScheduler(transcriber, concurrency)
+        self.cache = cache
+        self.status_interval = status_interval
+        self.metrics_port = metrics_port
+        self.metrics = self._build_metrics()
+
+    async def handler(self, websocket, local: bool = False):
+        try:
+            channel, first = await accept_handshake(
+                websocket, (FEATURE_CACHE,) if self.cache is not None else ()
+            )
+        except (ValueError, KeyError) as e:
+            await MessageChannel(websocket).send(
+                ErrorMessage(error=f"Invalid message format: {e}")
+            )
+            return
+        if channel.protocol == PROTOCOL_MULTIPLEX:
+            await self._serve_multiplexed(MultiplexChannel.from_channel(channel), local)
+            return
+        await self._serve_job(channel, first, local)
+
+    async def _serve_multiplexed(self, channel: MultiplexChannel, local: bool) -> None:
+        """
+        1つの接続で届く複数ジョブをジョブIDごとに振り分け、並行に処理する。
+        CancelJobMessage を受け取ったジョブは止め、一時ファイルは _serve_job の後始末で消す。
+        ジョブIDは増え続けるので、既に終わったジョブ宛てのフレームは新しいジョブにせず捨てる。
+        """
+        jobs: dict[int, tuple[JobStream, asyncio.Task]] = {}
+        last_job_id = CONTROL_JOB
+
+        publisher = asyncio.create_task(self._publish_status(channel))
+        try:
+            while True:
+                try:
+                    job_id, item = await channel.recv_from()
+                except JobFrameError as e:
+                    if (job := jobs.get(e.job_id)) is not None:
+                        await channel.send_to(
+                            e.job_id, ErrorMessage(error=f"Invalid message format: {e}")
+                        )
+                        job[1].cancel()
+                    continue
+                except (ValueError, KeyError) as e:
+                    await channel.send(
+                        ErrorMessage(error=f"Invalid message format: {e}")
+                    )
+                    continue
+                if job_id == CONTROL_JOB:
+                    if isinstance(item, StatusQueryMessage):
+                        await channel.send(self.status())
+                    continue
+                job = jobs.get(job_id)
+                if isinstance(item, CancelJobMessage):
+                    if job is not None:
+                        job[1].cancel()
+                    continue
+                if job is None:
+                    if job_id <= last_job_id:
+                        continue
+                    last_job_id = job_id
+                    stream = JobStream(channel, job_id)
+                    task = asyncio.create_task(self._serve_job(stream, None, local))
+                    task.add_done_callback(
+                        lambda _, job_id=job_id: jobs.pop(job_id, None)
+                    )
+                    job = jobs[job_id] = (stream, task)
+                job[0].feed(item)
+        finally:
+            publisher.cancel()
+            for _, task in list(jobs.values()):
+                task.cancel()
 
-    async def handler(self, websocket):
+    async def _publish_status(self, channel: MultiplexChannel) -> None:
+        """多重化接続のクライアントへ、状態が変わるたびにサーバー状態を通知する"""
+        last: ServerStatusMessage | None = None
+        while True:
+            status = self.status()
+            if status != last:
+                await channel.send(status)
+                last = status
+            await asyncio.sleep(self.status_interval)
+
+    async def _serve_job(
+        self,
+        channel: JobChannel,
+        first: WebsocketMessage | bytes | None,
+        local: bool,
+    ) -> None:
+        received_at = time.monotonic()
+        upload_started: float | None = None
         os.makedirs(self.tmp_dir, exist_ok=True)
         with tempfile.NamedTemporaryFile(dir=self.tmp_dir) as tmpfile:
+            hasher = hashlib.sha256()
             while True:
-                message = await websocket.recv()
-                if isinstance(message, bytes):
-                    # バイナリは音声チャンク
-                    tmpfile.write(message)
-                    continue
-                data = json.loads(message)
                 try:
-                    msg: WebsocketMessage = parse_message(data)
+                    if first is not None:
+                        msg, first = first, None
+                    else:
+                        msg = await channel.recv()
+                    if isinstance(msg, bytes):
+                        # バイナリは音声チャンク
+                        if upload_started is None:
+                            upload_started = time.monotonic()
+                        tmpfile.write(msg)
+                        hasher.update(msg)
+                        continue
                     match msg:
-                        case EndOfAudioMessage(hash=client_hash):
+                        case CacheQueryMessage(hash=audio_hash):
+                            cached = (
+                                await asyncio.to_thread(self.cache.get, audio_hash)
+                                if self.cache is not None
+                                else None
+                            )
+                            await channel.send(
+                                CacheStatusMessage(hit=cached is not None)
+                            )
+                            if cached is not None:
+                                self.metrics.jobs.inc("cached")
+                                for segment in cached:
+                                    await self._send_segment(channel, segment)
+                                await channel.send(EndOfTranscriptionMessage())
+                                return
+                        case StatusQueryMessage():
+                            await channel.send(self.status())
+                            return
+                        case LocalFileMessage(path=path):
+                            audio_path = self._resolve_local_file(path, local)
+                            cache_key = (
+                                await asyncio.to_thread(file_sha256, audio_path)
+                                if self.cache is not None
+                                else ""
+                            )
+                            await self._run_job(
+                                channel, audio_path, cache_key, received_at
+                            )
+                            return
+                        case StartStreamMessage() as start:
+                            await self._handle_stream(channel, start)
+                            return
+                        case EndOfAudioMessage(
+                            hash=client_hash, upload_format=upload_format
+                        ):
                             tmpfile.flush()
-                            # ハッシュ検証
-                            tmpfile.seek(0)
-                            hasher = hashlib.sha256()
-                            while True:
-                                chunk = tmpfile.read(512 * 1024)
-                                if not chunk:
-                                    break
-                                hasher.update(chunk)
+                            if upload_started is not None:
+                                self.metrics.upload_seconds.observe(
+                                    time.monotonic() - upload_started
+                                )
                             server_hash = hasher.hexdigest()
                             if client_hash and client_hash != server_hash:
-                                await self._send(
-                                    websocket,
+                                self.metrics.errors.inc("hash_mismatch")
+                                await channel.send(
                                     ErrorMessage(
                                         error=f"Audio hash mismatch: client={client_hash}, server={server_hash}"
                                     ),
                                 )
                                 return
+                            if upload_format not in SUPPORTED_UPLOAD_FORMATS:
+                                raise ValueError(
+                                    f"Unsupported upload format: {upload_format}"
+                                )
+                            # キーは受け取ったバイト列のハッシュから作り、クライアントが指定したキーは使わない
+                            cache_key = (
+                                server_hash
+                                if upload_format == "original"
+                                else f"{server_hash}:{upload_format}"
+                            )
                             break
                         case _:
-                            await self._send(
-                                websocket,
-                                ErrorMessage(
-                                    error=f"Invalid message type: {type(msg)}"
-                                ),
+                            self.metrics.errors.inc("protocol")
+                            await channel.send(
+                                ErrorMessage(error=f"Invalid message type: {type(msg)}")
                             )
                             return
                 except Exception as e:
-                    await self._send(
-                        websocket, ErrorMessage(error=f"Invalid message format: {e}")
+                    self.metrics.errors.inc("protocol")
+                    await channel.send(
+                        ErrorMessage(error=f"Invalid message format: {e}")
                     )
                     return
-            audio_path = tmpfile.name
-            # 逐次セグメントを送信
-            try:
-                async for segment in self.transcriber.transcribe_iter(audio_path):
-                    await self._send(
-                        websocket,
-                        TranscriptionSegmentMessage(
-                            start=segment.start,
-                            end=segment.end,
-                            text=segment.text,
-                        ),
-                    )
-                await self._send(websocket, EndOfTranscriptionMessage())
-            except Exception as e:
-                await self._send(
-                    websocket, ErrorMessage(error=f"Transcription error: {e}")
-                )
+            await self._run_job(channel, tmpfile.name, cache_key, received_at)
 
-    async def _send(self, websocket: Any, msg: WebsocketMessage) -> None:
-        await websocket.send(json.dumps(msg.to_dict()))
+    def status(self) -> ServerStatusMessage:
+        return ServerStatusMessage(
+            queue_depth=self.scheduler.queue_depth,
+            active_jobs=self.scheduler.active_jobs,
+            capacity=self.scheduler.concurrency,
+        )
 
-    async def start_server(self) -> None:
-        self._server = await websockets.serve(
-            self.handler,
-            self.host,
-            self.port,
-            max_size=8 * 1024 * 1024,
-            ping_interval=PING_TIMEOUT,
-            ping_timeout=PING_TIMEOUT,
+    async def _run_job(
+        self,
+        channel: JobChannel,
+        audio_path: str,
+        cache_key: str,
+        received_at: float,
+    ) -> None:
+        if self.cache is not None and cache_key:
+            # アップロード前に問い合わせなかった変換済みの音声なども、ここでキャッシュを確認する
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                self.metrics.jobs.inc("cached")
+                for segment in cached:
+                    await self._send_segment(channel, segment)
+                await channel.send(EndOfTranscriptionMessage())
+                return
+
+        job = TranscriptionJob(audio_path=audio_path)
+        segments: list[Segment] = []
+        try:
+            async with contextlib.aclosing(self.scheduler.process(job)) as items:
+                async for item in items:
+                    match item:
+                        case int(position):
+                            await channel.send(QueuePositionMessage(position=position))
+                        case Segment() as segment:
+                            if not segments:
+                                self.metrics.first_segment_seconds.observe(
+                                    time.monotonic() - job.submitted_at
+                                )
+                            segments.append(segment)
+                            await self._send_segment(channel, segment)
+            await channel.send(EndOfTranscriptionMessage())
+            self._record_job(job, segments, received_at)
+            if self.cache is not None and cache_key:
+                await asyncio.to_thread(self.cache.set, cache_key, segments)
+        except Exception as e:
+            self.metrics.jobs.inc("failed")
+            self.metrics.errors.inc("transcription")
+            await channel.send(ErrorMessage(error=f"Transcription error: {e}"))
+
+    def _record_job(
+        self, job: TranscriptionJob, segments: list[Segment], received_at: float
+    ) -> None:
+        finished_at = time.monotonic()
+        self.metrics.jobs.inc("completed")
+        self.metrics.queue_wait_seconds.observe(job.wait_seconds)
+        self.metrics.total_seconds.observe(finished_at - received_at)
+        # 音声長はセグメントの終了位置で近似する
+        if segments and segments[-1].end > 0 and job.started_at is not None:
+            self.metrics.real_time_factor.observe(
+                (finished_at - job.started_at) / segments[-1].end
+            )
+
+    def _build_metrics(self) -> TranscriptionServerMetrics:
+        metrics = TranscriptionServerMetrics()
+        metrics.gauge(
+            "transcription_queue_depth",
+            "Jobs waiting for a worker",
+            lambda: self.scheduler.queue_depth,
+        )
+        metrics.gauge(
+            "transcription_active_jobs",
+            "Jobs being transcribed",
+            lambda: self.scheduler.active_jobs,
+        )
+        metrics.gauge(
+            "transcription_capacity",
+            "Jobs that can be transcribed concurrently",
+            lambda: self.scheduler.concurrency,
+        )
+        metrics.gauge(
+            "transcription_model_resident_bytes",
+            "Estimated memory used by loaded models",
+            model_registry.resident_bytes,
         )
+        metrics.gauge(
+            "transcription_models_loaded",
+            "Models currently loaded",
+            lambda: len(model_registry.stats()),
+        )
+        if self.cache is not None:
+            cache = self.cache
+            metrics.gauge(
+                "transcription_cache_hits_total",
+                "Transcription cache hits",
+                lambda: cache.hits,
+                metric_type="counter",
+            )
+            metrics.gauge(
+                "transcription_cache_misses_total",
+                "Transcription cache misses",
+                lambda: cache.misses,
+                metric_type="counter",
+            )
+        return metrics
+
+    def _resolve_local_file(self, path: str, local: bool) -> str:
+        if not local:
+            raise ValueError("Local files are only accepted over the Unix socket")
+        resolved = os.path.realpath(path)
+        if not any(
+            os.path.commonpath([resolved, root]) == root for root in self.shared_roots
+        ):
+            raise ValueError(f"Path is outside the shared roots: {path}")
+        if not os.path.isfile(resolved):
+            raise ValueError(f"File not found: {path}")
+        return resolved
+
+    async def _handle_stream(
+        self, channel: JobChannel, start: StartStreamMessage
+    ) -> None:
+        session = StreamingTranscriptionSession(
+            self.scheduler,
+            self.tmp_dir,
+            sample_rate=start.sample_rate,
+            channels=start.channels,
+            sample_width=start.sample_width,
+        )
+        finished = asyncio.Event()
+
+        async def transcribe_periodically() -> None:
+            while not finished.is_set():
+                for segment in await session.poll():
+                    await self._send_segment(channel, segment)
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(finished.wait(), timeout=1.0)
+
+        worker = asyncio.create_task(transcribe_periodically())
+        try:
+            while True:
+                match await channel.recv():
+                    case bytes() as pcm:
+                        session.feed(pcm)
+                    case EndOfAudioMessage():
+                        break
+                    case msg:
+                        await channel.send(
+                            ErrorMessage(error=f"Invalid message type: {type(msg)}")
+                        )
+                        return
+            finished.set()
+            await worker
+            for segment in await session.finish():
+                await self._send_segment(channel, segment)
+            await channel.send(EndOfTranscriptionMessage())
+        except Exception as e:
+            logger.exception("Streaming transcription failed")
+            self.metrics.errors.inc("stream")
+            await channel.send(ErrorMessage(error=f"Transcription error: {e}"))
+        finally:
+            finished.set()
+            if not worker.done():
+                worker.cancel()
+
+    async def _send_segment(self, channel: JobChannel, segment: Segment) -> None:
+        await channel.send(
+            TranscriptionSegmentMessage(
+                start=segment.start, end=segment.end, text=segment.text
+            )
+        )
+
+    async def start_server(self) -> None:
+        options = {
+            "max_size": 8 * 1024 * 1024,
+            "ping_interval": PING_TIMEOUT,
+            "ping_timeout": PING_TIMEOUT,
+        }
+        self._servers = [
+            await websockets.serve(self.handler, self.host, self.port, **options)
+        ]
         print(
             f"WebSocketIterableTranscriberServer running on ws://{self.host}:{self.port}"
         )
-        await self._server.wait_closed()
+        if self.metrics_port is not None:
+            self._metrics_server = MetricsHttpServer(
+                self.metrics.registry, self.host, self.metrics_port
+            )
+            await self._metrics_server.start()
+        if self.unix_socket is not None:
+            if os.path.exists(self.unix_socket):
+                os.unlink(self.unix_socket)
+            self._servers.append(
+                await websockets.unix_serve(
+                    functools.partial(self.handler, local=True),
+                    self.unix_socket,
+                    **options,
+                )
+            )
+            print(f"WebSocketIterableTranscriberServer listening on {self.unix_socket}")
+        await asyncio.gather(*(server.wait_closed() for server in self._servers))
 
     def stop_server(self) -> None:
-        if hasattr(self, "_server"):
-            self._server.close()
+        for server in getattr(self, "_servers", []):
+            server.close()
+        if hasattr(self, "_metrics_server"):
+            self._metrics_server.close()
@@ -2,7 +2,8 @@ import os
 from logging import getLogger
 from typing import Literal
 
-from .transcriber import Transcriber
+from .model_registry import ModelKey, model_registry
+from .transcriber import PreloadableTranscriber, Transcriber
 
 # [openai/whisper: Robust Speech Recognition via Large-Scale Weak Supervision](https://github.com/openai/whisper?tab=readme-ov-file#available-models-and-languages)
 WhisperModelSize = Literal[
@@ -21,7 +22,10 @@ WhisperModelSize = Literal[
 logger = getLogger(__name__)
 
 
-class WhisperTranscriber(Transcriber):
+WARMUP_SAMPLES = 16000
+
+
+class WhisperTranscriber(Transcriber, PreloadableTranscriber):
     """Whisper を利用して音声をテキスト化する実装クラス"""
 
     def __init__(
@@ -29,27 +33,38 @@ class WhisperTranscriber(Transcriber):
     ) -> None:
         self.model_size = model_size
         self.beam_size = beam_size
-        self._model = None
 
-    def _get_model(self):
-        if self._model is None:
-            import whisper
+    @property
+    def model_key(self) -> ModelKey:
+        return ModelKey("whisper", self.model_size, "default")
+
+    def _load_model(self):
+        import whisper
+
+        logger.info(
+            f"Loading Whisper model: size='{self.model_size}', beam_size='{self.beam_size}'"
+        )
+        return whisper.load_model(self.model_size)
 
-            logger.info(
-                f"Loading Whisper model: size='{self.model_size}', beam_size='{self.beam_size}'"
-            )
+    def preload(self, warmup: bool = True) -> None:
+        with model_registry.use(self.model_key, self._load_model) as model:
+            if warmup:
+                import numpy as np
 
-            self._model = whisper.load_model(self.model_size)
-        return self._model
+                model.transcribe(
+                    np.zeros(WARMUP_SAMPLES, dtype=np.float32),
+                    beam_size=self.beam_size,
+                    language="ja",
+                )
 
     def transcribe(self, audio_path: str) -> str:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"音声ファイルが見つかりません: {audio_path}")
         try:
-            model = self._get_model()
-            result = model.transcribe(
-                audio_path, beam_size=self.beam_size, language="ja"
-            )
+            with model_registry.use(self.model_key, self._load_model) as model:
+                result = model.transcribe(
+                    audio_path, beam_size=self.beam_size, language="ja"
+                )
             segments = result.get("segments", [])
             return "\n".join([segment["text"] for segment in segments])  # type: ignore
         except Exception as e:
@@ -0,0 +1,61 @@
+import asyncio
+from collections.abc import AsyncGenerator
+
+from src.summarizer.prompt_provider.markdown import MarkdownSummarizePromptProvider
+from src.summarizer.summarizer import PromptedSummarizer, Summary
+
+
+class FakeSummarizer(PromptedSummarizer):
+    """
+    テスト用の要約器。delay 秒後に content(省略時はモデル名)を返すか、error なら失敗する。
+    呼び出し回数・受け取ったプロンプト・キャンセルされたかを記録する。
+    """
+
+    def __init__(
+        self,
+        model: str = "fake",
+        content: str | None = None,
+        delay: float = 0.0,
+        error: bool = False,
+    ):
+        self.model = model
+        self.content = model if content is None else content
+        self.delay = delay
+        self.error = error
+        self.summarize_prompt_provider = MarkdownSummarizePromptProvider()
+        self.calls = 0
+        self.prompts: list[str] = []
+        self.cancelled = False
+
+    def complete(self, system_prompt: str, prompt: str) -> Summary:
+        self._record(prompt)
+        return self._respond()
+
+    async def complete_async(self, system_prompt: str, prompt: str) -> Summary:
+        self._record(prompt)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self._respond()
+
+    async def stream_async(
+        self, system_prompt: str, prompt: str
+    ) -> AsyncGenerator[Summary, None]:
+        summary = await self.complete_async(system_prompt, prompt)
+        for end in range(1, len(summary.content) + 1):
+            yield Summary(
+                content=summary.content[:end],
+                input_token_count=summary.input_token_count,
+                output_token_count=summary.output_token_count,
+            )
+
+    def _record(self, prompt: str) -> None:
+        self.calls += 1
+        self.prompts.append(prompt)
+
+    def _respond(self) -> Summary:
+        if self.error:
+            raise RuntimeError(f"{self.model} failed")
+        return Summary(content=self.content, input_token_count=3, output_token_count=5)
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import time
+
+from src.summarizer.caching import CachingSummarizer
+from tests.conftest import FakeSummarizer
+
+
+def test_repeated_prompt_hits_the_cache(tmp_path):
+    summarizer = FakeSummarizer(content="要約")
+    caching = CachingSummarizer(summarizer, tmp_path)
+    assert caching.complete("system", "prompt").output_token_count == 5
+    cached = caching.complete("system", "prompt")
+    assert (cached.content, cached.output_token_count) == ("要約", 0)
+    assert summarizer.calls == 1
+    assert (caching.hits, caching.misses) == (1, 1)
+
+
+def test_different_prompt_misses(tmp_path):
+    summarizer = FakeSummarizer()
+    caching = CachingSummarizer(summarizer, tmp_path)
+    caching.complete("system", "a")
+    caching.complete("system", "b")
+    assert summarizer.calls == 2
+    assert (caching.hits, caching.misses) == (0, 2)
+
+
+def test_async_and_stream_share_the_cache(tmp_path):
+    summarizer = FakeSummarizer(content="abc")
+    caching = CachingSummarizer(summarizer, tmp_path)
+
+    async def main():
+        streamed = [s.content async for s in caching.stream_async("system", "p")]
+        cached = await caching.complete_async("system", "p")
+        return streamed, cached
+
+    streamed, cached = asyncio.run(main())
+    assert streamed == ["a", "ab", "abc"]
+    assert (cached.content, cached.input_token_count) == ("abc", 0)
+    assert summarizer.calls == 1
+
+
+def test_oldest_entries_are_evicted(tmp_path):
+    summarizer = FakeSummarizer()
+    caching = CachingSummarizer(summarizer, tmp_path, max_entries=2)
+    for prompt in ("a", "b", "c"):
+        caching.complete("system", prompt)
+        # mtime の解像度が粗い環境でも順序が決まるよう、古い時刻にずらしておく
+        for path in tmp_path.glob("*.json"):
+            os.utime(path, (path.stat().st_atime, path.stat().st_mtime - 10))
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    caching.complete("system", "a")
+    assert summarizer.calls == 4
+
+
+def test_expired_entries_miss(tmp_path):
+    summarizer = FakeSummarizer()
+    caching = CachingSummarizer(summarizer, tmp_path, max_age_seconds=60)
+    caching.complete("system", "a")
+    old = time.time() - 120
+    for path in tmp_path.glob("*.json"):
+        os.utime(path, (old, old))
+    caching.complete("system", "a")
+    assert summarizer.calls == 2
+    assert caching.hits == 0
+
+
+def test_write_failure_still_returns_the_summary(tmp_path, monkeypatch):
+    caching = CachingSummarizer(FakeSummarizer(), tmp_path)
+
+    def fail(key, value):
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(caching._cache, "set", fail)
+    assert caching.complete("system", "a").content == "fake"
+    assert asyncio.run(caching.complete_async("system", "a")).content == "fake"
@@ -0,0 +1,49 @@
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from src.transcriber.chunk_planner import ChunkPlanner, Span
+
+
+def _tone(ms: int) -> AudioSegment:
+    return Sine(440).to_audio_segment(duration=ms)
+
+
+def _silence(ms: int) -> AudioSegment:
+    return AudioSegment.silent(duration=ms, frame_rate=44100)
+
+
+def test_long_silences_are_dropped_and_spans_padded():
+    audio = _tone(1000) + _silence(3000) + _tone(1000)
+    (chunk,) = ChunkPlanner(target_ms=10_000, max_ms=20_000).plan(audio)
+    assert [(s.start, s.end) for s in chunk.spans] == [(0, 1200), (3800, 5000)]
+    rendered = chunk.render(audio, gap_ms=100)
+    assert len(rendered) == 1200 + 100 + 1200
+
+
+def test_short_pauses_stay_inside_one_span():
+    audio = _tone(1000) + _silence(300) + _tone(1000)
+    (chunk,) = ChunkPlanner().plan(audio)
+    assert chunk.spans == [Span(0, len(audio))]
+
+
+def test_chunks_close_at_target_length():
+    audio = AudioSegment.empty()
+    for _ in range(4):
+        audio += _tone(600) + _silence(1000)
+    planner = ChunkPlanner(target_ms=1000, max_ms=1500, padding_ms=0)
+    chunks = planner.plan(audio)
+    assert [len(chunk.spans) for chunk in chunks] == [2, 2]
+    assert all(chunk.voiced_duration <= planner.max_ms for chunk in chunks)
+
+
+def test_long_speech_is_split_at_max_length():
+    chunks = ChunkPlanner(max_ms=1000, padding_ms=0).plan(_tone(2500))
+    assert [chunk.spans for chunk in chunks] == [
+        [Span(0, 1000)],
+        [Span(1000, 2000)],
+        [Span(2000, 2500)],
+    ]
+
+
+def test_empty_audio_has_no_chunks():
+    assert ChunkPlanner().plan(AudioSegment.empty()) == []
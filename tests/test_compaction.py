@@ -0,0 +1,69 @@
+import pytest
+
+from src.summarizer.compaction import compact_transcript
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "予算は1000000円です",
+        "ID 121212 を確認してください",
+        "https://example.com/aaaaaa を見てください",
+        "バージョン 2.2.2 に上げました",
+        "ははは、面白いですね",
+    ],
+)
+def test_keeps_digits_ids_and_urls(line):
+    assert compact_transcript(line).text == line
+
+
+def test_collapses_repeated_phrases():
+    text = "ありがとうございました。ありがとうございました。ありがとうございました。"
+    assert compact_transcript(text).text == "ありがとうございました。"
+
+
+def test_collapses_repeated_phrases_at_line_end():
+    text = "次回も、よろしくお願いします よろしくお願いします よろしくお願いします"
+    assert compact_transcript(text).text == "次回も、よろしくお願いします"
+
+
+def test_does_not_collapse_inside_words():
+    text = "こんにちはこんにちはこんにちは世界"
+    assert compact_transcript(text).text == text
+
+
+def test_removes_fillers():
+    assert compact_transcript("えーと、それでは始めます").text == "それでは始めます"
+
+
+def test_drops_recently_repeated_lines():
+    text = "では始めます\n議題は予算です\nでは始めます"
+    assert compact_transcript(text).text == "では始めます 議題は予算です"
+
+
+def test_merges_only_lines_from_the_same_speaker():
+    text = "\n".join(
+        [
+            "[00:00:01] 田中: 予算の話をします",
+            "[00:00:05] 田中: 来月までに決めます",
+            "[00:00:09] 佐藤: 了解です",
+            "[00:00:12] 田中: お願いします",
+        ]
+    )
+    assert compact_transcript(text).text.splitlines() == [
+        "[00:00:01] 田中: 予算の話をします 来月までに決めます",
+        "[00:00:09] 佐藤: 了解です",
+        "[00:00:12] 田中: お願いします",
+    ]
+
+
+def test_same_text_from_different_speakers_is_kept():
+    text = "[00:00:01] 田中: はい\n[00:00:02] 佐藤: はい"
+    assert compact_transcript(text).text == text
+
+
+def test_splits_lines_at_max_line_chars():
+    text = "\n".join(["あいうえお"] + [f"{i}行目の発言です" for i in range(3)])
+    result = compact_transcript(text, max_line_chars=20)
+    assert all(len(line) <= 20 for line in result.text.splitlines())
+    assert result.saved_tokens >= 0
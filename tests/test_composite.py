@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from src.summarizer.composite import CompositeSummarizer, ProviderStats
+from tests.conftest import FakeSummarizer
+
+
+def test_p95_needs_min_samples():
+    stats = ProviderStats()
+    for latency in (1.0, 2.0, 3.0, 4.0):
+        stats.record_success(latency)
+    assert stats.p95() is None
+    stats.record_success(10.0)
+    assert stats.p95() == 10.0
+
+
+def test_primary_uses_only_the_first_provider():
+    primary, backup = FakeSummarizer("a", error=True), FakeSummarizer("b")
+    composite = CompositeSummarizer([primary, backup], policy="primary")
+    with pytest.raises(RuntimeError, match="a failed"):
+        asyncio.run(composite.complete_async("", ""))
+    assert backup.calls == 0
+
+
+def test_fallback_on_error():
+    primary, backup = FakeSummarizer("a", error=True), FakeSummarizer("b")
+    composite = CompositeSummarizer([primary, backup], policy="fallback")
+    assert asyncio.run(composite.complete_async("", "")).content == "b"
+    assert composite.stats[id(primary)].errors == 1
+
+
+def test_fallback_on_timeout_cancels_the_slow_provider():
+    primary, backup = FakeSummarizer("a", delay=10), FakeSummarizer("b")
+    composite = CompositeSummarizer(
+        [primary, backup], policy="fallback", fallback_timeout=0.05
+    )
+    assert asyncio.run(composite.complete_async("", "")).content == "b"
+    assert primary.cancelled
+
+
+def test_sync_complete_falls_back_in_order():
+    primary, backup = FakeSummarizer("a", error=True), FakeSummarizer("b")
+    composite = CompositeSummarizer([primary, backup], policy="fallback")
+    assert composite.complete("", "").content == "b"
+
+
+def test_hedge_returns_the_first_response_and_cancels_the_loser():
+    slow, fast = FakeSummarizer("slow", delay=10), FakeSummarizer("fast", delay=0.01)
+    composite = CompositeSummarizer(
+        [slow, fast], policy="hedge", initial_hedge_delay=0.05
+    )
+    assert asyncio.run(composite.complete_async("", "")).content == "fast"
+    assert slow.calls == fast.calls == 1
+    assert slow.cancelled
+
+
+def test_hedge_keeps_the_first_provider_when_it_responds_in_time():
+    primary, backup = FakeSummarizer("a", delay=0.01), FakeSummarizer("b")
+    composite = CompositeSummarizer(
+        [primary, backup], policy="hedge", initial_hedge_delay=1.0
+    )
+    assert asyncio.run(composite.complete_async("", "")).content == "a"
+    assert backup.calls == 0
+
+
+def test_ranking_demotes_providers_after_consecutive_errors():
+    primary, backup = FakeSummarizer("a", error=True), FakeSummarizer("b")
+    composite = CompositeSummarizer(
+        [primary, backup], policy="fallback", max_consecutive_errors=2
+    )
+    for _ in range(2):
+        asyncio.run(composite.complete_async("", ""))
+    assert asyncio.run(composite.complete_async("", "")).content == "b"
+    assert primary.calls == 2
+
+
+def test_primary_recovers_after_consecutive_errors():
+    primary, backup = FakeSummarizer("a", error=True), FakeSummarizer("b")
+    composite = CompositeSummarizer(
+        [primary, backup], policy="primary", max_consecutive_errors=2
+    )
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            asyncio.run(composite.complete_async("", ""))
+    primary.error = False
+    assert asyncio.run(composite.complete_async("", "")).content == "a"
+    assert composite.complete("", "").content == "a"
+    assert backup.calls == 0
+
+
+def test_demoted_provider_is_retried_after_the_cooldown():
+    primary, backup = FakeSummarizer("a", error=True), FakeSummarizer("b")
+    composite = CompositeSummarizer(
+        [primary, backup],
+        policy="fallback",
+        max_consecutive_errors=2,
+        demotion_seconds=60,
+    )
+    for _ in range(2):
+        asyncio.run(composite.complete_async("", ""))
+    primary.error = False
+    assert asyncio.run(composite.complete_async("", "")).content == "b"
+    # 後回しにしてから demotion_seconds 秒が過ぎたことにする
+    composite.stats[id(primary)].last_error_at -= 60
+    assert asyncio.run(composite.complete_async("", "")).content == "a"
+    assert composite.stats[id(primary)].consecutive_errors == 0
+
+
+def test_stream_falls_back_before_the_first_chunk():
+    primary, backup = FakeSummarizer("a", error=True), FakeSummarizer("bc")
+    composite = CompositeSummarizer([primary, backup], policy="fallback")
+
+    async def main():
+        return [summary.content async for summary in composite.stream_async("", "")]
+
+    assert asyncio.run(main()) == ["b", "bc"]
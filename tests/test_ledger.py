@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from src.ledger.call_ledger import CallLedger, LedgerEntry
+from src.ledger.context import ledger_context
+from src.summarizer.ledger import LedgerSummarizer
+from tests.conftest import FakeSummarizer
+
+
+@pytest.fixture
+def ledger(tmp_path) -> CallLedger:
+    return CallLedger(tmp_path / "ledger.sqlite3")
+
+
+def test_records_success_and_failure(ledger):
+    LedgerSummarizer(FakeSummarizer(), ledger).complete("", "")
+    with pytest.raises(RuntimeError):
+        LedgerSummarizer(FakeSummarizer(error=True), ledger).complete("", "")
+    ok, failed = ledger.entries()
+    assert (ok.success, ok.input_tokens, ok.output_tokens) == (True, 3, 5)
+    assert (failed.success, failed.input_tokens) == (False, 0)
+    assert ok.stage == "summary"
+
+
+def test_cancelled_call_is_recorded_as_failure(ledger):
+    summarizer = LedgerSummarizer(FakeSummarizer(delay=10), ledger)
+
+    async def main():
+        with ledger_context(guild_id=42, stage="map"):
+            task = asyncio.create_task(summarizer.complete_async("", ""))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    (entry,) = ledger.entries()
+    assert not entry.success
+    assert (entry.guild_id, entry.stage) == (42, "map")
+
+
+def test_stream_closed_early_is_recorded_as_failure(ledger):
+    summarizer = LedgerSummarizer(FakeSummarizer(), ledger)
+
+    async def main():
+        stream = summarizer.stream_async("", "")
+        await anext(stream)
+        await stream.aclose()
+        async for _ in summarizer.stream_async("", ""):
+            pass
+
+    asyncio.run(main())
+    closed, finished = ledger.entries()
+    assert not closed.success
+    assert finished.success and finished.output_tokens == 5
+
+
+def test_report_groups_by_guild_and_kind(ledger):
+    for latency, success in ((1.0, True), (3.0, True), (9.0, False)):
+        ledger.record(
+            LedgerEntry(
+                kind="llm",
+                provider="p",
+                model="m",
+                latency_seconds=latency,
+                success=success,
+                guild_id=1,
+            )
+        )
+    (row,) = ledger.report()
+    assert (row.calls, row.errors) == (3, 1)
+    assert (row.p50_latency, row.p95_latency) == (1.0, 3.0)
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from src.summarizer.map_reduce import MapReduceSummarizer
+from tests.conftest import FakeSummarizer
+
+# 1行10トークンで100行、chunk_tokens=50 なら20個に分かれる
+TRANSCRIPTION = "\n".join(["a" * 36] * 100)
+
+
+def _rounds(summarizer: FakeSummarizer) -> int:
+    return sum("の 1/" in prompt for prompt in summarizer.prompts)
+
+
+def test_short_transcription_is_summarized_once():
+    summarizer = FakeSummarizer()
+    summary = MapReduceSummarizer(summarizer).generate_meeting_notes("こんにちは")
+    assert summary.content == "fake"
+    assert summarizer.calls == 1
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_reduce_stops_after_max_rounds(use_async):
+    # 要約ごとに半分ほどに縮むが、3回目でようやく上限に収まる
+    summarizer = FakeSummarizer(content="b" * 60)
+    map_reduce = MapReduceSummarizer(summarizer, chunk_tokens=50, max_rounds=2)
+    if use_async:
+        asyncio.run(map_reduce.generate_meeting_notes_async(TRANSCRIPTION))
+    else:
+        map_reduce.generate_meeting_notes(TRANSCRIPTION)
+    assert _rounds(summarizer) == 2
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_reduce_stops_when_notes_do_not_shrink(use_async):
+    summarizer = FakeSummarizer(content="b" * 400)
+    map_reduce = MapReduceSummarizer(summarizer, chunk_tokens=50)
+    if use_async:
+        summary = asyncio.run(map_reduce.generate_meeting_notes_async(TRANSCRIPTION))
+    else:
+        summary = map_reduce.generate_meeting_notes(TRANSCRIPTION)
+    assert _rounds(summarizer) == 1
+    assert summarizer.calls == 21
+    assert summary.input_token_count == 21 * 3
+
+
+def test_rejects_non_positive_rounds():
+    with pytest.raises(ValueError):
+        MapReduceSummarizer(FakeSummarizer(), max_rounds=0)
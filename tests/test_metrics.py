@@ -0,0 +1,43 @@
+import asyncio
+
+from src.transcriber import metrics as metrics_module
+from src.transcriber.metrics import Counter, MetricsHttpServer, MetricsRegistry
+
+
+async def _serve() -> tuple[MetricsHttpServer, int]:
+    registry = MetricsRegistry()
+    registry.register(Counter("jobs_total", "Jobs")).inc()
+    server = MetricsHttpServer(registry, host="127.0.0.1", port=0)
+    await server.start()
+    assert server._server is not None
+    return server, server._server.sockets[0].getsockname()[1]
+
+
+def test_serves_metrics():
+    async def main():
+        server, port = await _serve()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+        response = await asyncio.wait_for(reader.read(), timeout=1)
+        writer.close()
+        server.close()
+        return response
+
+    response = asyncio.run(main())
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    assert b"jobs_total 1" in response
+
+
+def test_unfinished_headers_time_out(monkeypatch):
+    monkeypatch.setattr(metrics_module, "REQUEST_TIMEOUT", 0.05)
+
+    async def main():
+        server, port = await _serve()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n")
+        response = await asyncio.wait_for(reader.read(), timeout=1)
+        writer.close()
+        server.close()
+        return response
+
+    assert asyncio.run(main()) == b""
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from src.transcriber import model_registry as registry_module
+from src.transcriber.model_registry import ModelKey, ModelRegistry
+
+MB = 1024**2
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """読み込みで増える常駐メモリを、テストから決められるようにする"""
+    value = [0]
+    monkeypatch.setattr(registry_module, "_process_resident_bytes", lambda: value[0])
+    return value
+
+
+def _loader(rss, size: int, name: str):
+    def load():
+        rss[0] += size
+        return name
+
+    return load
+
+
+def test_evicts_before_loading_a_model_of_known_size(rss):
+    registry = ModelRegistry(memory_budget_bytes=100 * MB)
+    small, large = ModelKey("fw", "small", "int8"), ModelKey("fw", "large", "int8")
+    with registry.use(small, _loader(rss, 60 * MB, "small")):
+        pass
+
+    loaded_beside: list[list[ModelKey]] = []
+
+    def load_large():
+        loaded_beside.append([stats.key for stats in registry.stats()])
+        return _loader(rss, 80 * MB, "large")()
+
+    with registry.use(large, load_large) as model:
+        assert model == "large"
+    # 初めて読むモデルは、読み込み済みの最大のモデルと同じ大きさと見積もる
+    assert loaded_beside == [[]]
+    assert [stats.key for stats in registry.stats()] == [large]
+
+
+def test_does_not_evict_models_in_use(rss):
+    registry = ModelRegistry(memory_budget_bytes=100 * MB)
+    first, second = ModelKey("fw", "a", "int8"), ModelKey("fw", "b", "int8")
+    with (
+        registry.use(first, _loader(rss, 80 * MB, "a")),
+        registry.use(second, _loader(rss, 80 * MB, "b")),
+    ):
+        assert {stats.key for stats in registry.stats()} == {first, second}
+    assert registry.resident_bytes() == 160 * MB
+
+
+def test_concurrent_requests_load_once(rss):
+    registry = ModelRegistry()
+    key = ModelKey("fw", "a", "int8")
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "a"
+
+    results = []
+
+    def use():
+        with registry.use(key, load) as model:
+            results.append(model)
+
+    threads = [threading.Thread(target=use) for _ in range(3)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ["a"] * 3
+
+
+def test_idle_models_are_evicted_except_the_requested_one(rss):
+    registry = ModelRegistry(idle_seconds=0)
+    first, second = ModelKey("fw", "a", "int8"), ModelKey("fw", "b", "int8")
+    with registry.use(first, _loader(rss, MB, "a")):
+        pass
+    with registry.use(second, _loader(rss, MB, "b")):
+        assert [stats.key for stats in registry.stats()] == [second]
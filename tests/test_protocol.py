@@ -0,0 +1,279 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from src.transcriber.connection import MultiplexedConnection
+from src.transcriber.message_types import (
+    CacheQueryMessage,
+    CancelJobMessage,
+    EndOfAudioMessage,
+    EndOfTranscriptionMessage,
+    ErrorMessage,
+    HelloAckMessage,
+    HelloMessage,
+    QueuePositionMessage,
+    ServerStatusMessage,
+    TranscriptionSegmentMessage,
+)
+from src.transcriber.protocol import (
+    CODECS,
+    CONTROL_JOB,
+    FEATURE_CACHE,
+    PROTOCOL_BINARY,
+    PROTOCOL_JSON,
+    PROTOCOL_MULTIPLEX,
+    BinaryCodec,
+    JsonCodec,
+    MultiplexChannel,
+    MultiplexCodec,
+    accept_handshake,
+    request_handshake,
+)
+from src.transcriber.websocket_server import WebSocketIterableTranscriberServer
+
+MESSAGES = [
+    TranscriptionSegmentMessage(start=1.25, end=3.5, text="こんにちは、世界"),
+    TranscriptionSegmentMessage(start=0.0, end=0.0, text=""),
+    QueuePositionMessage(position=3),
+    EndOfTranscriptionMessage(),
+    ErrorMessage(error="boom"),
+    CacheQueryMessage(hash="abc"),
+    EndOfAudioMessage(hash="abc"),
+    HelloAckMessage(
+        protocol=PROTOCOL_BINARY, upload_formats=("opus",), features=(FEATURE_CACHE,)
+    ),
+    ServerStatusMessage(queue_depth=1, active_jobs=2, capacity=4),
+    CancelJobMessage(),
+]
+
+
+@pytest.mark.parametrize("codec", list(CODECS.values()), ids=lambda c: type(c).__name__)
+@pytest.mark.parametrize("msg", MESSAGES, ids=lambda m: type(m).__name__)
+def test_round_trip(codec, msg):
+    assert codec.decode(codec.encode(msg)) == msg
+
+
+@pytest.mark.parametrize("codec", list(CODECS.values()), ids=lambda c: type(c).__name__)
+def test_audio_round_trip(codec):
+    data = bytes(range(256)) * 4
+    assert codec.decode(codec.encode_audio(data)) == data
+
+
+def test_json_codec_keeps_legacy_frames():
+    codec = JsonCodec()
+    assert codec.encode_audio(b"pcm") == b"pcm"
+    assert isinstance(codec.encode(QueuePositionMessage(position=1)), str)
+
+
+def test_binary_codec_packs_hot_messages():
+    codec = BinaryCodec()
+    assert len(codec.encode(EndOfTranscriptionMessage())) == 1
+    assert len(codec.encode(QueuePositionMessage(position=7))) == 5
+    segment = codec.encode(TranscriptionSegmentMessage(start=0, end=1, text="ab"))
+    assert len(segment) == 1 + 16 + 2
+
+
+def test_binary_codec_accepts_json_text_frames():
+    codec = BinaryCodec()
+    frame = JsonCodec().encode(ErrorMessage(error="legacy"))
+    assert codec.decode(frame) == ErrorMessage(error="legacy")
+
+
+@pytest.mark.parametrize("frame", [b"", bytes([255])])
+def test_binary_codec_rejects_invalid_frames(frame):
+    with pytest.raises(ValueError):
+        BinaryCodec().decode(frame)
+
+
+def test_multiplex_codec_routes_by_job():
+    codec = MultiplexCodec()
+    msg = TranscriptionSegmentMessage(start=0.5, end=1.0, text="x")
+    assert codec.decode_job(codec.encode_job(42, msg)) == (42, msg)
+    assert codec.decode_job(codec.encode_job_audio(7, b"pcm")) == (7, b"pcm")
+    assert codec.decode_job(codec.encode(msg)) == (CONTROL_JOB, msg)
+
+
+class _Pipe:
+    """片方向ずつのキューをつないだ、WebSocket の代わり"""
+
+    def __init__(self, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        self.inbox = inbox
+        self.outbox = outbox
+
+    async def send(self, frame):
+        await self.outbox.put(frame)
+
+    async def recv(self):
+        return await self.inbox.get()
+
+    async def close(self):
+        pass
+
+
+def _pipes() -> tuple[_Pipe, _Pipe]:
+    a: asyncio.Queue = asyncio.Queue()
+    b: asyncio.Queue = asyncio.Queue()
+    return _Pipe(a, b), _Pipe(b, a)
+
+
+def test_handshake_negotiates_protocol_formats_and_features():
+    async def main():
+        client, server = _pipes()
+        client_channel, (server_channel, first) = await asyncio.gather(
+            request_handshake(
+                client,
+                (PROTOCOL_MULTIPLEX, PROTOCOL_BINARY),
+                ("opus", "original"),
+            ),
+            accept_handshake(server, (FEATURE_CACHE,)),
+        )
+        return client_channel, server_channel, first
+
+    client_channel, server_channel, first = asyncio.run(main())
+    assert first is None
+    assert client_channel.protocol == server_channel.protocol == PROTOCOL_MULTIPLEX
+    assert client_channel.upload_formats == ("opus", "original")
+    assert client_channel.features == (FEATURE_CACHE,)
+    assert client_channel.negotiated and server_channel.negotiated
+
+
+def test_handshake_falls_back_to_json_for_legacy_clients():
+    async def main():
+        client, server = _pipes()
+        await client.send(JsonCodec().encode(EndOfAudioMessage(hash="h")))
+        return await accept_handshake(server)
+
+    channel, first = asyncio.run(main())
+    assert channel.protocol == PROTOCOL_JSON
+    assert not channel.negotiated
+    assert first == EndOfAudioMessage(hash="h")
+
+
+def test_handshake_detects_legacy_servers():
+    async def main():
+        client, server = _pipes()
+        await server.send(JsonCodec().encode(ErrorMessage(error="Invalid message")))
+        return await request_handshake(client)
+
+    assert asyncio.run(main()) is None
+
+
+def test_hello_ack_without_features_parses():
+    msg = JsonCodec().decode('{"type": "hello_ack", "protocol": 2}')
+    assert msg == HelloAckMessage(protocol=2)
+    assert HelloMessage(protocols=(2, 1)).to_dict()["protocols"] == [2, 1]
+
+
+def test_closing_unfinished_job_sends_cancel():
+    async def main():
+        client, server = _pipes()
+        connection = MultiplexedConnection(MultiplexChannel(client))
+        finished = connection.open_job()
+        abandoned = connection.open_job()
+        await server.send(
+            MultiplexCodec().encode_job(finished.job_id, EndOfTranscriptionMessage())
+        )
+        assert await finished.recv() == EndOfTranscriptionMessage()
+        await finished.close()
+        await abandoned.close()
+        frame = await server.recv()
+        await connection.close()
+        return (
+            abandoned.job_id,
+            connection.active_jobs,
+            MultiplexCodec().decode_job(frame),
+        )
+
+    job_id, active_jobs, decoded = asyncio.run(main())
+    assert decoded == (job_id, CancelJobMessage())
+    assert active_jobs == 0
+
+
+def test_closing_connection_fails_open_jobs():
+    async def main():
+        client, _ = _pipes()
+        connection = MultiplexedConnection(MultiplexChannel(client))
+        stream = connection.open_job()
+        await asyncio.sleep(0)
+        await connection.close()
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(stream.recv(), timeout=1)
+
+    asyncio.run(main())
+
+
+def test_invalid_frame_fails_only_its_job():
+    async def main():
+        client, server = _pipes()
+        connection = MultiplexedConnection(MultiplexChannel(client))
+        broken = connection.open_job()
+        healthy = connection.open_job()
+        await server.send(broken.job_id.to_bytes(4, "little") + b"\xff")
+        await server.send(b"\x01")
+        await server.send(
+            MultiplexCodec().encode_job(healthy.job_id, EndOfTranscriptionMessage())
+        )
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(broken.recv(), timeout=1)
+        received = await asyncio.wait_for(healthy.recv(), timeout=1)
+        closed = connection.closed
+        await connection.close()
+        return received, closed
+
+    received, closed = asyncio.run(main())
+    assert received == EndOfTranscriptionMessage()
+    assert not closed
+
+
+def test_reader_closes_channel_when_connection_drops():
+    class _DroppingPipe(_Pipe):
+        closed = False
+
+        async def recv(self):
+            raise ConnectionResetError("dropped")
+
+        async def close(self):
+            self.closed = True
+
+    async def main():
+        pipe = _DroppingPipe(asyncio.Queue(), asyncio.Queue())
+        connection = MultiplexedConnection(MultiplexChannel(pipe))
+        stream = connection.open_job()
+        with pytest.raises(ConnectionResetError):
+            await asyncio.wait_for(stream.recv(), timeout=1)
+        return pipe.closed
+
+    assert asyncio.run(main())
+
+
+def test_server_ignores_frames_for_finished_jobs():
+    async def main():
+        client, server = _pipes()
+        transcriber_server = WebSocketIterableTranscriberServer(
+            None, status_interval=60
+        )
+        served: list[tuple[int, object]] = []
+
+        async def serve_job(stream, first, local):
+            served.append((stream.job_id, await stream.recv()))
+
+        transcriber_server._serve_job = serve_job
+        task = asyncio.create_task(
+            transcriber_server._serve_multiplexed(MultiplexChannel(server), False)
+        )
+        codec = MultiplexCodec()
+        await client.send(codec.encode_job_audio(1, b"first"))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        await client.send(codec.encode_job_audio(1, b"late"))
+        await client.send(codec.encode_job(1, CancelJobMessage()))
+        await client.send(codec.encode_job_audio(2, b"second"))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        return served
+
+    assert asyncio.run(main()) == [(1, b"first"), (2, b"second")]
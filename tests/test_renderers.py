@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from src.summarizer.meeting_notes import MeetingNotes, parse_meeting_notes
+from src.summarizer.prompt_provider.structured_markdown import (
+    StructuredMarkdownSummarizePromptProvider,
+)
+from src.summarizer.renderer.obsidian import ObsidianNotesRenderer
+from src.summarizer.renderer.structured_markdown import (
+    StructuredMarkdownNotesRenderer,
+)
+from src.summarizer.renderer.working_out_loud import WorkingOutLoudNotesRenderer
+from src.summarizer.structured import StructuredSummarizer
+from tests.conftest import FakeSummarizer
+
+NOTES = {
+    "date": "2026-10-18",
+    "attendees": ["田中", "佐藤"],
+    "tldr": ["予算を決めた"],
+    "agenda": [{"title": "予算", "points": ["上限は100万円"]}],
+    "decisions": ["来月から開始する"],
+}
+
+
+def test_parse_accepts_code_fences():
+    content = f"```json\n{json.dumps(NOTES, ensure_ascii=False)}\n```"
+    assert parse_meeting_notes(content) == MeetingNotes.model_validate(NOTES)
+
+
+def test_parse_rejects_invalid_json():
+    with pytest.raises(RuntimeError):
+        parse_meeting_notes("議事録です")
+
+
+def test_structured_markdown_layout():
+    text = StructuredMarkdownNotesRenderer().render(MeetingNotes.model_validate(NOTES))
+    assert text.startswith("# 議事録\n**日時**: 2026-10-18\n**参加者**: 田中, 佐藤\n")
+    assert "### 1. 予算\n- 上限は100万円\n" in text
+    assert "## 進捗\n- なし\n" in text
+    assert text.endswith("## 決まらなかったこと\n- なし\n")
+
+
+def test_obsidian_layout_keeps_the_tag():
+    text = ObsidianNotesRenderer().render(MeetingNotes())
+    assert text.startswith("#minute\n\n**日時**: \n")
+
+
+def test_structured_summarizer_renders_one_response_with_context():
+    summarizer = FakeSummarizer(content=json.dumps(NOTES, ensure_ascii=False))
+    structured = StructuredSummarizer(
+        summarizer,
+        StructuredMarkdownNotesRenderer(),
+        StructuredMarkdownSummarizePromptProvider(),
+    )
+    summary = structured.generate_meeting_notes("こんにちは", "参加者: 田中")
+    assert summary.content.startswith("# 議事録\n")
+    assert (summary.input_token_count, summary.output_token_count) == (3, 5)
+    (prompt,) = summarizer.prompts
+    assert "【JSONスキーマ】" in prompt
+    assert prompt.endswith("参加者: 田中\n文字起こし: こんにちは\n")
+
+
+def test_working_out_loud_layout():
+    notes = MeetingNotes.model_validate({**NOTES, "open_items": ["担当を決める"]})
+    text = WorkingOutLoudNotesRenderer(hashtags=("#WOL", "#予算")).render(notes)
+    assert text == "・予算を決めた\n✅ 来月から開始する\n🔜 担当を決める\n\n#WOL #予算"
+
+
+def test_one_response_renders_every_format():
+    summarizer = FakeSummarizer(content=json.dumps(NOTES, ensure_ascii=False))
+    structured = StructuredSummarizer(
+        summarizer,
+        StructuredMarkdownNotesRenderer(),
+        StructuredMarkdownSummarizePromptProvider(),
+    )
+    notes, _ = structured.generate_notes("こんにちは")
+    assert ObsidianNotesRenderer().render(notes).startswith("#minute\n")
+    assert WorkingOutLoudNotesRenderer().render(notes).endswith("#WorkingOutLoud")
+    assert summarizer.calls == 1
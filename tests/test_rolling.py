@@ -0,0 +1,77 @@
+import asyncio
+
+from src.summarizer.rolling import RollingSummarizer
+from src.summarizer.summarizer import Summarizer, Summary
+
+
+class FakePartialSummarizer:
+    """区切りの要約を記録し、fail_on を含む区切りでは失敗する"""
+
+    def __init__(self, fail_on: str | None = None):
+        self.fail_on = fail_on
+        self.prompts: list[str] = []
+
+    async def complete_async(self, system_prompt: str, prompt: str) -> Summary:
+        self.prompts.append(prompt)
+        if self.fail_on is not None and self.fail_on in prompt:
+            raise RuntimeError("section failed")
+        return Summary(content="<note>", input_token_count=2, output_token_count=3)
+
+
+class RecordingSummarizer(Summarizer):
+    def __init__(self):
+        self.calls: list[tuple[str, str | None]] = []
+
+    def generate_meeting_notes(
+        self, transcription: str, context: str | None = None
+    ) -> Summary:
+        self.calls.append((transcription, context))
+        return Summary(content="議事録", input_token_count=1, output_token_count=1)
+
+
+def _run(partial, lines, context="参加者: 田中"):
+    async def main():
+        rolling = RollingSummarizer(partial, section_tokens=5)
+        for line in lines:
+            rolling.add(line)
+        final = RecordingSummarizer()
+        summaries = [s async for s in rolling.stream_meeting_notes(final, context)]
+        return rolling, final, summaries
+
+    return asyncio.run(main())
+
+
+def test_summarizes_sections_and_passes_context_to_the_final_call():
+    partial = FakePartialSummarizer()
+    lines = [
+        "予算の話をします。来月までに決めます。",
+        "次の議題に移ります。担当者を決めます。",
+    ]
+    rolling, final, summaries = _run(partial, lines)
+    assert rolling.covers("\n".join(lines))
+    assert len(partial.prompts) == 2
+    ((merged, context),) = final.calls
+    assert context == "参加者: 田中"
+    assert merged.count("<note>") == 2
+    assert summaries[-1].input_token_count == 1 + 2 * 2
+    assert summaries[-1].output_token_count == 1 + 3 * 2
+
+
+def test_failed_section_falls_back_to_its_transcript():
+    partial = FakePartialSummarizer(fail_on="次の議題")
+    lines = [
+        "予算の話をします。来月までに決めます。",
+        "次の議題に移ります。担当者を決めます。",
+    ]
+    _, final, _ = _run(partial, lines)
+    ((merged, _),) = final.calls
+    assert "次の議題に移ります" in merged
+    assert merged.count("<note>") == 1
+
+
+def test_short_meeting_is_summarized_directly():
+    partial = FakePartialSummarizer()
+    rolling, final, _ = _run(partial, ["短い"])
+    assert partial.prompts == []
+    assert final.calls == [("短い", "参加者: 田中")]
+    assert rolling.fed
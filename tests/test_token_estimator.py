@@ -0,0 +1,38 @@
+from src.summarizer.token_estimator import (
+    _split_line,
+    context_window,
+    estimate_tokens,
+    split_by_tokens,
+)
+
+
+def test_estimate_counts_wide_characters_one_by_one():
+    assert estimate_tokens("会議abcd") == 3
+    assert estimate_tokens("") == 0
+
+
+def test_split_keeps_lines_under_the_limit():
+    text = "\n".join(["a" * 36] * 12)
+    chunks = split_by_tokens(text, 50)
+    assert [chunk.count("\n") + 1 for chunk in chunks] == [5, 5, 2]
+    assert "\n".join(chunks) == text
+
+
+def test_split_cuts_a_line_over_the_limit():
+    chunks = split_by_tokens("前置き\n" + "あ" * 25 + "\n後書き", 10)
+    assert chunks == ["前置き", "あ" * 10, "あ" * 10, "あ" * 5, "後書き"]
+
+
+def test_split_line_uses_max_tokens_characters():
+    assert _split_line("abcdefg", 3) == ["abc", "def", "g"]
+
+
+def test_context_window_uses_the_longest_prefix():
+    assert context_window("gpt-4o-mini") == 128_000
+    assert context_window("gpt-4.1-nano") == 1_047_576
+    assert context_window("unknown") is None
+
+
+def test_context_window_of_combined_models_is_the_smallest():
+    assert context_window("gpt-4o+gemini-2.5-pro") == 128_000
+    assert context_window("gpt-4o+unknown") is None
@@ -0,0 +1,60 @@
+import asyncio
+import hashlib
+import math
+import shutil
+import struct
+import wave
+
+import pytest
+
+from src.transcriber.upload_format import TranscodeError, transcode_stream
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="ffmpeg is not installed"
+)
+
+
+def _write_tone(path, seconds: float = 1.0, rate: int = 48000) -> None:
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(
+            b"".join(
+                struct.pack("<hh", sample, sample)
+                for i in range(int(seconds * rate))
+                for sample in [int(8000 * math.sin(2 * math.pi * 440 * i / rate))]
+            )
+        )
+
+
+def _transcode_hash(path, upload_format) -> str:
+    async def main():
+        hasher = hashlib.sha256()
+        async for chunk in transcode_stream(str(path), upload_format):
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
+    return asyncio.run(main())
+
+
+@requires_ffmpeg
+@pytest.mark.parametrize("upload_format", ["opus", "flac"])
+def test_transcoding_is_deterministic(tmp_path, upload_format):
+    # キャッシュのキーはアップロードしたバイト列のハッシュなので、変換結果が毎回一致する必要がある
+    source = tmp_path / "tone.wav"
+    _write_tone(source)
+    assert _transcode_hash(source, upload_format) == _transcode_hash(
+        source, upload_format
+    )
+
+
+@requires_ffmpeg
+def test_transcode_failure_raises_transcode_error(tmp_path):
+    with pytest.raises(TranscodeError):
+        _transcode_hash(tmp_path / "missing.wav", "opus")
+
+
+def test_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        _transcode_hash(tmp_path / "tone.wav", "mp3")
@@ -0,0 +1,23 @@
+import pytest
+
+from src.transcriber.websocket_client import WebSocketIterableTranscriberClient
+
+
+def test_each_server_gets_its_own_endpoint():
+    client = WebSocketIterableTranscriberClient(["ws://a:1", "ws://b:1"])
+    assert [endpoint.name for endpoint in client.pool.endpoints] == [
+        "ws://a:1",
+        "ws://b:1",
+    ]
+
+
+def test_unix_socket_with_one_server():
+    client = WebSocketIterableTranscriberClient("ws://a:1", unix_socket="/tmp/s.sock")
+    assert [endpoint.name for endpoint in client.pool.endpoints] == ["/tmp/s.sock"]
+
+
+def test_unix_socket_cannot_be_shared_by_several_servers():
+    with pytest.raises(ValueError):
+        WebSocketIterableTranscriberClient(
+            ["ws://a:1", "ws://b:1"], unix_socket="/tmp/s.sock"
+        )